@@ -5,6 +5,7 @@ This is the entry point for atmos_validation when run as a CLI.
 import sys
 
 from .convert_ascii import main as convert_ascii
+from .ingest_ascii import main as ingest_ascii
 from .validate_ascii import main as validate_ascii
 from .validate_netcdf import main as validate_netcdf
 
@@ -17,6 +18,7 @@ Commands:
     validate-netcdf \t \t Run validation on a hindcast or measurement dataset (NetCDF standard format check)
     validate-ascii \t \t Run validation on a measurement ascii file
     convert-ascii \t \t Convert a measurement ascii file to NetCDF standard
+    ingest-ascii \t \t Validate a measurement ascii file, convert it and validate the NetCDF before writing it
 """
 
 
@@ -28,6 +30,8 @@ def main():
             validate_ascii()
         elif sys.argv[1] == "convert-ascii":
             convert_ascii()
+        elif sys.argv[1] == "ingest-ascii":
+            ingest_ascii()
         else:
             print(DOCSTRING)
 
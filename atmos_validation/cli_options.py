@@ -0,0 +1,33 @@
+"""
+Options shared by the commands of the CLI, e.g. those of the batch runs of
+validate-netcdf, validate-ascii and convert-ascii.
+"""
+
+from typing import List, Optional
+
+BATCH: str = "--batch"
+WORKERS: str = "--workers"
+JOURNAL: str = "--journal"
+
+
+def parse_option_value(optional_args: List[str], option: str) -> Optional[str]:
+    """Value of an option given either as "--option value" or "--option=value" """
+    for i, arg in enumerate(optional_args):
+        if arg == option:
+            if i + 1 >= len(optional_args):
+                raise ValueError(f"{option} requires a value")
+            return optional_args[i + 1]
+        if arg.startswith(f"{option}="):
+            return arg.split("=", 1)[1]
+    return None
+
+
+def parse_workers(optional_args: List[str]) -> Optional[int]:
+    """Value of --workers, None if not given. Raises ValueError unless it is a
+    positive int."""
+    workers = parse_option_value(optional_args, WORKERS)
+    if workers is None:
+        return None
+    if int(workers) < 1:
+        raise ValueError(f"{WORKERS} must be at least 1")
+    return int(workers)
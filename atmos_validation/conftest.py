@@ -0,0 +1,52 @@
+import json
+from typing import Callable, Iterator, List
+
+import pytest
+from pydantic import TypeAdapter
+
+from .convert_ascii.utils import get_config_for_key
+from .schemas import ParameterConfig
+from .validate_netcdf import config_cache, validation_settings
+
+PinConfigs = Callable[..., None]
+
+
+@pytest.fixture(name="pin_configs")
+def fixture_pin_configs(monkeypatch) -> Iterator[PinConfigs]:
+    """
+    Pins the configs for the test, so none are downloaded. Call it with the
+    parameter configs and, optionally, the allowed data usability level; the
+    allowed installation type is PLATFORM and the allowed instrument types are
+    the anemometers of the examples. May be called again to pin other configs.
+    """
+    monkeypatch.setattr(config_cache, "_pinned", {})
+    monkeypatch.setattr(config_cache, "_parsed", {})
+    parsers = dict(config_cache._all_configs())  # type: ignore
+
+    def pin(
+        parameters: List[ParameterConfig], data_usability: str = "PROCESSED"
+    ) -> None:
+        contents = {
+            validation_settings.URL_TO_PARAMETERS: TypeAdapter(
+                list[ParameterConfig]
+            ).dump_json(parameters),
+            validation_settings.URL_TO_INST_TYPES: json.dumps(
+                [{"installation_type": "PLATFORM"}]
+            ).encode(),
+            validation_settings.URL_TO_DATA_USABILITY: json.dumps(
+                [{"level": data_usability}]
+            ).encode(),
+            validation_settings.URL_TO_INSTRUMENT_TYPES: json.dumps(
+                [
+                    {"instrument_type": "SONIC ANEMOMETER"},
+                    {"instrument_type": "PROPELLER ANEMOMETER"},
+                ]
+            ).encode(),
+        }
+        config_cache.pin_configs(
+            {url: (content, parsers[url](content)) for url, content in contents.items()}
+        )
+        get_config_for_key.cache_clear()
+
+    yield pin
+    get_config_for_key.cache_clear()
@@ -1,8 +1,8 @@
 import json
-from typing import Dict
+from typing import Dict, List, Optional
 
 from ..schemas import DataType, MeasurementMetadata
-from .utils import get_encoding
+from ..validate_ascii.ascii_reader import read_ascii
 
 
 def load_attrs_map(attrs_map_path: str) -> Dict[str, str]:
@@ -10,37 +10,37 @@ def load_attrs_map(attrs_map_path: str) -> Dict[str, str]:
         return json.load(attrs_map)
 
 
-def parse_measurement_attrs(file_name: str, attrs_map_path: str):
-    encoding = get_encoding(file_name)
-    with open(file_name, "r", encoding=encoding, errors="ignore") as local_file:
-        lines = local_file.readlines()
-        attrs = {}
+def parse_measurement_attrs(
+    file_name: str, attrs_map_path: str, header_lines: Optional[List[str]] = None
+):
+    """header_lines are read from file_name if not given"""
+    lines = header_lines
+    if lines is None:
+        lines = read_ascii(file_name).header_lines
+    attrs = {}
 
-        attrs_map = load_attrs_map(attrs_map_path)
-        for line in lines:
-            if line.startswith("%"):
-                attrs.update(
-                    {
-                        metadata: (
-                            *map(lambda s: s.strip(), filter(None, line.split(":"))),
-                        )[-1]
-                        for metadata, attr in attrs_map.items()
-                        if line.replace("%", "")
-                        .strip()
-                        .lower()
-                        .startswith(attr.lower())
-                    }
-                )
+    attrs_map = load_attrs_map(attrs_map_path)
+    for line in lines:
+        if line.startswith("%"):
+            attrs.update(
+                {
+                    metadata: (
+                        *map(lambda s: s.strip(), filter(None, line.split(":"))),
+                    )[-1]
+                    for metadata, attr in attrs_map.items()
+                    if line.replace("%", "").strip().lower().startswith(attr.lower())
+                }
+            )
 
-        attrs["final_reports"] = attrs["final_reports"].split(",")
-        attrs["instrument_types"] = attrs["instrument_types"].upper()
-        attrs["installation_type"] = attrs["installation_type"].upper()
-        attrs["data_usability"] = attrs["data_usability"].upper()
-        attrs["source_file"] = (
-            file_name.replace("ø", "oe").replace("æ", "ae").replace("å", "aa")
-        )  # NetCDF attrs can not have Norwegian letters
-        if "asset" not in attrs:
-            attrs["asset"] = "NA"
-        if "country" not in attrs:
-            attrs["country"] = "NA"
-        return MeasurementMetadata(**attrs, data_type=DataType.MEASUREMENT)
+    attrs["final_reports"] = attrs["final_reports"].split(",")
+    attrs["instrument_types"] = attrs["instrument_types"].upper()
+    attrs["installation_type"] = attrs["installation_type"].upper()
+    attrs["data_usability"] = attrs["data_usability"].upper()
+    attrs["source_file"] = (
+        file_name.replace("ø", "oe").replace("æ", "ae").replace("å", "aa")
+    )  # NetCDF attrs can not have Norwegian letters
+    if "asset" not in attrs:
+        attrs["asset"] = "NA"
+    if "country" not in attrs:
+        attrs["country"] = "NA"
+    return MeasurementMetadata(**attrs, data_type=DataType.MEASUREMENT)
@@ -0,0 +1,86 @@
+"""
+Conversion of many ASCII files in one run, e.g. the files of a campaign.
+
+The files are found as for validate-ascii --batch (see
+validate_ascii.batch.find_ascii_files) and converted in a pool of worker
+processes, which are handed the configs loaded once by the parent process.
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from ..validate_ascii.batch import find_ascii_files
+from ..validate_netcdf import config_cache, validation_settings
+from ..validate_netcdf.validation_logger import log
+from .df_to_nc import ascii_to_nc, ascii_to_nc_files
+from .output_layout import DEFAULT_LAYOUT, OutputLayout
+
+
+@dataclass
+class ConvertResult:
+    # Paths of the written NetCDF files
+    outputs: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def convert(
+    source_file: str,
+    split: Optional[str] = None,
+    layout: OutputLayout = DEFAULT_LAYOUT,
+) -> List[str]:
+    """
+    Convert source_file to a NetCDF file, or to a file per year or month if
+    split, see ascii_to_nc_files. Returns the paths of the written files.
+    """
+    if split:
+        return ascii_to_nc_files(source_file, split, layout=layout)
+    return [ascii_to_nc(source_file, layout)]
+
+
+def convert_many(
+    sources: Iterable[str],
+    split: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    additional_args: Optional[List[str]] = None,
+    layout: OutputLayout = DEFAULT_LAYOUT,
+) -> Dict[str, ConvertResult]:
+    """
+    Convert all ASCII files given by sources: files, directories or glob patterns.
+
+    Args:
+        sources: files, directories or glob patterns
+        split: "year" or "month" to write a file per year or month, see
+        ascii_to_nc_files
+        max_workers: maximum number of files converted concurrently,
+        defaults to the number of CPUs
+        additional_args: CLI style options for loading the configs, e.g.
+        --offline or --config-cache-dir
+        layout: layout of the written files, see OutputLayout
+
+    Returns:
+        ConvertResult per file path, in the order of the paths
+    """
+    paths = find_ascii_files(sources)
+    log.info("Converting %s files", len(paths))
+    results: Dict[str, ConvertResult] = {}
+    if paths:
+        validation_settings.apply_settings(additional_args or [])
+        warm = config_cache.warm_up()
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=config_cache.pin_configs,
+            initargs=(warm,),
+        ) as pool:
+            futures: Dict[Future[List[str]], str] = {
+                pool.submit(convert, path, split, layout): path for path in paths
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    results[path] = ConvertResult(outputs=future.result())
+                except Exception as err:
+                    log.error("Conversion of %s failed: %r", path, err)
+                    results[path] = ConvertResult(error=repr(err))
+
+    return {path: results[path] for path in paths}
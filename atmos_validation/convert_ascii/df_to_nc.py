@@ -1,92 +1,212 @@
 import os
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
+import numpy as np
+import numpy.typing as npt
 import pandas as pd
 import xarray as xr
 
 from ..schemas import dim_constants
+from ..validate_ascii.ascii_reader import AsciiFile, read_ascii
 from .attrs_to_meta import parse_measurement_attrs
-from .parsers import data_frame_parser, parse_location_text, parse_parameter_meta
+from .output_layout import DEFAULT_LAYOUT, OutputLayout
+from .parsers import (
+    data_frame_parser,
+    parse_location_text,
+    parse_parameter_meta,
+    typed_data_frame,
+)
 from .utils import (
-    assign_datetime,
+    generate_nc_filename,
+    generate_time_filename,
     get_attrs_for_key,
     get_config_for_key,
-    get_encoding,
     get_heights_for_key,
+    get_time_coordinate,
     store_netcdf,
 )
 
+# Periods a record can be split into, see ascii_to_nc_files
+SPLITS = ("year", "month")
+
+# Rows of the data block read at a time when splitting a record
+CHUNK_ROWS = 100_000
+
 
-def ascii_to_nc(source_file: str) -> str:
-    df, parameter_meta = parse_file(source_file)
+def ascii_to_nc(source_file: str, layout: OutputLayout = DEFAULT_LAYOUT) -> str:
+    ds = ascii_to_ds(source_file)
+    return store_netcdf(source_file, ds, layout=layout)
+
+
+def ascii_to_ds(source_file: str) -> xr.Dataset:
+    """The dataset of source_file, as written by ascii_to_nc"""
+    ascii_file, header_line, parameter_meta = parse_header(source_file)
+    df = data_frame_parser(header_line=header_line, ascii_file=ascii_file)
     ds = df_to_ds(df, parameter_meta)
-    assign_metadata_to_ds(source_file, ds)
-    return store_netcdf(source_file, ds)
+    assign_metadata_to_ds(ascii_file, ds)
+    return ds
+
+
+def ascii_file_to_ds(ascii_file: AsciiFile, data: pd.DataFrame) -> xr.Dataset:
+    """
+    The dataset of ascii_file, as written by ascii_to_nc, from its data block
+    as read by AsciiFile.read_data() without options, see typed_data_frame.
+    """
+    header_line, parameter_meta = get_header(ascii_file)
+    ds = df_to_ds(typed_data_frame(header_line, data), parameter_meta)
+    assign_metadata_to_ds(ascii_file, ds)
+    return ds
+
+
+def ascii_to_nc_files(
+    source_file: str,
+    split: str,
+    chunk_rows: int = CHUNK_ROWS,
+    layout: OutputLayout = DEFAULT_LAYOUT,
+) -> List[str]:
+    """
+    Convert source_file to a NetCDF file per year or month (split), named
+    <name>_<start>_<end>_T<time_length>.nc, in a directory named as the file
+    written by ascii_to_nc without ".nc". The data block is read chunk_rows rows
+    at a time and every file is written as soon as its rows are read, so memory
+    is bounded by the size of one file rather than of the whole record.
+
+    Returns:
+        paths of the written files, in chronological order
+    """
+    if split not in SPLITS:
+        raise ValueError(f"Cannot split by {split}, choose one of {SPLITS}")
+    ascii_file, header_line, parameter_meta = parse_header(source_file)
+    attrs = get_measurement_attrs(ascii_file)
+    directory = generate_nc_filename(source_file).removesuffix(".nc")
+    os.makedirs(directory, exist_ok=True)
+
+    name = os.path.basename(directory)
+    nc_filenames = []
+    with data_frame_parser(header_line, ascii_file, chunksize=chunk_rows) as chunks:
+        for df in split_periods(chunks, split):
+            ds = df_to_ds(df, dict(parameter_meta))
+            ds.attrs = dict(attrs)
+            nc_filename = generate_time_filename(name, ds["Time"].values)
+            nc_filenames.append(
+                store_netcdf(
+                    source_file, ds, os.path.join(directory, nc_filename), layout
+                )
+            )
+    return nc_filenames
+
+
+def split_periods(chunks: Iterable[pd.DataFrame], split: str) -> Iterator[pd.DataFrame]:
+    """
+    The rows of consecutive chunks of the data block by year or month (split).
+    The rows of a period are yielded as soon as a row of the next period is
+    read. Raises ValueError if the rows of a period are not consecutive.
+    """
+    pending: List[pd.DataFrame] = []
+    pending_key = None
+    finished = set()
+    for chunk in chunks:
+        keys = get_period_keys(chunk, split)
+        starts = np.concatenate([[0], np.flatnonzero(keys[1:] != keys[:-1]) + 1])
+        ends = np.append(starts[1:], len(keys))
+        for start, end in zip(starts, ends):
+            key = int(keys[start])
+            if pending and key != pending_key:
+                yield pd.concat(pending)
+                finished.add(pending_key)
+                pending = []
+            if key in finished:
+                raise ValueError(
+                    "The rows must be in chronological order to be split by " + split
+                )
+            pending.append(chunk.iloc[start:end])
+            pending_key = key
+    if pending:
+        yield pd.concat(pending)
+
+
+def get_period_keys(df: pd.DataFrame, split: str) -> npt.NDArray[np.int64]:
+    """A number per row of df, the same for the rows of a year or month"""
+    years = df["YY"].to_numpy(dtype=np.int64)
+    if split == "month":
+        return years * 12 + df["MM"].to_numpy(dtype=np.int64)
+    return years
 
 
 def parse_file(source_file: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
-    encoding = get_encoding(source_file)
-    with open(source_file, "r", encoding=encoding, errors="ignore") as local_file:
-        lines = local_file.readlines()
-        header_line_number = 0
-        parameters_start = 0
-        parameter_meta = {}
-        for line_number, line_content in enumerate(lines):
-            if line_content.startswith("% Location"):
-                loc_lat, loc_lon = parse_location_text(line_content)
-                parameter_meta["loc_lat"] = loc_lat
-                parameter_meta["loc_lon"] = loc_lon
-            if line_content.startswith("% Hour"):
-                parameters_start = line_number + 1
-            if line_content.startswith("% Minute"):
-                parameters_start = line_number + 1
-            if not line_content.startswith("%"):
-                header_line_number = line_number - 1
-                break
-
-        df = data_frame_parser(
-            header_line=lines[header_line_number],
-            data_lines=[line.split() for line in lines[header_line_number + 1 :]],
-        )
-
-        parameters_lines = lines[parameters_start:header_line_number]
-        parameter_meta = parse_parameter_meta(parameters_lines, parameter_meta)
-
-        return df, parameter_meta
+    ascii_file, header_line, parameter_meta = parse_header(source_file)
+    df = data_frame_parser(header_line=header_line, ascii_file=ascii_file)
+    return df, parameter_meta
+
+
+def parse_header(source_file: str) -> Tuple[AsciiFile, str, Dict[str, Any]]:
+    """The file, the header line naming the columns and the parameter metadata"""
+    ascii_file = read_ascii(source_file)
+    return (ascii_file, *get_header(ascii_file))
+
+
+def get_header(ascii_file: AsciiFile) -> Tuple[str, Dict[str, Any]]:
+    """The header line naming the columns and the parameter metadata"""
+    lines = ascii_file.header_lines
+    parameters_start = 0
+    parameter_meta = {}
+    for line_number, line_content in enumerate(lines):
+        if line_content.startswith("% Location"):
+            loc_lat, loc_lon = parse_location_text(line_content)
+            parameter_meta["loc_lat"] = loc_lat
+            parameter_meta["loc_lon"] = loc_lon
+        if line_content.startswith("% Hour"):
+            parameters_start = line_number + 1
+        if line_content.startswith("% Minute"):
+            parameters_start = line_number + 1
+
+    # The last header line names the columns of the data block
+    header_line_number = len(lines) - 1
+
+    parameters_lines = lines[parameters_start:header_line_number]
+    parameter_meta = parse_parameter_meta(parameters_lines, parameter_meta)
+
+    return lines[header_line_number], parameter_meta
 
 
 def df_to_ds(df: pd.DataFrame, parameter_meta: Dict[str, Any]) -> xr.Dataset:
-    data_arrays = {}
+    """
+    The variables of parameter_meta from the columns of df. The coordinates are
+    built once and shared by all variables, and the values of each variable are
+    copied once, from the columns of df into its data array.
+    """
     lat = parameter_meta.pop("loc_lat")
     lon = parameter_meta.pop("loc_lon")
-    df = assign_datetime(df)
+    coords: Dict[str, Any] = {
+        "Time": get_time_coordinate(df),
+        "LAT": (["south_north", "west_east"], [[lat]]),
+        "LON": (["south_north", "west_east"], [[lon]]),
+    }
+    data_vars = {}
     for key, key_meta in parameter_meta.items():
         attrs = get_attrs_for_key(key, instruments=str(key_meta["instruments"]))
         heights = get_heights_for_key(key, key_meta)
-
         columns = key_meta.get("key_columns")
-        data = df.filter(columns).to_numpy()
-        coords = {
-            "Time": df["datetime"].values.astype("datetime64"),
-            "LAT": (["south_north", "west_east"], [[lat]]),
-            "LON": (["south_north", "west_east"], [[lon]]),
-        }
 
         if heights:
-            shape = len(df["datetime"]), len(heights), 1, 1
-            dims = ("Time", "height_" + key, "south_north", "west_east")
-            coords[f"{dim_constants.HEIGHT_DIM_PREFIX}{key}"] = heights
+            height_dim = f"{dim_constants.HEIGHT_DIM_PREFIX}{key}"
+            order = np.argsort(heights, kind="stable")
+            arrays = [df[columns[index]].to_numpy() for index in order]
+            data = np.empty(
+                (len(df.index), len(heights), 1, 1), dtype=np.result_type(*arrays)
+            )
+            for position, values in enumerate(arrays):
+                data[:, position, 0, 0] = values
+            coords[height_dim] = np.asarray(heights)[order]
+            dims = ("Time", height_dim, "south_north", "west_east")
         else:
-            shape = len(df["datetime"]), 1, 1
+            # A view of the column, not a copy
+            data = df[columns[0]].to_numpy().reshape(len(df.index), 1, 1)
             dims = ("Time", "south_north", "west_east")
 
-        data = data.reshape(shape)
-        data_array = xr.DataArray(data, dims=dims, coords=coords, attrs=attrs)
-        if heights:
-            data_array = data_array.sortby(f"height_{key}")
-        data_arrays[key] = data_array
+        data_vars[key] = (dims, data, attrs)
 
-    return enrich_coord_attrs(xr.Dataset(data_arrays))
+    return enrich_coord_attrs(xr.Dataset(data_vars, coords=coords))
 
 
 def enrich_coord_attrs(ds: xr.Dataset) -> xr.Dataset:
@@ -114,9 +234,15 @@ def enrich_coord_attrs(ds: xr.Dataset) -> xr.Dataset:
     return ds
 
 
-def assign_metadata_to_ds(source_file: str, ds: xr.Dataset):
+def assign_metadata_to_ds(ascii_file: AsciiFile, ds: xr.Dataset):
+    ds.attrs = get_measurement_attrs(ascii_file)
+
+
+def get_measurement_attrs(ascii_file: AsciiFile) -> Dict[str, Any]:
+    """The global attributes from the header of ascii_file"""
     measurement_meta = parse_measurement_attrs(
-        source_file,
+        ascii_file.path,
         os.path.join(os.path.dirname(__file__), "measurement_metadata_to_schema.json"),
+        ascii_file.header_lines,
     )
-    ds.attrs = measurement_meta.dict()
+    return measurement_meta.dict()
@@ -1,21 +1,145 @@
+import dataclasses
+import itertools
+import json
+import os
 import sys
+from typing import List, Optional
 
-from .df_to_nc import ascii_to_nc
+from ..cli_options import BATCH, WORKERS, parse_option_value, parse_workers
+from .batch import convert_many
+from .df_to_nc import SPLITS, ascii_to_ds, ascii_to_nc, ascii_to_nc_files
+from .output_layout import (
+    BENCHMARK_LAYOUTS,
+    DEFAULT_LAYOUT,
+    OutputLayout,
+    benchmark_layouts,
+    format_benchmark,
+)
+from .utils import get_significant_decimals
 
-DOCSTRING = """
-Usage: python -m atmos_validation convert-ascii [SRC_FILENAME]
+SPLIT = "--split"
+CHUNK_BYTES = "--chunk-bytes"
+COMPLEVEL = "--complevel"
+SHUFFLE = "--shuffle"
+QUANTIZE = "--quantize"
+TIME_DTYPE = "--time-dtype"
+BENCHMARK = "--benchmark"
+
+DOCSTRING = f"""
+Usage: python -m atmos_validation convert-ascii [SRC_FILENAME] [OPTIONS]
+       python -m atmos_validation convert-ascii {BATCH} SRC [SRC ...] [OPTIONS]
 
 Convert a .dat, .txt or .LIS file to Atmos compliant NetCDF file.
 
 Args:
     SRC_FILENAME \t \t The source file in .dat, .txt or .LIS format to convert
+    SRC \t \t \t Files, directories or glob patterns of files to convert. Directories
+    \t \t \t are searched recursively for .dat, .txt and .LIS files.
+
+Options:
+    {SPLIT} year|month \t Write a file per year or month, named <name>_<start>_<end>_T<time_length>.nc,
+    \t \t \t in a directory named after the source file
+    {CHUNK_BYTES} N \t \t Size the chunks of the variables to N bytes along Time. By default a chunk
+    \t \t \t holds 10000 timestamps of a variable with heights, or all of a variable without
+    {COMPLEVEL} N \t \t zlib compression level 0-9, 0 for no compression (default {DEFAULT_LAYOUT.complevel})
+    {SHUFFLE} \t \t Apply the shuffle filter before compression
+    {QUANTIZE} \t \t Round the values to the configured number of significant decimals
+    {TIME_DTYPE} float64|int64 \t dtype of Time in the file (default {DEFAULT_LAYOUT.time_dtype})
+    {BENCHMARK} \t \t Write the file with several layouts to a temporary directory and print the
+    \t \t \t write time, file size and read time of each, instead of converting it
+
+Batch options:
+    {WORKERS} N \t \t Number of files to convert in parallel (default number of CPUs)
+
+    A batch prints one JSON line per file with the written files or the error,
+    followed by a JSON line with the summary of the batch.
 """
 
 
 def main():
+    if len(sys.argv) > 2 and sys.argv[2] == BATCH:
+        main_batch()
+        return
     try:
         src_filename = sys.argv[2]
-        ascii_to_nc(src_filename)
+        split = get_split(sys.argv[3:])
+        layout = get_layout(sys.argv[3:])
+    except (IndexError, ValueError):
+        print(DOCSTRING)
+        return
+
+    if BENCHMARK in sys.argv[3:]:
+        print(format_benchmark(run_benchmark(src_filename, layout)))
+    elif split:
+        ascii_to_nc_files(src_filename, split, layout=layout)
+    else:
+        ascii_to_nc(src_filename, layout)
 
-    except IndexError:
+
+def main_batch():
+    sources = list(
+        itertools.takewhile(lambda arg: not arg.startswith("--"), sys.argv[3:])
+    )
+    args = sys.argv[3 + len(sources) :]
+    try:
+        if not sources:
+            raise ValueError("No files to convert")
+        split = get_split(args)
+        layout = get_layout(args)
+        workers = parse_workers(args)
+    except ValueError:
         print(DOCSTRING)
+        sys.exit(2)
+
+    results = convert_many(
+        sources,
+        split=split,
+        max_workers=workers,
+        additional_args=args,
+        layout=layout,
+    )
+    for path, result in results.items():
+        print(json.dumps({"path": path, **dataclasses.asdict(result)}))
+    failed = [path for path, result in results.items() if result.error]
+    summary = {
+        "files": len(results),
+        "converted": len(results) - len(failed),
+        "error": len(failed),
+    }
+    print(json.dumps({"summary": summary}))
+    if failed:
+        sys.exit(1)
+
+
+def get_split(optional_args: List[str]) -> Optional[str]:
+    split = parse_option_value(optional_args, SPLIT)
+    if split is not None and split not in SPLITS:
+        raise ValueError(f"{SPLIT} must be one of {SPLITS}")
+    return split
+
+
+def get_layout(optional_args: List[str]) -> OutputLayout:
+    chunk_bytes = parse_option_value(optional_args, CHUNK_BYTES)
+    complevel = parse_option_value(optional_args, COMPLEVEL)
+    time_dtype = parse_option_value(optional_args, TIME_DTYPE)
+    return OutputLayout(
+        chunk_bytes=None if chunk_bytes is None else int(chunk_bytes),
+        complevel=DEFAULT_LAYOUT.complevel if complevel is None else int(complevel),
+        shuffle=SHUFFLE in optional_args,
+        quantize=QUANTIZE in optional_args,
+        time_dtype=time_dtype or DEFAULT_LAYOUT.time_dtype,
+    )
+
+
+def run_benchmark(src_filename: str, layout: OutputLayout):
+    """The benchmark of BENCHMARK_LAYOUTS, and layout if it is not one of them"""
+    layouts = dict(BENCHMARK_LAYOUTS)
+    if layout not in layouts.values():
+        layouts["given"] = layout
+    ds = ascii_to_ds(src_filename)
+    return benchmark_layouts(
+        ds,
+        layouts,
+        decimals=get_significant_decimals(ds),
+        directory=os.path.dirname(os.path.abspath(src_filename)),
+    )
@@ -0,0 +1,209 @@
+"""
+Layout of the NetCDF files written by convert-ascii: chunk shapes, compression
+and the precision the values and the time axis are stored with.
+
+The default layout writes the files as convert-ascii always has. The layout that
+reads fastest depends on how the files are read downstream, so
+benchmark_layouts writes a dataset with several layouts and reports the write
+time, the file size and the time to read the point time series of all
+variables, the typical read pattern of measurement data.
+"""
+
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import xarray as xr
+
+TIME_UNITS = "microseconds since 1900-01-01 00:00:00"
+TIME_DTYPES = ("float64", "int64")
+# Chunk shape along the dimensions after Time: at most this many heights, and a
+# single grid point
+MAX_HEIGHTS_PER_CHUNK = 10
+
+
+@dataclass(frozen=True)
+class OutputLayout:
+    # Target size of a chunk in bytes, reached by the length of the chunks along
+    # Time. None for the fixed chunk shapes of get_chunksizes.
+    chunk_bytes: Optional[int] = None
+    # zlib compression level 0-9, 0 for no compression
+    complevel: int = 4
+    # Shuffle the bytes of the values before compression, which usually makes
+    # floats compress better
+    shuffle: bool = False
+    # Round the values to the number_of_significant_decimals of their parameter
+    # config, so the noise in the trailing bits does not have to be compressed
+    quantize: bool = False
+    # dtype of Time on disk, in TIME_UNITS
+    time_dtype: str = "float64"
+
+    def __post_init__(self):
+        if self.chunk_bytes is not None and self.chunk_bytes < 1:
+            raise ValueError("chunk_bytes must be at least 1")
+        if not 0 <= self.complevel <= 9:
+            raise ValueError("complevel must be between 0 and 9")
+        if self.time_dtype not in TIME_DTYPES:
+            raise ValueError(f"time_dtype must be one of {TIME_DTYPES}")
+
+    def encoding(self, ds: xr.Dataset) -> Dict[str, Dict[str, Any]]:
+        """Encoding of the variables of ds, for xr.Dataset.to_netcdf"""
+        encoding: Dict[str, Dict[str, Any]] = {
+            "Time": {"dtype": self.time_dtype, "units": TIME_UNITS}
+        }
+        for var in ds.data_vars:
+            var_encoding: Dict[str, Any] = {
+                "zlib": self.complevel > 0,
+                "chunksizes": self.chunksizes(ds[var], ds),
+            }
+            if self.complevel > 0:
+                var_encoding["complevel"] = self.complevel
+            if self.shuffle:
+                var_encoding["shuffle"] = True
+            encoding[str(var)] = var_encoding
+        return encoding
+
+    def chunksizes(
+        self, data: xr.DataArray, ds: xr.Dataset
+    ) -> Optional[Tuple[int, ...]]:
+        """Chunk shape of a 3D or 4D variable of ds, None for other variables"""
+        if self.chunk_bytes is None or data.ndim not in (3, 4):
+            return get_chunksizes(data.dims, ds)  # type: ignore
+        inner = (1, 1)
+        if data.ndim == 4:
+            inner = (min(MAX_HEIGHTS_PER_CHUNK, data.shape[1]), 1, 1)
+        time_length = self.chunk_bytes // (data.dtype.itemsize * int(np.prod(inner)))
+        return (int(min(max(time_length, 1), data.shape[0])), *inner)
+
+
+DEFAULT_LAYOUT = OutputLayout()
+
+# Layouts compared by benchmark_layouts, besides the layout given to it
+BENCHMARK_LAYOUTS = {
+    "default": DEFAULT_LAYOUT,
+    "shuffle": OutputLayout(shuffle=True),
+    "shuffle-quantize": OutputLayout(shuffle=True, quantize=True),
+    "1M-chunks-shuffle": OutputLayout(chunk_bytes=2**20, shuffle=True),
+    "uncompressed": OutputLayout(complevel=0, time_dtype="int64"),
+}
+
+
+def get_chunksizes(dims: Tuple[str], src: xr.Dataset) -> Union[tuple[int, ...], None]:
+    """Returns chunksizes for 3D or 4D data var.
+
+    Args:
+        dims: the dimensions associated with the data var
+        src: the source xarray dataset
+
+    Returns:
+        chunksizes as a list or None if dims are not 3D or 4D
+    """
+    chunksizes = None
+    if len(dims) == 4:
+        chunksizes = (
+            min(10000, len(src[dims[0]])),
+            min(MAX_HEIGHTS_PER_CHUNK, len(src[dims[1]])),
+            1,
+            1,
+        )
+    elif len(dims) == 3:
+        chunksizes = (len(src[dims[0]]), 1, 1)
+
+    return chunksizes
+
+
+def quantize(ds: xr.Dataset, decimals: Dict[str, int]) -> xr.Dataset:
+    """
+    ds with the float variables in decimals rounded to their number of decimals.
+    Rounding is done in float64 and cast back, so float32 values are the float32
+    values closest to the rounded numbers.
+    """
+    rounded = {}
+    for var, var_decimals in decimals.items():
+        values = ds[var].values
+        if var in ds.data_vars and np.issubdtype(values.dtype, np.floating):
+            rounded[var] = ds[var].copy(
+                data=np.round(values.astype(np.float64), var_decimals).astype(
+                    values.dtype
+                )
+            )
+    return ds.assign(rounded)
+
+
+@dataclass
+class LayoutBenchmark:
+    name: str
+    layout: OutputLayout
+    write_seconds: float
+    file_bytes: int
+    # Seconds to read the whole time series at the first height and grid point of
+    # every variable from the written file
+    point_read_seconds: float
+
+
+def benchmark_layouts(
+    ds: xr.Dataset,
+    layouts: Dict[str, OutputLayout],
+    decimals: Optional[Dict[str, int]] = None,
+    directory: Optional[str] = None,
+) -> List[LayoutBenchmark]:
+    """
+    Write ds with each of layouts to a temporary file in directory and measure
+    the write, the file size and the point time series read. decimals are the
+    decimals per variable for layouts that quantize.
+    """
+    results = []
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        for name, layout in layouts.items():
+            path = os.path.join(tmp, f"{name}.nc")
+            start = time.perf_counter()
+            write_netcdf(ds, path, layout, decimals)
+            write_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with xr.open_dataset(path, engine="h5netcdf") as written:
+                for var in written.data_vars:
+                    point = {dim: 0 for dim in written[var].dims if dim != "Time"}
+                    written[var].isel(point).load()
+            point_read_seconds = time.perf_counter() - start
+
+            results.append(
+                LayoutBenchmark(
+                    name,
+                    layout,
+                    write_seconds,
+                    os.path.getsize(path),
+                    point_read_seconds,
+                )
+            )
+    return results
+
+
+def format_benchmark(results: List[LayoutBenchmark]) -> str:
+    lines = [f"{'layout':<24}{'write s':>10}{'size MB':>10}{'point read s':>14}"]
+    for result in results:
+        lines.append(
+            f"{result.name:<24}{result.write_seconds:>10.3f}"
+            f"{result.file_bytes / 2**20:>10.2f}{result.point_read_seconds:>14.3f}"
+        )
+    return "\n".join(lines)
+
+
+def write_netcdf(
+    ds: xr.Dataset,
+    nc_filename: str,
+    layout: OutputLayout = DEFAULT_LAYOUT,
+    decimals: Optional[Dict[str, int]] = None,
+) -> None:
+    """Write ds to nc_filename with layout, see OutputLayout"""
+    if layout.quantize:
+        ds = quantize(ds, decimals or {})
+    ds.to_netcdf(
+        nc_filename,
+        encoding=layout.encoding(ds),
+        unlimited_dims="Time",
+        engine="h5netcdf",
+    )
@@ -1,13 +1,18 @@
 import re
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union, overload
 
 import numpy as np
 import pandas as pd
+from pandas.io.parsers import TextFileReader
 
 from ..schemas import dim_constants
+from ..validate_ascii.ascii_reader import AsciiFile
 from .utils import get_config_for_key, translate_key
 
 MISSING_HEIGHT = -99999
+TIME_COLUMNS = ["yy", "mm", "dd", "hh", "min"]
+# Values of the data block taken as missing, parsed to NaN
+MISSING_VALUES = ["-999", "-999.99", "NaN"]
 
 
 def parse_location_text(line_content: str) -> Tuple[float, float]:
@@ -31,37 +36,64 @@ def parse_location_text(line_content: str) -> Tuple[float, float]:
     return (float(match[0]) * is_north, float(match[1]) * is_east)
 
 
-def data_frame_parser(header_line: str, data_lines: List[List[str]]) -> pd.DataFrame:
-    """Parses the header line and the data_lines into a pandas df
+@overload
+def data_frame_parser(
+    header_line: str, ascii_file: AsciiFile, chunksize: None = None
+) -> pd.DataFrame: ...
+
+
+@overload
+def data_frame_parser(
+    header_line: str, ascii_file: AsciiFile, chunksize: int
+) -> TextFileReader: ...
+
+
+def data_frame_parser(
+    header_line: str, ascii_file: AsciiFile, chunksize: Optional[int] = None
+) -> Union[pd.DataFrame, TextFileReader]:
+    """Parses the header line and the data block of the file into a pandas df
 
     Args:
         header_line: the raw header line to be parsed into column headers
-        data_lines: a list of string lists containing the values on each row
+        ascii_file: the file with the data block, see validate_ascii.ascii_reader
+        chunksize: read the data block in dfs of chunksize rows, see
+        AsciiFile.read_data
 
     Returns:
-        pandas df with headers given by header line and data given by data_lines
+        pandas df with headers given by header line and data from the data block,
+        time columns as int, other columns as float32 with missing values as NaN
     """
-    header_names = header_line.replace("%", "").replace("\t\n", "").split()
-    df = pd.DataFrame(
-        data=data_lines,
-        columns=header_names,  # type: ignore
+    header_names = get_header_names(header_line)
+    dtypes = {
+        name: int if name.lower() in TIME_COLUMNS else np.float32
+        for name in header_names
+    }
+    return ascii_file.read_data(
+        chunksize, names=header_names, dtype=dtypes, na_values=MISSING_VALUES
     )
 
-    df = df.dropna(how="all")
-    df = df.replace("-999", np.nan)
-    df = df.replace("-999.99", np.nan)
-    df = df.replace("NaN", np.nan)
-    for col in df:
-        if str(col).lower() not in ["yy", "mm", "dd", "hh", "min"]:
-            df[col] = df[col].astype(np.float32)
-    df["YY"] = df["YY"].astype(int)
-    df["MM"] = df["MM"].astype(int)
-    df["DD"] = df["DD"].astype(int)
-    df["HH"] = df["HH"].astype(int)
-    if "Min" in df:
-        df["Min"] = df["Min"].astype(int)
-
-    return df
+
+def typed_data_frame(header_line: str, data: pd.DataFrame) -> pd.DataFrame:
+    """
+    The df of data_frame_parser from the data block as read by
+    AsciiFile.read_data() without options, e.g. for validation, so the file is
+    not parsed again. Columns of data after the header names are left out.
+    """
+    missing = [float(value) for value in MISSING_VALUES]
+    columns = {}
+    for name, (_, column) in zip(get_header_names(header_line), data.items()):
+        if name.lower() in TIME_COLUMNS:
+            columns[name] = column.to_numpy(dtype=int)
+            continue
+        # Columns with a value like "NaN" are read as text
+        values = column.to_numpy(dtype=np.float64)
+        columns[name] = values.astype(np.float32)
+        columns[name][np.isin(values, missing)] = np.nan
+    return pd.DataFrame(columns, index=data.index)
+
+
+def get_header_names(header_line: str) -> List[str]:
+    return header_line.replace("%", "").replace("\t\n", "").split()
 
 
 def parse_parameter_meta(
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ...schemas import ParameterConfig, ParameterConfigs
+from ...validate_netcdf import config_cache
+from .. import df_to_nc, utils
+from ..df_to_nc import ascii_to_nc_files, df_to_ds, parse_file, split_periods
+from ..utils import generate_time_filename, get_time_coordinate
+
+EXAMPLE = "examples/example_ascii_measurement.dat"
+
+
+def _config(key: str, with_height: bool = True) -> ParameterConfig:
+    dims = []
+    if with_height:
+        dims = ["Time", f"height_{key}", "south_north", "west_east"]
+    return ParameterConfig.model_construct(
+        key=key,
+        units="m/s",
+        CF_standard_name=key,
+        long_name=key,
+        short_name=key,
+        dims=dims,
+        parameter_category="Atmosphere",
+    )
+
+
+@pytest.fixture(name="configs", autouse=True)
+def fixture_configs(monkeypatch):
+    configs = [_config(key) for key in ("WD", "WS", "WG")]
+    configs += [_config("LAT_T", False), _config("LON_T", False)]
+    monkeypatch.setattr(
+        config_cache,
+        "load_parameter_configs",
+        lambda: ParameterConfigs.model_construct(configs=configs),
+    )
+    utils.get_config_for_key.cache_clear()
+    yield
+    utils.get_config_for_key.cache_clear()
+
+
+def test_time_coordinate_from_date_columns():
+    df = pd.DataFrame(
+        {
+            "YY": [2021, 2024],
+            "MM": [5, 2],
+            "DD": [1, 29],
+            "HH": [0, 23],
+            "Min": [10, 59],
+        }
+    )
+
+    time = get_time_coordinate(df)
+
+    expected = pd.to_datetime(["2021-05-01 00:10", "2024-02-29 23:59"])
+    assert time.tolist() == expected.tolist()
+    with pytest.raises(ValueError, match=r"Rows \[1\]"):
+        get_time_coordinate(df.assign(MM=[5, 4], DD=[1, 31]))
+
+
+def test_variables_share_coordinates_and_are_sorted_by_height():
+    df, parameter_meta = parse_file(EXAMPLE)
+    assert parameter_meta["WS"]["key_columns"] == ["WS400", "WS3.7"]
+
+    ds = df_to_ds(df, parameter_meta)
+
+    assert ds["height_WS"].values.tolist() == [3.7, 400]
+    assert np.array_equal(
+        ds["WS"].values[:, :, 0, 0],
+        df[["WS3.7", "WS400"]].to_numpy(),
+        equal_nan=True,
+    )
+    assert ds["WS"].dtype == np.float32
+    assert len(ds["Time"]) == len(df.index)
+
+
+def test_rows_are_split_by_month_across_chunks():
+    df = pd.DataFrame({"YY": [2020, 2020, 2020, 2021, 2021], "MM": [11, 12, 12, 1, 1]})
+    chunks = [df.iloc[:2], df.iloc[2:4], df.iloc[4:]]
+
+    periods = list(split_periods(chunks, "month"))
+
+    assert [period.index.tolist() for period in periods] == [[0], [1, 2], [3, 4]]
+    with pytest.raises(ValueError, match="chronological"):
+        list(split_periods([df.iloc[[0, 3, 1]]], "year"))
+
+
+def test_split_files_are_named_by_their_time_axis(monkeypatch, tmp_path):
+    time = np.array(["2021-05-01T00:00", "2021-05-31T23:50"], dtype="M8[us]")
+    assert generate_time_filename("name", time) == "name_20210501_20210531_T2.nc"
+
+    source_file = tmp_path / "station.dat"
+    source_file.write_bytes(open(EXAMPLE, "rb").read())
+    written = {}
+
+    def store_netcdf(_, ds, nc_filename, layout):
+        written[nc_filename] = ds
+        return nc_filename
+
+    monkeypatch.setattr(df_to_nc, "store_netcdf", store_netcdf)
+
+    nc_filenames = ascii_to_nc_files(str(source_file), "year", chunk_rows=5)
+
+    expected = tmp_path / "station" / "station_20210501_20210501_T16.nc"
+    assert nc_filenames == [str(expected)]
+    ds = written[nc_filenames[0]]
+    assert ds.attrs["source_file"] == str(source_file)
+    assert ds["WS"].shape == (16, 2, 1, 1)
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from ..output_layout import (
+    DEFAULT_LAYOUT,
+    OutputLayout,
+    benchmark_layouts,
+    quantize,
+    write_netcdf,
+)
+
+
+@pytest.fixture(name="ds")
+def fixture_ds() -> xr.Dataset:
+    time = np.arange("2021-01-01", "2021-01-08", dtype="M8[h]").astype("M8[us]")
+    values = np.linspace(0, 10, len(time) * 3, dtype=np.float32)
+    return xr.Dataset(
+        {
+            "WS": (
+                ("Time", "height_WS", "south_north", "west_east"),
+                values.reshape(len(time), 3, 1, 1),
+            ),
+            "Hs": (
+                ("Time", "south_north", "west_east"),
+                values[: len(time), None, None],
+            ),
+        },
+        coords={"Time": time, "height_WS": [10.0, 50.0, 100.0]},
+    )
+
+
+def test_default_layout_keeps_the_fixed_chunks(ds):
+    encoding = DEFAULT_LAYOUT.encoding(ds)
+
+    assert encoding["Time"]["dtype"] == "float64"
+    assert encoding["WS"] == {
+        "zlib": True,
+        "chunksizes": (168, 3, 1, 1),
+        "complevel": 4,
+    }
+    assert encoding["Hs"]["chunksizes"] == (168, 1, 1)
+
+
+def test_chunks_are_sized_by_bytes(ds):
+    layout = OutputLayout(chunk_bytes=240, complevel=0, shuffle=True)
+
+    encoding = layout.encoding(ds)
+
+    # 240 bytes of float32 are 20 timestamps of 3 heights or 60 timestamps
+    assert encoding["WS"] == {
+        "zlib": False,
+        "chunksizes": (20, 3, 1, 1),
+        "shuffle": True,
+    }
+    assert encoding["Hs"]["chunksizes"] == (60, 1, 1)
+    with pytest.raises(ValueError):
+        OutputLayout(time_dtype="float32")
+
+
+def test_values_are_quantized_to_decimals_and_written(ds, tmp_path):
+    quantized = quantize(ds, {"WS": 1, "Hs": 0})
+
+    assert np.array_equal(quantized["WS"].values, np.round(ds["WS"].values, 1))
+    assert quantized["Hs"].dtype == np.float32
+
+    path = str(tmp_path / "quantized.nc")
+    layout = OutputLayout(quantize=True, time_dtype="int64")
+    write_netcdf(ds, path, layout, {"Hs": 0})
+    with xr.open_dataset(path, engine="h5netcdf", decode_times=False) as written:
+        assert written["Time"].dtype == np.int64
+        assert np.array_equal(written["Hs"].values, np.round(ds["Hs"].values))
+        assert np.array_equal(written["WS"].values, ds["WS"].values)
+
+
+def test_benchmark_reports_each_layout(ds, tmp_path):
+    layouts = {"default": DEFAULT_LAYOUT, "uncompressed": OutputLayout(complevel=0)}
+
+    results = benchmark_layouts(ds, layouts, directory=str(tmp_path))
+
+    assert [result.name for result in results] == ["default", "uncompressed"]
+    assert all(result.file_bytes > 0 for result in results)
+    assert list(tmp_path.iterdir()) == []
@@ -1,40 +1,20 @@
-import json
 from functools import lru_cache
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Dict, List, Optional, Union
 
 import numpy as np
+import numpy.typing as npt
 import pandas as pd
-import requests
 import xarray as xr
-from pydantic import TypeAdapter
 
-from ..schemas import ParameterConfig, ParameterConfigs
-
-DEFAULT_URL_TO_PARAMETERS: str = "https://atmos.app.radix.equinor.com/config/parameters"
-
-
-def get_chunksizes(dims: Tuple[str], src: xr.Dataset) -> Union[tuple[int, ...], None]:
-    """Returns chunksizes for 3D or 4D data var.
-
-    Args:
-        dims: the dimensions associated with the data var
-        src: the source xarray dataset
-
-    Returns:
-        chunksizes as a list or None if dims are not 3D or 4D
-    """
-    chunksizes = None
-    if len(dims) == 4:
-        chunksizes = (
-            min(10000, len(src[dims[0]])),
-            min(10, len(src[dims[1]])),
-            1,
-            1,
-        )
-    elif len(dims) == 3:
-        chunksizes = (len(src[dims[0]]), 1, 1)
-
-    return chunksizes
+from ..schemas import ParameterConfig
+from ..validate_ascii.date_helper import DateHelper
+from ..validate_netcdf import config_cache
+from .output_layout import (  # noqa: F401, get_chunksizes was defined here
+    DEFAULT_LAYOUT,
+    OutputLayout,
+    get_chunksizes,
+    write_netcdf,
+)
 
 
 def translate_key(key: str) -> str:
@@ -69,42 +49,31 @@ def get_config_for_key(key: str) -> ParameterConfig:
     return next(cfg for cfg in configured_parameters if cfg.key == key)
 
 
-@lru_cache()
 def load_parameter_config_from_endpoint() -> List[ParameterConfig]:
-    response = requests.get(DEFAULT_URL_TO_PARAMETERS, timeout=10)
-    adapter = TypeAdapter(List[ParameterConfig])
-    cfgs = ParameterConfigs(configs=adapter.validate_json(json.dumps(response.json())))
-    return cfgs.configs
-
-
-def get_encoding(src_filename: str) -> str:
-    if src_filename.endswith(".dat"):
-        return "ascii"
-    if src_filename.endswith(".txt"):
-        return "ISO-8859-1"
-    return "UTF-8"
-
-
-def store_netcdf(source_file: str, ds: xr.Dataset) -> str:
-    nc_filename = generate_nc_filename(source_file)
-    ds.to_netcdf(
-        nc_filename,
-        encoding={
-            "Time": {
-                "dtype": "float64",
-                "units": "microseconds since 1900-01-01 00:00:00",
-            },
-            **{
-                var: {"zlib": True, "chunksizes": get_chunksizes(ds[var].dims, ds)}  # type: ignore
-                for var in ds.data_vars
-            },
-        },
-        unlimited_dims="Time",
-        engine="h5netcdf",
-    )
+    return config_cache.load_parameter_configs().configs
+
+
+def store_netcdf(
+    source_file: str,
+    ds: xr.Dataset,
+    nc_filename: Optional[str] = None,
+    layout: OutputLayout = DEFAULT_LAYOUT,
+) -> str:
+    """Write ds to nc_filename, by default named after source_file"""
+    nc_filename = nc_filename or generate_nc_filename(source_file)
+    decimals = get_significant_decimals(ds) if layout.quantize else None
+    write_netcdf(ds, nc_filename, layout, decimals)
     return nc_filename
 
 
+def get_significant_decimals(ds: xr.Dataset) -> Dict[str, int]:
+    """Configured number of significant decimals per data var of ds"""
+    return {
+        str(var): get_config_for_key(str(var)).number_of_significant_decimals
+        for var in ds.data_vars
+    }
+
+
 def generate_nc_filename(source_file: str) -> str:
     nc_filename = source_file.removesuffix(".dat")
     nc_filename = nc_filename.removesuffix(".txt")
@@ -115,14 +84,29 @@ def generate_nc_filename(source_file: str) -> str:
     return f"{nc_filename}.nc"
 
 
-def assign_datetime(df: pd.DataFrame) -> pd.DataFrame:
-    column_map = {"YY": "year", "MM": "month", "DD": "day", "HH": "h"}
-    columns = ["YY", "MM", "DD", "HH"]
-    if "Min" in df:
-        columns.append("Min")
-        column_map["Min"] = "m"
-    df["datetime"] = pd.to_datetime(df[columns].rename(columns=column_map))  # type: ignore
-    return df
+def generate_time_filename(name: str, time: npt.NDArray[np.datetime64]) -> str:
+    """
+    File name following the naming convention of multi-file datasets,
+    <name>_<start_date>_<end_date>_T<time_length>.nc with dates as YYYYMMDD
+    """
+    start, end = (
+        np.datetime_as_string(date, unit="D").replace("-", "")
+        for date in (time[0], time[-1])
+    )
+    return f"{name}_{start}_{end}_T{len(time)}.nc"
+
+
+def get_time_coordinate(df: pd.DataFrame) -> npt.NDArray[np.datetime64]:
+    """
+    The dates of the YY, MM, DD, HH (and Min) columns of df. Raises ValueError
+    if a row is not a valid date.
+    """
+    is_minute_based = "Min" in df
+    periods, invalid = DateHelper().get_periods(df, is_minute_based)
+    if len(invalid) > 0:
+        raise ValueError(f"Rows {invalid.tolist()} do not contain valid dates")
+    unit = "m" if is_minute_based else "h"
+    return (DateHelper.base_date + periods.astype(f"m8[{unit}]")).astype("M8[us]")
 
 
 def get_attrs_for_key(key: str, instruments: str) -> Dict[str, Any]:
@@ -0,0 +1,205 @@
+"""
+Ingestion of a measurement ASCII file in one pass: validate-ascii, convert-ascii
+and validate-netcdf of the converted dataset.
+
+The file is parsed once. The ASCII validation runs on the parsed data block,
+the dataset is built from the same data block, and the NetCDF validation runs
+on the dataset in memory, with the files it is to be written to. The files are
+written only if both validations pass.
+"""
+
+import contextvars
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import pandas as pd
+import xarray as xr
+
+from ..convert_ascii.df_to_nc import ascii_file_to_ds, split_periods
+from ..convert_ascii.main import SPLIT, get_layout, get_split
+from ..convert_ascii.output_layout import DEFAULT_LAYOUT, OutputLayout
+from ..convert_ascii.utils import (
+    generate_nc_filename,
+    generate_time_filename,
+    store_netcdf,
+)
+from ..validate_ascii.ascii_reader import read_ascii
+from ..validate_ascii.file_validator import validate_file
+from ..validate_netcdf import validation_settings
+from ..validate_netcdf.main import pretty_print_result, validate_dataset
+
+DOCSTRING = f"""
+Usage: python -m atmos_validation ingest-ascii [SRC_FILENAME] [OPTIONS]
+
+Validate a .dat, .txt or .LIS file, convert it to Atmos compliant NetCDF and
+validate the NetCDF dataset before it is written. The file is parsed once and the
+NetCDF files are only written if both validations pass.
+
+Args:
+    SRC_FILENAME \t \t The source file in .dat, .txt or .LIS format to ingest
+
+Options:
+    {SPLIT} year|month \t Write a file per year or month, as convert-ascii {SPLIT}
+
+    The layout options of convert-ascii and the options of validate-netcdf apply.
+"""
+
+
+@dataclass
+class IngestResult:
+    # Messages of the validation of the ASCII file
+    ascii_messages: List[str] = field(default_factory=list)
+    # Findings of the validation of the NetCDF dataset
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    # Paths of the written NetCDF files
+    outputs: List[str] = field(default_factory=list)
+
+    def is_error(self) -> bool:
+        return bool(self.ascii_messages or self.errors)
+
+
+def main():
+    try:
+        src_filename = sys.argv[2]
+        split = get_split(sys.argv[3:])
+        layout = get_layout(sys.argv[3:])
+    except (IndexError, ValueError):
+        print(DOCSTRING)
+        sys.exit(2)
+
+    result = ingest(src_filename, split, layout, additional_args=sys.argv[3:])
+    if result.ascii_messages:
+        pretty_print_result(
+            result.ascii_messages,
+            description=f"Found {len(result.ascii_messages)} errors in the ASCII file. These must be fixed:",
+        )
+    if result.errors:
+        pretty_print_result(
+            result.errors,
+            description=f"Found {len(result.errors)} errors in the NetCDF dataset. These must be fixed:",
+        )
+    if result.warnings:
+        pretty_print_result(
+            result.warnings,
+            description=f"Found {len(result.warnings)} warnings. These are FYI and can be ignored:",
+        )
+    for output in result.outputs:
+        print(f"Wrote {output}")
+    if result.is_error():
+        sys.exit(1)
+
+
+def ingest(
+    src_filename: str,
+    split: Optional[str] = None,
+    layout: OutputLayout = DEFAULT_LAYOUT,
+    additional_args: Optional[List[str]] = None,
+) -> IngestResult:
+    """
+    Validate src_filename, convert it and validate the converted dataset, and
+    write it if both validations pass.
+
+    Args:
+        src_filename: the ASCII file
+        split: "year" or "month" to write a file per year or month, see
+        convert_ascii.df_to_nc.ascii_to_nc_files
+        layout: layout of the written files, see OutputLayout
+        additional_args: CLI style options of validate-netcdf, e.g. --offline
+
+    Returns:
+        IngestResult with the findings of both validations and the written files
+    """
+    # The settings of additional_args apply to this ingestion only
+    return contextvars.copy_context().run(
+        _ingest, src_filename, split, layout, additional_args
+    )
+
+
+def _ingest(
+    src_filename: str,
+    split: Optional[str],
+    layout: OutputLayout,
+    additional_args: Optional[List[str]],
+) -> IngestResult:
+    validation_settings.apply_settings(additional_args or [])
+    try:
+        ascii_file = read_ascii(src_filename)
+        data = ascii_file.read_data()
+    except Exception:
+        return IngestResult(ascii_messages=["Could not read file"])
+    ascii_result = validate_file(ascii_file, data)
+    if ascii_result.is_error():
+        return IngestResult(ascii_messages=ascii_result.messages)
+
+    try:
+        ds = ascii_file_to_ds(ascii_file, data)
+        file_layout = get_file_layout(src_filename, ds, split)
+    except Exception as err:
+        return IngestResult(errors=[f"Could not convert the file: {err!r}"])
+
+    result = validate_dataset(
+        with_storage_chunks(ds, layout), file_layout, additional_args=additional_args
+    )
+    ingested = IngestResult(errors=result.errors, warnings=result.warnings)
+    if not ingested.is_error():
+        ingested.outputs = write_files(src_filename, ds, file_layout, layout)
+    return ingested
+
+
+def get_file_layout(
+    src_filename: str, ds: xr.Dataset, split: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    The files ds is written to, as the path of each file with the number of
+    timestamps it holds, named as by convert-ascii
+    """
+    nc_filename = generate_nc_filename(src_filename)
+    if not split:
+        return {nc_filename: ds.sizes["Time"]}
+    directory = nc_filename.removesuffix(".nc")
+    name = os.path.basename(directory)
+    dates = pd.DataFrame(
+        {"YY": ds["Time"].dt.year.values, "MM": ds["Time"].dt.month.values}
+    )
+    file_layout = {}
+    start = 0
+    for period in split_periods([dates], split):
+        time = ds["Time"].values[start : start + len(period.index)]
+        nc_filename = os.path.join(directory, generate_time_filename(name, time))
+        file_layout[nc_filename] = len(time)
+        start += len(time)
+    return file_layout
+
+
+def with_storage_chunks(ds: xr.Dataset, layout: OutputLayout) -> xr.Dataset:
+    """
+    A shallow copy of ds with the chunk shapes of layout in the encoding of its
+    variables, as when ds is read from a file written with layout. The sampled
+    checks of validate-netcdf plan their reads by the chunks of the file.
+    """
+    chunked = ds.copy()
+    for var, encoding in layout.encoding(ds).items():
+        if encoding.get("chunksizes") is not None:
+            chunked[var].encoding["chunksizes"] = encoding["chunksizes"]
+    return chunked
+
+
+def write_files(
+    src_filename: str,
+    ds: xr.Dataset,
+    file_layout: Dict[str, int],
+    layout: OutputLayout = DEFAULT_LAYOUT,
+) -> List[str]:
+    """Write ds to the files of file_layout, see get_file_layout"""
+    outputs = []
+    start = 0
+    for nc_filename, length in file_layout.items():
+        if os.path.dirname(nc_filename):
+            os.makedirs(os.path.dirname(nc_filename), exist_ok=True)
+        period = ds.isel(Time=slice(start, start + length))
+        outputs.append(store_netcdf(src_filename, period, nc_filename, layout))
+        start += length
+    return outputs
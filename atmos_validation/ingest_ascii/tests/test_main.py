@@ -0,0 +1,107 @@
+import os
+import shutil
+from typing import List
+
+import pytest
+
+from ...convert_ascii import utils
+from ...convert_ascii.df_to_nc import ascii_to_ds
+from ...schemas import ParameterConfig
+from ...validate_ascii.file_validator import validate as validate_ascii
+from ...validate_netcdf import validation_settings
+from ...validate_netcdf.tests.test_sig_digs import test_config
+from ...validate_netcdf.validators.dims.spatial_validators import REQUIREDS_MAP
+from ..main import get_file_layout, ingest
+
+EXAMPLE = "examples/example_ascii_measurement.dat"
+ARGS = [validation_settings.RANDOM_SEED, "1"]
+
+
+def parameter_configs(allowed_instruments: List[str]) -> List[ParameterConfig]:
+    """The configs of the parameters and coordinates of the example file"""
+    configs = [
+        test_config.model_copy(
+            update={
+                "key": key,
+                "units": units,
+                "max": 360,
+                "number_of_significant_decimals": 1,
+                "allowed_instruments": allowed_instruments,
+                "dims": ["Time", f"height_{key}", "south_north", "west_east"],
+            }
+        )
+        for key, units in (("WS", "m/s"), ("WD", "degrees"), ("WG", "m/s"))
+    ]
+    for key, coord in (("LAT_T", "LAT"), ("LON_T", "LON")):
+        attrs = REQUIREDS_MAP[coord]
+        configs.append(
+            test_config.model_copy(
+                update={
+                    "key": key,
+                    "short_name": attrs["short_name"],
+                    "long_name": attrs["long_name"],
+                    "CF_standard_name": attrs["CF_standard_name"],
+                    "units": attrs["units"],
+                    "dims": [],
+                }
+            )
+        )
+    return configs
+
+
+@pytest.fixture(name="source")
+def fixture_source(pin_configs, tmp_path):
+    """The example file with the configs it is valid for"""
+    pin_configs(parameter_configs(["SONIC ANEMOMETER", "PROPELLER ANEMOMETER"]))
+    shutil.copy(EXAMPLE, tmp_path / "example.dat")
+    return str(tmp_path / "example.dat")
+
+
+@pytest.fixture(name="written")
+def fixture_written(monkeypatch):
+    """The datasets ingest writes, by file name"""
+    written = {}
+
+    def write_netcdf(ds, nc_filename, layout, decimals):
+        written[nc_filename] = ds
+
+    monkeypatch.setattr(utils, "write_netcdf", write_netcdf)
+    return written
+
+
+def test_valid_file_is_written_as_converted(source, written):
+    result = ingest(source, additional_args=ARGS + [validation_settings.SKIP_WARNINGS])
+
+    assert not result.is_error()
+    assert not validation_settings.should_skip_warnings()
+    assert result.outputs == [source.replace(".dat", ".nc")]
+    assert written[result.outputs[0]].identical(ascii_to_ds(source))
+
+
+def test_file_is_not_written_if_a_validation_fails(source, written, pin_configs):
+    lines = open(source, encoding="utf-8").readlines()
+    invalid = source.replace(".dat", "_invalid.dat")
+    with open(invalid, "w", encoding="utf-8") as file:
+        file.write("".join(lines[:-1] + ["2021 x\n"]))
+
+    ascii_result = ingest(invalid, additional_args=ARGS)
+    pin_configs(parameter_configs(allowed_instruments=[]))
+    netcdf_result = ingest(source, additional_args=ARGS)
+
+    assert ascii_result.ascii_messages == validate_ascii(invalid).messages
+    assert ascii_result.ascii_messages and not ascii_result.errors
+    assert any("wrong instrument_type" in error for error in netcdf_result.errors)
+    assert not ascii_result.outputs and not netcdf_result.outputs
+    assert not written
+
+
+def test_file_layout_of_split_is_named_as_convert_ascii(source):
+    ds = ascii_to_ds(source)
+
+    file_layout = get_file_layout(source, ds, split="month")
+
+    assert sum(file_layout.values()) == len(ds["Time"])
+    directory = source.removesuffix(".dat")
+    for nc_filename, length in file_layout.items():
+        assert os.path.dirname(nc_filename) == directory
+        assert nc_filename.endswith(f"_T{length}.nc")
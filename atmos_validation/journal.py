@@ -0,0 +1,101 @@
+"""
+Journal of a batch run, e.g. of validate-netcdf or validate-ascii with --batch.
+
+The result of every finished item (a dataset or a file) is appended to the
+journal as a JSON line, so an interrupted batch can be resumed without
+validating the finished items again. Each entry holds a fingerprint of the
+files of the item and of the validation options, and a journaled result is only
+reused while the fingerprint is unchanged.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from . import cli_options
+
+
+def read_entries(
+    journal_path: str, fingerprints: Optional[Dict[str, str]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Entries in the journal by path, the last one of a path if it is journaled
+    more than once. With fingerprints, entries recorded with another fingerprint
+    (see fingerprint) are left out.
+    """
+    entries: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(journal_path):
+        return entries
+    with open(journal_path, "r", encoding="utf-8") as journal:
+        for line in journal:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interruption
+            path = entry["path"]
+            if fingerprints is not None and (
+                entry.get("fingerprint") != fingerprints.get(path)
+            ):
+                continue
+            entries[path] = entry
+    return entries
+
+
+def append_entry(
+    journal_path: str,
+    path: str,
+    result: Dict[str, Any],
+    fingerprint: Optional[str] = None,
+) -> None:
+    entry = {
+        "path": path,
+        "fingerprint": fingerprint,
+        **result,
+        "finished_at": time.time(),
+    }
+    with open(journal_path, "a", encoding="utf-8") as journal:
+        journal.write(json.dumps(entry) + "\n")
+        journal.flush()
+        os.fsync(journal.fileno())
+
+
+def fingerprint(
+    files: Iterable[str], additional_args: List[str], **settings: Any
+) -> str:
+    """
+    Digest of the name, modification time and size of the files and of the
+    options they are validated with: additional_args, without the options of
+    the batch itself like the number of workers, and settings given outside of
+    them, e.g. as arguments of validate_many.
+    """
+    stats = []
+    for name in files:
+        try:
+            stat = os.stat(name)
+        except OSError:
+            continue  # validated, and reported, as a file that cannot be opened
+        stats.append((name, stat.st_mtime_ns, stat.st_size))
+    options = validation_options(additional_args)
+    content = json.dumps({"files": stats, "options": options, **settings})
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def validation_options(additional_args: List[str]) -> List[str]:
+    """additional_args without the batch options and their values"""
+    batch_options = (
+        cli_options.BATCH,
+        cli_options.WORKERS,
+        cli_options.JOURNAL,
+    )
+    options = []
+    skip_value = False
+    for arg in additional_args:
+        if skip_value:
+            skip_value = False
+        elif arg in batch_options:
+            skip_value = True
+        elif not arg.startswith(tuple(f"{option}=" for option in batch_options)):
+            options.append(arg)
+    return options
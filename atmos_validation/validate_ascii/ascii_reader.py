@@ -0,0 +1,125 @@
+"""
+Reading of the measurement ASCII files (.dat, .txt and .LIS), shared by
+validate-ascii and convert-ascii.
+
+A file has a header of lines starting with "%", followed by a data block of
+whitespace separated values. Only the header is read line by line, and decoded
+as UTF-8 or else ISO-8859-1. The data block is parsed by the pandas C parser from
+a memory map of the file, straight into typed columns, so the rows are never
+held as Python strings. The text of single rows, e.g. for messages about them,
+is read again on demand.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Union, overload
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextFileReader
+
+HEADER_PREFIX = "%"
+ENCODINGS = ("UTF-8", "ISO-8859-1")
+
+# Rows per chunk when reading the text of rows of the data block
+TOKEN_CHUNK_ROWS = 100_000
+
+
+@dataclass
+class AsciiFile:
+    path: str
+    encoding: str
+    header_lines: List[str]
+    # Number of lines in the file before the data block
+    header_size: int
+
+    @overload
+    def read_data(self, chunksize: None = None, **options: Any) -> pd.DataFrame: ...
+
+    @overload
+    def read_data(self, chunksize: int, **options: Any) -> TextFileReader: ...
+
+    def read_data(
+        self, chunksize: Optional[int] = None, **options: Any
+    ) -> Union[pd.DataFrame, TextFileReader]:
+        """
+        The data block as a DataFrame with a column per value of a row, or with
+        chunksize a reader of DataFrames of chunksize rows.
+        options are passed to pandas.read_csv, e.g. names, dtype or na_values.
+        Without them the columns are int64 or float64, or str if some value is
+        not a number; no value is taken as missing, and missing values at the
+        end of a row are "".
+        The number of columns is that of the first row of the data block, also
+        for chunks whose first row is shorter.
+        """
+        if chunksize is not None and "names" not in options:
+            options = {**options, "names": range(self.data_width())}
+        return pd.read_csv(
+            self.path, chunksize=chunksize, **{**self.csv_options(), **options}
+        )
+
+    def data_width(self) -> int:
+        """Number of values in the first row of the data block"""
+        return len(pd.read_csv(self.path, nrows=1, **self.csv_options()).columns)
+
+    def read_tokens(self, rows: Iterable[int]) -> Dict[int, List[str]]:
+        """The values of the given rows of the data block, as in the file"""
+        wanted = np.unique(np.fromiter(rows, dtype=np.int64))
+        tokens: Dict[int, List[str]] = {}
+        if len(wanted) == 0:
+            return tokens
+        start = 0
+        with self.read_data(TOKEN_CHUNK_ROWS, dtype=str) as chunks:
+            for chunk in chunks:
+                stop = start + len(chunk.index)
+                for row in wanted[(wanted >= start) & (wanted < stop)]:
+                    tokens[int(row)] = chunk.iloc[row - start].tolist()
+                if stop > wanted[-1]:
+                    break
+                start = stop
+        return tokens
+
+    def csv_options(self) -> Dict[str, Any]:
+        return {
+            "sep": r"\s+",
+            "header": None,
+            "index_col": False,
+            "skiprows": self.header_size,
+            "comment": HEADER_PREFIX,
+            "engine": "c",
+            "memory_map": True,
+            "encoding": self.encoding,
+            "encoding_errors": "replace",
+            "keep_default_na": False,
+        }
+
+
+def read_ascii(path: str) -> AsciiFile:
+    """
+    Read the header of the ASCII file at path; the data block is read with
+    AsciiFile.read_data. Raises ValueError if the file has no data rows.
+    """
+    raw_lines = []
+    header_size = 0
+    with open(path, "rb") as file:
+        for line in file:
+            if line.startswith(HEADER_PREFIX.encode()):
+                raw_lines.append(line)
+            elif line.strip():
+                break
+            header_size += 1
+        else:
+            raise ValueError(f"No data rows in {path}")
+
+    encoding = detect_encoding(b"".join(raw_lines))
+    header_lines = [line.decode(encoding).replace("\r\n", "\n") for line in raw_lines]
+    return AsciiFile(path, encoding, header_lines, header_size)
+
+
+def detect_encoding(header: bytes) -> str:
+    for encoding in ENCODINGS[:-1]:
+        try:
+            header.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return ENCODINGS[-1]
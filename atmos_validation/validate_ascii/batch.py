@@ -0,0 +1,158 @@
+"""
+Validation of many ASCII files in one run, e.g. a delivery of a contractor.
+
+The files are given as paths, directories (searched recursively for .dat, .txt
+and .LIS files) or glob patterns. They are validated in a pool of worker
+processes, which are handed the configs loaded once by the parent process, so
+a batch downloads and parses each config once. The result of every finished
+file can be appended to a journal (JSON lines), so an interrupted batch can be
+resumed without validating the finished files again. A journaled result is only
+reused while the file and the validation options are unchanged.
+"""
+
+import glob
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional
+
+from .. import journal
+from ..validate_netcdf import config_cache, validation_settings
+from ..validate_netcdf.validation_logger import log
+from .file_validator import validate
+from .validate_result import ValidateMeasurementResult, ValidateResult
+
+ASCII_EXTENSIONS = (".dat", ".txt", ".lis")
+
+
+def find_ascii_files(sources: Iterable[str]) -> List[str]:
+    """
+    Paths of the ASCII files given by sources: files, directories searched
+    recursively, or glob patterns. Sorted, each file once.
+    """
+    paths = set()
+    for source in sources:
+        if os.path.isdir(source):
+            for directory, _, files in os.walk(source):
+                paths.update(
+                    os.path.join(directory, name)
+                    for name in files
+                    if name.lower().endswith(ASCII_EXTENSIONS)
+                )
+        elif os.path.isfile(source):
+            paths.add(source)
+        else:
+            paths.update(
+                path
+                for path in glob.glob(source, recursive=True)
+                if os.path.isfile(path)
+            )
+    return sorted(paths)
+
+
+def validate_many(
+    sources: Iterable[str],
+    max_workers: Optional[int] = None,
+    journal_path: Optional[str] = None,
+    chunk_rows: Optional[int] = None,
+    additional_args: Optional[List[str]] = None,
+) -> Dict[str, ValidateMeasurementResult]:
+    """
+    Validate all ASCII files given by sources, see find_ascii_files.
+
+    Args:
+        sources: files, directories or glob patterns
+        max_workers: maximum number of files validated concurrently,
+        defaults to the number of CPUs
+        journal_path: file the result of each finished file is appended to.
+        Files in the journal are not validated again, unless the file or the
+        validation options changed since.
+        chunk_rows: validate the data rows of each file this many at a time
+        additional_args: CLI style options for loading the configs, e.g.
+        --offline or --config-cache-dir
+
+    Returns:
+        ValidateMeasurementResult per file path, in the order of the paths
+    """
+    args = additional_args or []
+    paths = find_ascii_files(sources)
+    fingerprints = {path: file_fingerprint(path, chunk_rows, args) for path in paths}
+    results = read_journal(journal_path, fingerprints) if journal_path else {}
+    todo = [path for path in paths if path not in results]
+    log.info(
+        "Validating %s files, %s already finished according to journal",
+        len(todo),
+        len(paths) - len(todo),
+    )
+
+    if todo:
+        validation_settings.apply_settings(args)
+        warm = config_cache.warm_up()
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=config_cache.pin_configs,
+            initargs=(warm,),
+        ) as pool:
+            futures: Dict[Future[ValidateMeasurementResult], str] = {
+                pool.submit(validate, path, chunk_rows): path for path in todo
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as err:
+                    # Not journaled, so the file is retried when resuming
+                    log.error("Validation of %s crashed: %r", path, err)
+                    result = ValidateMeasurementResult(
+                        ValidateResult.ERROR, [repr(err)]
+                    )
+                else:
+                    if journal_path:
+                        append_to_journal(
+                            journal_path, path, result, fingerprints[path]
+                        )
+                results[path] = result
+
+    return {path: results[path] for path in paths}
+
+
+def summarize(results: Dict[str, ValidateMeasurementResult]) -> Dict[str, int]:
+    """Number of files validated, without and with errors, and of messages"""
+    errors = sum(1 for result in results.values() if result.is_error())
+    return {
+        "files": len(results),
+        "ok": len(results) - errors,
+        "error": errors,
+        "messages": sum(len(result.messages) for result in results.values()),
+    }
+
+
+def read_journal(
+    journal_path: str, fingerprints: Optional[Dict[str, str]] = None
+) -> Dict[str, ValidateMeasurementResult]:
+    """
+    Results in the journal by file path. With fingerprints, results of a file
+    recorded with another fingerprint (see file_fingerprint) are left out.
+    """
+    return {
+        path: ValidateMeasurementResult.from_dict(entry)
+        for path, entry in journal.read_entries(journal_path, fingerprints).items()
+    }
+
+
+def append_to_journal(
+    journal_path: str,
+    path: str,
+    result: ValidateMeasurementResult,
+    fingerprint: Optional[str] = None,
+) -> None:
+    journal.append_entry(journal_path, path, result.as_dict(), fingerprint)
+
+
+def file_fingerprint(
+    path: str, chunk_rows: Optional[int], additional_args: List[str]
+) -> str:
+    """
+    Digest of the name, modification time and size of the file at path and of
+    the options it is validated with, see journal.fingerprint.
+    """
+    return journal.fingerprint([path], additional_args, chunk_rows=chunk_rows)
@@ -1,6 +1,8 @@
 import datetime
-from typing import Any
+from typing import Tuple
 
+import numpy as np
+import numpy.typing as npt
 import pandas as pd
 
 
@@ -9,30 +11,52 @@ class DateHelper:
     seconds_offset = int(
         (datetime.datetime(1970, 1, 1) - datetime.datetime(1900, 1, 1)).total_seconds()
     )
+    base_date = np.datetime64("1900-01-01T00:00", "m")
 
-    def get_hours(self, row: Any) -> int:
-        year = row["YY"]
-        month = row["MM"]
-        day = row["DD"]
-        hour = row["HH"]
-        base_date = pd.to_datetime("1900-01-01 00:00:00")
-
-        end = datetime.datetime(int(year), int(month), int(day), int(hour), 0)
-        diff = end - base_date
-        return int(diff.total_seconds() / 3600)
-
-    def get_minutes(self, row: Any) -> int:
-        year = row["YY"]
-        month = row["MM"]
-        day = row["DD"]
-        hour = row["HH"]
-        minutes = row["Min"]
-        base_date = pd.to_datetime("1900-01-01 00:00:00")
-
-        end = datetime.datetime(
-            int(year), int(month), int(day), int(hour), int(minutes)
+    # Accepted (lowest, highest) value of each part of a date, as in datetime
+    date_part_ranges = {
+        "YY": (1, 9999),
+        "MM": (1, 12),
+        "DD": (1, 31),
+        "HH": (0, 23),
+        "Min": (0, 59),
+    }
+
+    def get_periods(
+        self, df: pd.DataFrame, is_minute_based: bool
+    ) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.intp]]:
+        """
+        Hours, or minutes if is_minute_based, since 1900-01-01 of the dates in the
+        YY, MM, DD, HH (and Min) columns of df, and the positions of the rows that
+        are not valid dates. The period of an invalid row is 0.
+        """
+        columns = ["YY", "MM", "DD", "HH"] + (["Min"] if is_minute_based else [])
+        valid = np.ones(len(df.index), dtype=bool)
+        parts = {}
+        for column in columns:
+            values = np.asarray(
+                pd.to_numeric(df[column], errors="coerce"), dtype=np.float64
+            )
+            low, high = self.date_part_ranges[column]
+            valid &= (values >= low) & (values <= high) & (values == np.floor(values))
+            parts[column] = values
+
+        def part(column: str, default: int) -> npt.NDArray[np.int64]:
+            if column not in parts:
+                return np.full(len(valid), default, dtype=np.int64)
+            return np.where(valid, parts[column], default).astype(np.int64)
+
+        months = ((part("YY", 1970) - 1970) * 12 + part("MM", 1) - 1).astype("M8[M]")
+        days = months.astype("M8[D]") + (part("DD", 1) - 1)
+        # e.g. 31 April ends up in May
+        valid &= days.astype("M8[M]") == months
+        minutes = np.asarray(
+            days.astype("M8[m]") + part("HH", 0) * 60 + part("Min", 0),
+            dtype="datetime64[m]",
         )
-        diff = end - base_date
-        seconds = diff.total_seconds()
-        minutes = seconds / 60
-        return int(minutes)
+
+        periods = (minutes - self.base_date).astype(np.int64)
+        if not is_minute_based:
+            periods //= 60
+        periods[~valid] = 0
+        return periods, np.flatnonzero(~valid)
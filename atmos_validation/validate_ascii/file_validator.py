@@ -0,0 +1,99 @@
+"""
+Validation of a measurement ASCII file: its header, and its data rows against
+the parameter configs. Used by validate-ascii, its batch runs and ingest-ascii.
+"""
+
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from .ascii_reader import AsciiFile, read_ascii
+from .header_parser import HeaderMetaData, HeaderParser
+from .row_parser import RowParser
+from .utils import load_parameter_configs
+from .validate_result import ValidateMeasurementResult, ValidateResult
+
+
+def validate(
+    src_filename: str, chunk_rows: Optional[int] = None
+) -> ValidateMeasurementResult:
+    """
+    Validate the header and data rows of the ASCII file src_filename, see
+    RowParser for chunk_rows
+    """
+    try:
+        ascii_file = read_ascii(src_filename)
+    except Exception:
+        return ValidateMeasurementResult(ValidateResult.ERROR, ["Could not read file"])
+    return validate_file(ascii_file, chunk_rows=chunk_rows)
+
+
+def validate_file(
+    ascii_file: AsciiFile,
+    data: Optional[pd.DataFrame] = None,
+    chunk_rows: Optional[int] = None,
+) -> ValidateMeasurementResult:
+    """
+    Validate the header and data rows of ascii_file. data is the data block if
+    it is already read, as by AsciiFile.read_data(), so it is not read again;
+    see RowParser for how it is modified.
+    """
+    if len(ascii_file.header_lines) == 0:
+        return ValidateMeasurementResult(ValidateResult.ERROR, ["Could not read file"])
+
+    (messages, header_info) = get_header_meta_data(ascii_file.header_lines)
+    if messages:
+        return ValidateMeasurementResult(ValidateResult.ERROR, messages)
+
+    if not header_info:
+        return ValidateMeasurementResult(
+            ValidateResult.ERROR,
+            ["Unknown validation error, could not get header_info"],
+        )
+
+    messages = header_info.validate()
+    messages += validate_with_parameter_configs(header_info)
+    if messages:
+        return ValidateMeasurementResult(ValidateResult.ERROR, messages)
+
+    row_parser = RowParser(
+        header_info,
+        ascii_file,
+        load_parameter_configs(),
+        remove_duplicates=True,
+        chunk_rows=chunk_rows,
+        data=data,
+    )
+
+    messages += row_parser.validate()
+    status = ValidateResult.OK
+    if len(messages) > 0:
+        status = ValidateResult.ERROR
+    return ValidateMeasurementResult(status, messages)
+
+
+def get_header_meta_data(
+    header_lines: List[str],
+) -> Tuple[List[str], Optional[HeaderMetaData]]:
+    parser = HeaderParser(header_lines)
+    return parser.get_header_info()
+
+
+def validate_with_parameter_configs(header_info: HeaderMetaData) -> List[str]:
+    messages = []
+    configs = load_parameter_configs()
+    for system_parameter in header_info.parameters.filter_items(True):
+        key = system_parameter.base
+        unit = system_parameter.unit
+        cfg = next((cfg for cfg in configs if cfg.key == key), None)
+        if not cfg:
+            messages.append(f"Base Parameter {key} does not exist")
+            messages.append(
+                f"Unable to verify unit {unit} for {key}, no such base parameter exist"
+            )
+            continue
+        if not unit == cfg.units:
+            messages.append(
+                f"The unit {unit} is incorrect for base parameter {key}. The unit should be {cfg.units}"
+            )
+    return messages
@@ -1,112 +1,89 @@
+import itertools
+import json
 import sys
-from typing import List, Optional, Tuple
+from typing import List, Optional
 
-from .header_parser import HeaderMetaData, HeaderParser
-from .row_parser import RowParser
-from .utils import load_parameter_configs
-from .validate_result import ValidateMeasurementResult, ValidateResult
+from ..cli_options import BATCH, JOURNAL, WORKERS, parse_option_value, parse_workers
+from .batch import summarize, validate_many
+from .file_validator import validate
 
-DOCSTRING = """
-Usage: python -m atmos_toolkit validate-ascii [SRC_FILENAME]
+CHUNK_ROWS = "--chunk-rows"
+
+DOCSTRING = f"""
+Usage: python -m atmos_toolkit validate-ascii [SRC_FILENAME] [OPTIONS]
+       python -m atmos_toolkit validate-ascii {BATCH} SRC [SRC ...] [OPTIONS]
 
 Validate a standardized .dat, .txt or .LIS file
 
 Args:
     SRC_FILENAME \t \t The source file to validate
+    SRC \t \t \t Files, directories or glob patterns of files to validate. Directories
+    \t \t \t are searched recursively for .dat, .txt and .LIS files.
+
+Options:
+    {CHUNK_ROWS} N \t \t Validate the data rows N at a time, memory is bounded by N rows
+
+Batch options:
+    {WORKERS} N \t \t Number of files to validate in parallel (default number of CPUs)
+    {JOURNAL} FILE \t \t Journal of finished files. Files in the journal are skipped unless
+    \t \t \t they or the options changed, so an interrupted batch can be resumed by rerunning it.
+
+    A batch prints one JSON line per file with its status and messages, followed by a
+    JSON line with the summary of the batch.
 """
 
 
 def main():
+    if len(sys.argv) > 2 and sys.argv[2] == BATCH:
+        main_batch()
+        return
     try:
         src_filename = sys.argv[2]
-    except IndexError:
+        chunk_rows = get_chunk_rows(sys.argv[3:])
+    except (IndexError, ValueError):
         print(DOCSTRING)
-        sys.exit(1)
-
-    try:
-        try:
-            header_lines, data_rows = read_file_lines(src_filename, "UTF-8")
-        except Exception:
-            # if for some reason UTF-8 fails, try with ISO-8859-1 encoding
-            header_lines, data_rows = read_file_lines(src_filename, "ISO-8859-1")
-        if len(header_lines) == 0 or len(data_rows) == 0:
-            raise ValueError
-    except Exception:
-        print(ValidateMeasurementResult(ValidateResult.ERROR, ["Could not read file"]))
-        sys.exit(1)
+        sys.exit(2)
 
-    (messages, header_info) = get_header_meta_data(header_lines)
-    if messages:
-        print(ValidateMeasurementResult(ValidateResult.ERROR, messages))
+    result = validate(src_filename, chunk_rows)
+    print(result)
+    if result.is_error():
         sys.exit(1)
 
-    if not header_info:
-        print(
-            ValidateMeasurementResult(
-                ValidateResult.ERROR,
-                ["Unknown validation error, could not get header_info"],
-            )
-        )
-        sys.exit(1)
 
-    messages = header_info.validate()
-    messages += validate_with_parameter_configs(header_info)
-    if messages:
-        print(ValidateMeasurementResult(ValidateResult.ERROR, messages))
+def main_batch():
+    sources = list(
+        itertools.takewhile(lambda arg: not arg.startswith("--"), sys.argv[3:])
+    )
+    args = sys.argv[3 + len(sources) :]
+    try:
+        if not sources:
+            raise ValueError("No files to validate")
+        chunk_rows = get_chunk_rows(args)
+        workers = parse_workers(args)
+        journal = parse_option_value(args, JOURNAL)
+    except ValueError:
+        print(DOCSTRING)
+        sys.exit(2)
+
+    results = validate_many(
+        sources,
+        max_workers=workers,
+        journal_path=journal,
+        chunk_rows=chunk_rows,
+        additional_args=args,
+    )
+    for path, result in results.items():
+        print(json.dumps({"path": path, **result.as_dict()}))
+    summary = summarize(results)
+    print(json.dumps({"summary": summary}))
+    if summary["error"]:
         sys.exit(1)
 
-    row_parser = RowParser(
-        header_info,
-        data_rows,
-        load_parameter_configs(),
-        remove_duplicates=True,
-    )
 
-    messages += row_parser.validate()
-    status = ValidateResult.OK
-    if len(messages) > 0:
-        status = ValidateResult.ERROR
-    print(ValidateMeasurementResult(status, messages))
-
-
-def get_header_meta_data(
-    header_lines: List[str],
-) -> Tuple[List[str], Optional[HeaderMetaData]]:
-    parser = HeaderParser(header_lines)
-    return parser.get_header_info()
-
-
-def read_file_lines(src_filename: str, encoding: str) -> Tuple[List[str], List[str]]:
-    header_lines = []
-    data_rows = []
-    with open(src_filename, "r", encoding=encoding) as file:
-        chunk_size = 4096
-        line = file.readline(chunk_size)
-        while line:
-            if line.find("%") == 0:
-                header_lines.append(line)
-            else:
-                if len(line.strip()) > 0:
-                    data_rows.append(line.strip())
-            line = file.readline(chunk_size)
-    return header_lines, data_rows
-
-
-def validate_with_parameter_configs(header_info: HeaderMetaData) -> List[str]:
-    messages = []
-    configs = load_parameter_configs()
-    for system_parameter in header_info.parameters.filter_items(True):
-        key = system_parameter.base
-        unit = system_parameter.unit
-        cfg = next((cfg for cfg in configs if cfg.key == key), None)
-        if not cfg:
-            messages.append(f"Base Parameter {key} does not exist")
-            messages.append(
-                f"Unable to verify unit {unit} for {key}, no such base parameter exist"
-            )
-            continue
-        if not unit == cfg.units:
-            messages.append(
-                f"The unit {unit} is incorrect for base parameter {key}. The unit should be {cfg.units}"
-            )
-    return messages
+def get_chunk_rows(optional_args: List[str]) -> Optional[int]:
+    chunk_rows = parse_option_value(optional_args, CHUNK_ROWS)
+    if chunk_rows is None:
+        return None
+    if int(chunk_rows) < 1:
+        raise ValueError(f"{CHUNK_ROWS} must be at least 1")
+    return int(chunk_rows)
@@ -1,4 +1,7 @@
-from typing import List, TypedDict
+from typing import Any, NamedTuple, TypedDict
+
+import numpy as np
+import numpy.typing as npt
 
 
 class ResultFileHeader(TypedDict):
@@ -18,5 +21,15 @@ class ResultFileHeader(TypedDict):
 
 class ResultFile(TypedDict):
     header: ResultFileHeader
-    keys: List[int]
-    values: List[float]
+    # The periods of the values, columnar so a file can be saved with np.savez
+    keys: npt.NDArray[np.int64]
+    values: npt.NDArray[Any]
+
+
+class YearPartition(NamedTuple):
+    """The rows of one year of the data block, shared by all parameters"""
+
+    year: int
+    # Positions of the rows in the data block, without duplicates
+    rows: npt.NDArray[np.intp]
+    periods: npt.NDArray[np.int64]
@@ -1,31 +1,64 @@
-from typing import Any, List, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 import numpy as np
 import numpy.typing as npt
 import pandas as pd
-from pandas.core.groupby.generic import DataFrameGroupBy
 
 from ..schemas import ParameterConfig
+from .ascii_reader import AsciiFile
 from .date_helper import DateHelper
 from .header_metadata import HeaderMetaData
 from .header_parameter_info import HeaderParameterInfo
-from .result_file import ResultFile
+from .result_file import ResultFile, YearPartition
+
+# Accepted (lowest, highest) value of the time parameter columns
+TIME_PARAMETER_RANGES = {
+    "YY": (1900, 2100),
+    "MM": (1, 31),
+    "DD": (1, 31),
+    "HH": (0, 23),
+    "Min": (0, 59),
+}
+
+
+class CellFinding(NamedTuple):
+    """
+    A message about a cell, formatted only when the text of its row is read.
+    The template is formatted with args, and with the text of the cell as
+    {cell} and the values of the row as {row}.
+    """
+
+    row: int
+    col: int
+    template: str
+    args: Tuple[Any, ...] = ()
+
+    def format(self, cells: List[str]) -> str:
+        return self.template.format(*self.args, cell=cells[self.col], row=tuple(cells))
 
 
 class RowParser:
     def __init__(
         self,
         header_info: HeaderMetaData,
-        data_rows: List[str],
+        ascii_file: AsciiFile,
         base_param_info: List[ParameterConfig],
         remove_duplicates: bool = False,
+        chunk_rows: Optional[int] = None,
+        data: Optional[pd.DataFrame] = None,
     ):
         self.header_info = header_info
-        self.data_rows = data_rows
+        self.ascii_file = ascii_file
         self.remove_duplicates = remove_duplicates
         self.base_param_info = base_param_info
+        self.chunk_rows = chunk_rows
+        # The data block if it is already read, as by AsciiFile.read_data().
+        # Validation renames its columns and adds a period column.
+        self.data = data
 
     def validate(self) -> List[str]:
+        if self.chunk_rows:
+            return self.validate_in_chunks(self.chunk_rows)
         messages = []
         files_to_add = []
         header_date_values = self.header_info.parameters.filter_items(False)
@@ -33,68 +66,137 @@ class RowParser:
         columns, columns_date_values = self.get_columns(
             header_date_values, header_params
         )
-        df = self.get_dataframe(self.data_rows, columns)
+        try:
+            df = self.get_dataframe()
+        except (ValueError, pd.errors.ParserError) as e:
+            return [f"Could not parse the data rows: {e}"]
 
         messages = self.validate_columns(df, columns, messages)
-        messages = self.validate_rows(df, self.data_rows, messages)
+        messages = self.validate_rows(df, messages)
         messages = self.validate_duration_correlation(df, messages)
 
         if len(messages) > 0:
             return messages
 
         df.columns = columns
-        self.set_dataframe_indexes(df, columns, self.header_info.is_minute_based())
+        invalid_dates = self.set_dataframe_indexes(
+            df, columns, self.header_info.is_minute_based()
+        )
+        if invalid_dates:
+            messages.append(f"Rows {invalid_dates} do not contain valid dates")
+            return messages
+        partitions = self.partition_years(df, columns_date_values)
         for parameter in header_params:
             try:
                 files_to_add = self.create_rows(
-                    df, self.header_info, parameter, columns_date_values, files_to_add
+                    df, self.header_info, parameter, partitions, files_to_add
                 )
             except Exception as e:
                 print(e)
                 messages.append("Error in parsing rows for parameter " + parameter.key)
-        messages = self.validate_rows_to_save(
-            files_to_add, self.data_rows, header_params, messages
-        )
+        messages = self.validate_rows_to_save(partitions, len(df.index), messages)
 
         return messages
 
+    def validate_in_chunks(self, chunk_rows: int) -> List[str]:
+        """
+        The messages of validate, reading the data block chunk_rows rows at a
+        time. Between chunks only the first and last row, the findings so far and
+        the periods seen are kept, so memory is bounded by the chunk size.
+        """
+        messages: List[str] = []
+        columns, _ = self.get_columns(
+            self.header_info.parameters.filter_items(False),
+            self.header_info.parameters.filter_items(True),
+        )
+        findings: List[CellFinding] = []
+        invalid_dates: List[Any] = []
+        periods_seen = PeriodTracker()
+        row_count = 0
+        first_row: Optional[pd.DataFrame] = None
+        last_row: Optional[pd.DataFrame] = None
+        try:
+            with self.ascii_file.read_data(chunksize=chunk_rows) as chunks:
+                for df in chunks:
+                    if first_row is None:
+                        messages = self.validate_columns(df, columns, messages)
+                        first_row = df.iloc[:1]
+                    last_row = df.iloc[-1:]
+                    row_count += len(df.index)
+                    findings.extend(self.get_cell_findings(df))
+                    if messages or findings:
+                        # Dates and duplicates are only reported for valid rows
+                        continue
+                    df.columns = columns
+                    periods, invalid = DateHelper().get_periods(
+                        df, self.header_info.is_minute_based()
+                    )
+                    invalid_dates.extend(df.index[invalid].tolist())
+                    if self.remove_duplicates:
+                        periods_seen.add(periods)
+        except (ValueError, pd.errors.ParserError) as e:
+            return [f"Could not parse the data rows: {e}"]
+
+        messages.extend(self.format_findings(findings))
+        ends = [row for row in (first_row, last_row) if row is not None]
+        messages = self.validate_duration_correlation(
+            pd.concat(ends) if ends else pd.DataFrame(), messages
+        )
+        if len(messages) > 0:
+            return messages
+        if invalid_dates:
+            messages.append(f"Rows {invalid_dates} do not contain valid dates")
+            return messages
+        count = periods_seen.count if self.remove_duplicates else row_count
+        return self.validate_row_count(row_count, count, messages)
+
     # pylint: disable=too-many-arguments
     def create_rows(
         self,
         df: pd.DataFrame,
         header_info: HeaderMetaData,
         parameter: HeaderParameterInfo,
-        columns_date_values: List[str],
+        partitions: List[YearPartition],
         files_to_add: List[ResultFile],
     ) -> List[ResultFile]:
-        try:
-            columns_df = df[columns_date_values + ["period", parameter.key]]
-            group_columns_df = columns_df.groupby("YY")
-            keys = group_columns_df.groups.keys()
-            for year in keys:
-                periods, values = self.get_dataframe_values(
-                    str(year),
-                    parameter.key,
-                    group_columns_df,  # type: ignore
-                    columns_date_values,
-                )
-                files_to_add.append(
-                    self.create_file(
-                        header_info.position.get_latitude(),
-                        header_info.position.get_longitude(),
-                        parameter,
-                        periods,
-                        values,
-                        header_info.is_minute_based(),
-                        int(str(year)),
-                    )
+        column_values = df[parameter.key].to_numpy()
+        for partition in partitions:
+            files_to_add.append(
+                self.create_file(
+                    header_info.position.get_latitude(),
+                    header_info.position.get_longitude(),
+                    parameter,
+                    partition.periods,
+                    column_values[partition.rows],
+                    header_info.is_minute_based(),
+                    partition.year,
                 )
-
-        except Exception as e:
-            raise e
+            )
 
         return files_to_add
 
+    def partition_years(
+        self, df: pd.DataFrame, columns_date_values: List[str]
+    ) -> List[YearPartition]:
+        """
+        The rows of df by year, in the order of the file within a year, done
+        once for all parameters. Rows repeating the date of an earlier row are
+        left out if remove_duplicates.
+        """
+        rows = np.arange(len(df.index))
+        if self.remove_duplicates:
+            duplicated = df.duplicated(subset=columns_date_values, keep="first")
+            rows = rows[~duplicated.to_numpy()]
+        years = df["YY"].to_numpy()[rows]
+        order = np.argsort(years, kind="stable")
+        rows = rows[order]
+        unique_years, starts = np.unique(years[order], return_index=True)
+        periods = df["period"].to_numpy()
+        return [
+            YearPartition(int(year), year_rows, periods[year_rows])
+            for year, year_rows in zip(unique_years, np.split(rows, starts[1:]))
+        ]
+
     def validate_duration_correlation(
         self, df: pd.DataFrame, messages: List[str]
     ) -> List[str]:
@@ -134,147 +236,203 @@ class RowParser:
             )
         return messages
 
-    def validate_rows(
-        self, df: pd.DataFrame, data_rows: List[str], messages: List[str]
-    ) -> List[str]:
-        if len(data_rows) != len(df.index):
-            messages.append(
-                f"Number of data rows from source {len(data_rows)} "
-                f"doesn't match rows targeted to import {len(df.index)}"
+    def validate_rows(self, df: pd.DataFrame, messages: List[str]) -> List[str]:
+        messages.extend(self.format_findings(self.get_cell_findings(df)))
+        return messages
+
+    def get_cell_findings(self, df: pd.DataFrame) -> List[CellFinding]:
+        # The checks run column by column, the messages are reported row by row
+        configs: Dict[str, ParameterConfig] = {}
+        for cfg in self.base_param_info:
+            configs.setdefault(cfg.key, cfg)
+        labels = df.index
+        findings: List[CellFinding] = []
+        for col_nr in range(len(df.columns)):
+            findings.extend(
+                self.validate_column(df.iloc[:, col_nr], labels, col_nr, configs)
             )
-        for tup in df.itertuples():
-            row_index, row = tup[0], tup[1:]
-            for i, cell_content in enumerate(row):
-                try:
-                    item = self.header_info.parameters.get_item_for_col(i)
-                except IndexError:
-                    messages.append(
-                        f"Less columns than expected at valuerow {row_index}. Column nr {i} does not exist"
-                    )
-                    continue
-
-                if (
-                    cell_content == self.header_info.empty_value
-                    and not item.is_time_parameter
-                ):
-                    continue
-                if (
-                    cell_content == self.header_info.empty_value
-                    and item.is_time_parameter
-                ):
-                    messages.append(
-                        f"Empty value not allowed for time parameter columns row, col: {row_index, item.key}"
-                    )
-                    continue
-                try:
-                    float_content = float(cell_content)
-                except Exception:
-                    messages.append(
-                        f"The cell content {cell_content} in row, col {row_index},{item.key} "
-                        "is not interpretable as a number (float)"
-                    )
-                    continue
-                if item.is_time_parameter:
-                    messages.extend(
-                        self.verify_time_param(float_content, item.key, row, item.key)  # type: ignore
-                    )
-                    continue
-                cfg = next(cfg for cfg in self.base_param_info if cfg.key == item.base)
-                if cfg.max != "NA" and cfg.max < float_content:
-                    messages.append(
-                        f"The cell content {cell_content} in row, col {row_index},{item.key} is "
-                        f"over maximum range {cfg.max} configured by the base parameter {item.base}"
-                    )
-                if cfg.min != "NA" and float_content < cfg.min:
-                    messages.append(
-                        f"The cell content {cell_content} in row, col {row_index},{item.key} is "
-                        f"under minimum range {cfg.min} configured by the base parameter {item.base}"
-                    )
+        findings.sort(key=lambda finding: (finding.row, finding.col))
+        return findings
 
-        return messages
+    def format_findings(self, findings: List[CellFinding]) -> List[str]:
+        rows = self.ascii_file.read_tokens(finding.row for finding in findings)
+        return [finding.format(rows[finding.row]) for finding in findings]
 
-    def verify_time_param(
-        self, cell_content: float, time_param: str, row: Tuple[str], col: str
-    ) -> List[str]:
-        if time_param == "YY" and (cell_content < 1900 or cell_content > 2100):
-            return [
-                f"The value {cell_content} in row, col {row},{col} is out of range of accepted values"
-            ]
-        if time_param == "MM" and (cell_content < 1 or cell_content > 31):
-            return [
-                f"The value {cell_content} in row, col {row},{col} is out of range of accepted values"
-            ]
-        if time_param == "DD" and (cell_content < 1 or cell_content > 31):
-            return [
-                f"The value {cell_content} in row, col {row},{col} is out of range of accepted values"
-            ]
-        if time_param == "HH" and (cell_content < 0 or cell_content > 23):
-            return [
-                f"The value {cell_content} in row, col {row},{col} is out of range of accepted values"
-            ]
-        if time_param == "Min" and (cell_content < 0 or cell_content > 59):
+    def validate_column(
+        self,
+        column: pd.Series,
+        labels: pd.Index,
+        col_nr: int,
+        configs: Dict[str, ParameterConfig],
+    ) -> List[CellFinding]:
+        """
+        Findings of the offending cells of the column col_nr, by row label.
+        Row labels are the row numbers in the data block.
+        """
+        try:
+            item = self.header_info.parameters.get_item_for_col(col_nr)
+        except IndexError:
             return [
-                f"The value {cell_content} in row, col {row},{col} is out of range of accepted values"
+                CellFinding(
+                    label,
+                    col_nr,
+                    "Less columns than expected at valuerow {}. "
+                    "Column nr {} does not exist",
+                    (label, col_nr),
+                )
+                for label in labels
             ]
-        return []
+
+        findings: List[CellFinding] = []
+        empty, values, numeric = self.get_column_values(column)
+        if item.is_time_parameter:
+            findings.extend(
+                CellFinding(
+                    label,
+                    col_nr,
+                    "Empty value not allowed for time parameter columns row, col: {}",
+                    ((label, item.key),),
+                )
+                for label in labels[empty]
+            )
+        findings.extend(
+            CellFinding(
+                label,
+                col_nr,
+                "The cell content {cell} in row, col {},{} "
+                "is not interpretable as a number (float)",
+                (label, item.key),
+            )
+            for label in labels[~empty & ~numeric]
+        )
+
+        if item.is_time_parameter:
+            if item.key in TIME_PARAMETER_RANGES:
+                low, high = TIME_PARAMETER_RANGES[item.key]
+                out_of_range = numeric & ((values < low) | (values > high))
+                findings.extend(
+                    CellFinding(
+                        label,
+                        col_nr,
+                        "The value {} in row, col {row},{} "
+                        "is out of range of accepted values",
+                        (float(value), item.key),
+                    )
+                    for label, value in zip(labels[out_of_range], values[out_of_range])
+                )
+            return findings
+
+        if not numeric.any():
+            return findings
+        cfg = configs[item.base]
+        if cfg.max != "NA":
+            findings.extend(
+                CellFinding(
+                    label,
+                    col_nr,
+                    "The cell content {cell} in row, col {},{} is over maximum "
+                    "range {} configured by the base parameter {}",
+                    (label, item.key, cfg.max, item.base),
+                )
+                for label in labels[numeric & (values > cfg.max)]
+            )
+        if cfg.min != "NA":
+            findings.extend(
+                CellFinding(
+                    label,
+                    col_nr,
+                    "The cell content {cell} in row, col {},{} is under minimum "
+                    "range {} configured by the base parameter {}",
+                    (label, item.key, cfg.min, item.base),
+                )
+                for label in labels[numeric & (values < cfg.min)]
+            )
+        return findings
+
+    def get_column_values(
+        self, column: pd.Series
+    ) -> Tuple[npt.NDArray[np.bool_], npt.NDArray[np.float64], npt.NDArray[np.bool_]]:
+        """
+        Mask of the cells with the empty value, the values of the column as
+        floats and a mask of the cells that are numbers. Only columns with some
+        cell that is not a number are compared and converted as text.
+        """
+        if column.dtype.kind in "iuf":
+            values = column.to_numpy(dtype=np.float64)
+            try:
+                empty = values == float(self.header_info.empty_value)
+            except ValueError:
+                empty = np.zeros(len(values), dtype=bool)
+            return empty, values, ~empty
+        raw = column.astype(str).to_numpy(dtype=object)
+        empty = np.asarray(raw == self.header_info.empty_value, dtype=bool)
+        values, numeric = self.get_float_values(raw, ~empty)
+        return empty, values, numeric
+
+    @staticmethod
+    def get_float_values(
+        raw: npt.NDArray[np.object_], to_convert: npt.NDArray[np.bool_]
+    ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.bool_]]:
+        """
+        float() of the cells to convert, NaN elsewhere, and a mask of the cells
+        converted. Cells pandas can not parse as numbers, e.g. text or "nan",
+        are converted one by one, the rest in one go.
+        """
+        values = np.full(len(raw), np.nan)
+        numeric = to_convert.copy()
+        try:
+            values[numeric] = raw[numeric].astype(np.float64)
+            return values, numeric
+        except (TypeError, ValueError):
+            pass
+        parsed = pd.to_numeric(pd.Series(raw), errors="coerce")
+        by_cell = to_convert & np.isnan(np.asarray(parsed, dtype=np.float64))
+        try:
+            rest = to_convert & ~by_cell
+            values[rest] = raw[rest].astype(np.float64)
+        except (TypeError, ValueError):
+            by_cell = to_convert
+        for row in np.flatnonzero(by_cell):
+            try:
+                values[row] = float(raw[row])
+            except Exception:
+                numeric[row] = False
+        return values, numeric
 
     def validate_rows_to_save(
         self,
-        files_to_save: List[ResultFile],
-        data_rows: List[str],
-        header_params: List[HeaderParameterInfo],
+        partitions: List[YearPartition],
+        row_count: int,
         messages: List[str],
     ) -> List[str]:
-        count = self.number_of_keys_to_save(files_to_save, len(header_params))
-        if len(data_rows) != count:
+        count = sum(len(partition.rows) for partition in partitions)
+        return self.validate_row_count(row_count, count, messages)
+
+    def validate_row_count(
+        self, row_count: int, count: int, messages: List[str]
+    ) -> List[str]:
+        if row_count != count:
             messages.append(
-                f"Duplicates exists, number of rows from source {len(data_rows)} after removal {count}"
+                f"Duplicates exists, number of rows from source {row_count} after removal {count}"
             )
 
         return messages
 
-    def number_of_keys_to_save(
-        self, files_to_add: List[ResultFile], number_of_params: int
-    ) -> int:
-        items = (len(file["values"]) for file in files_to_add)  # type: ignore
-        count = 0
-        for item in items:
-            count = count + int(item)
-        return int(count / number_of_params)
-
-    def get_dataframe_values(
-        self,
-        year: str,
-        key: str,
-        group_columns_df: DataFrameGroupBy,  # type: ignore
-        columns_date_values: List[str],
-    ) -> Tuple[Any, Any]:
-        group_by_year = group_columns_df.get_group(year)
-        if self.remove_duplicates:
-            group_by_year = group_by_year.drop_duplicates(
-                subset=columns_date_values,
-                keep="first",  # type:ignore
-            )
-
-        periods = group_by_year["period"].values.tolist()  # type:ignore
-        values = group_by_year[key].values  # type:ignore
-        return periods, values
-
     def set_dataframe_indexes(
         self, df: pd.DataFrame, columns: List[str], is_minute_based: bool
-    ):
+    ) -> List[Any]:
+        """Set the period column of df, and return the rows without a valid date"""
         df.columns = columns
-        date_helper = DateHelper()
-        if is_minute_based:
-            df["period"] = df.apply(lambda row: date_helper.get_minutes(row), axis=1)  # type: ignore
-        else:
-            df["period"] = df.apply(lambda row: date_helper.get_hours(row), axis=1)  # type: ignore
+        periods, invalid = DateHelper().get_periods(df, is_minute_based)
+        df["period"] = periods
 
         df.set_index("period")
+        return df.index[invalid].tolist()
 
-    def get_dataframe(self, data_rows: List[str], columns: List[str]) -> pd.DataFrame:
-        df = pd.DataFrame(data=[row.split() for row in data_rows], columns=columns)  # type: ignore
-        return df
+    def get_dataframe(self) -> pd.DataFrame:
+        if self.data is not None:
+            return self.data
+        return self.ascii_file.read_data()
 
     def get_columns(
         self,
@@ -295,8 +453,8 @@ class RowParser:
         latitude: str,
         longitude: str,
         parameter: HeaderParameterInfo,
-        periods: List[int],
-        values: npt.NDArray[np.float32],
+        periods: npt.NDArray[np.int64],
+        values: npt.NDArray[Any],
         is_minute_based: bool,
         year: int,
     ) -> ResultFile:
@@ -320,8 +478,40 @@ class RowParser:
                 "time_to": time_to,
                 "year": year,
             },
-            "values": values.tolist(),
+            "values": values,
             "keys": periods,
         }
 
         return data
+
+
+class PeriodTracker:
+    """
+    Number of distinct periods added, counted in a bitmap over the range of the
+    periods, so memory is bounded by the time span rather than the row count
+    """
+
+    def __init__(self) -> None:
+        self.origin = 0
+        self.seen = np.zeros(0, dtype=bool)
+        self.count = 0
+
+    def add(self, periods: npt.NDArray[np.int64]) -> None:
+        if len(periods) == 0:
+            return
+        low, high = int(periods.min()), int(periods.max())
+        if len(self.seen) == 0:
+            self.origin = low
+        if low < self.origin:
+            self.seen = np.concatenate(
+                [np.zeros(self.origin - low, dtype=bool), self.seen]
+            )
+            self.origin = low
+        if high - self.origin >= len(self.seen):
+            size = max(high - self.origin + 1, 2 * len(self.seen))
+            self.seen = np.concatenate(
+                [self.seen, np.zeros(size - len(self.seen), dtype=bool)]
+            )
+        offsets = np.unique(periods - self.origin)
+        self.count += len(offsets) - int(np.count_nonzero(self.seen[offsets]))
+        self.seen[offsets] = True
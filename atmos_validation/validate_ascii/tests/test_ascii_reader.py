@@ -0,0 +1,25 @@
+from ..ascii_reader import read_ascii
+
+
+def test_header_and_data_block_are_separated(tmp_path):
+    path = tmp_path / "data.dat"
+    path.write_bytes(
+        "% Location: 60°N\n\n%YY\tWS\n2021\t1.5\n\n2022\tx\n".encode("latin-1")
+    )
+
+    ascii_file = read_ascii(str(path))
+    df = ascii_file.read_data()
+
+    assert ascii_file.encoding == "ISO-8859-1"
+    assert ascii_file.header_lines == ["% Location: 60°N\n", "%YY\tWS\n"]
+    assert df[0].tolist() == [2021, 2022]
+    assert df[1].tolist() == ["1.5", "x"]
+
+
+def test_tokens_are_read_for_requested_rows_only(tmp_path):
+    path = tmp_path / "data.dat"
+    path.write_text("% header\n" + "".join(f"{i} {i}.00\n" for i in range(10)))
+
+    tokens = read_ascii(str(path)).read_tokens([7, 2, 7])
+
+    assert tokens == {2: ["2", "2.00"], 7: ["7", "7.00"]}
@@ -0,0 +1,114 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from ... import cli_options
+from ...validate_netcdf.tests.test_sig_digs import test_config
+from ..batch import (
+    append_to_journal,
+    file_fingerprint,
+    find_ascii_files,
+    read_journal,
+    summarize,
+    validate_many,
+)
+from ..file_validator import validate
+from ..validate_result import ValidateMeasurementResult, ValidateResult
+
+EXAMPLE = "examples/example_ascii_measurement.dat"
+
+
+@pytest.fixture(name="delivery")
+def fixture_delivery(tmp_path):
+    """A valid and an invalid file, one nested, and a file that is not ASCII data"""
+    (tmp_path / "nested").mkdir()
+    shutil.copy(EXAMPLE, tmp_path / "a.dat")
+    lines = open(EXAMPLE, encoding="utf-8").readlines()
+    (tmp_path / "nested" / "b.LIS").write_text("".join(lines[:-1] + ["2021 x\n"]))
+    (tmp_path / "notes.md").write_text("not a measurement")
+    return [str(tmp_path / "a.dat"), str(tmp_path / "nested" / "b.LIS")]
+
+
+@pytest.fixture(name="pinned_configs")
+def fixture_pinned_configs(pin_configs):
+    pin_configs(
+        [
+            test_config.model_copy(
+                update={
+                    "key": key,
+                    "units": units,
+                    "max": 360,
+                    "dims": ["Time", f"height_{key}", "south_north", "west_east"],
+                }
+            )
+            for key, units in (("WS", "m/s"), ("WD", "degrees"), ("WG", "m/s"))
+        ]
+    )
+
+
+def test_files_are_found_in_directories_and_globs(tmp_path, delivery):
+    assert find_ascii_files([str(tmp_path)]) == delivery
+    assert find_ascii_files([str(tmp_path / "*.dat"), delivery[0]]) == delivery[:1]
+
+
+def test_batch_matches_single_validations(tmp_path, delivery, pinned_configs):
+    journal = str(tmp_path / "journal.jsonl")
+
+    results = validate_many([str(tmp_path)], max_workers=2, journal_path=journal)
+
+    assert list(results) == delivery
+    journaled = read_journal(journal)
+    for path in delivery:
+        expected = validate(path)
+        for result in (results[path], journaled[path]):
+            assert result.as_dict() == expected.as_dict()
+    assert not results[delivery[0]].is_error()
+    assert summarize(results) == {
+        "files": 2,
+        "ok": 1,
+        "error": 1,
+        "messages": len(results[delivery[1]].messages),
+    }
+
+
+def test_finished_files_in_journal_are_skipped(tmp_path, delivery):
+    journal = tmp_path / "journal.jsonl"
+    entries = [
+        {
+            "path": path,
+            "fingerprint": file_fingerprint(path, None, []),
+            "status": "Error",
+            "messages": [f"error in {path}"],
+        }
+        for path in delivery
+    ]
+    journal.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+
+    results = validate_many([str(tmp_path)], journal_path=str(journal))
+
+    assert [result.messages for result in results.values()] == [
+        entry["messages"] for entry in entries
+    ]
+
+
+def test_journaled_files_are_validated_again_if_changed(
+    tmp_path, delivery, pinned_configs
+):
+    journal = str(tmp_path / "journal.jsonl")
+    stale = ValidateMeasurementResult(ValidateResult.ERROR, ["stale"])
+    for path in delivery:
+        append_to_journal(journal, path, stale, file_fingerprint(path, None, []))
+    shutil.copy(delivery[1], delivery[0])
+    os.utime(delivery[0], ns=(0, 0))
+
+    rerun = validate_many([str(tmp_path)], journal_path=journal)
+    chunked = validate_many([str(tmp_path)], journal_path=journal, chunk_rows=100)
+
+    assert rerun[delivery[0]].as_dict() == validate(delivery[0]).as_dict()
+    assert rerun[delivery[1]].messages == ["stale"]
+    assert all(result.messages != ["stale"] for result in chunked.values())
+    assert file_fingerprint(delivery[1], None, []) == file_fingerprint(
+        delivery[1], None, [cli_options.JOURNAL, journal, cli_options.WORKERS, "2"]
+    )
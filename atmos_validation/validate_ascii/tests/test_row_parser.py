@@ -0,0 +1,162 @@
+from datetime import datetime
+from typing import List
+
+import numpy as np
+import pandas as pd
+from pytest import fixture
+
+from ...schemas import ParameterConfig
+from .. import header_parser
+from ..ascii_reader import AsciiFile, read_ascii
+from ..date_helper import DateHelper
+from ..file_validator import get_header_meta_data
+from ..header_metadata import HeaderMetaData
+from ..header_names import Headers
+from ..row_parser import PeriodTracker, RowParser
+
+EXAMPLE = "examples/example_ascii_measurement.dat"
+
+
+def _config(key: str, minimum: float, maximum: float) -> ParameterConfig:
+    return ParameterConfig.model_construct(key=key, min=minimum, max=maximum)
+
+
+CONFIGS = [_config("WD", 0, 360), _config("WS", 0, 80), _config("WG", 0, 90)]
+
+
+@fixture
+def header_info(monkeypatch) -> HeaderMetaData:
+    monkeypatch.setattr(
+        header_parser,
+        "get_all_accepted_metadata_values",
+        lambda: {
+            Headers.INSTRUMENTS: {"SONIC ANEMOMETER", "PROPELLER ANEMOMETER"},
+            Headers.INSTALLATION_TYPE: {"PLATFORM"},
+            Headers.DATA_USTABILITY_LEVEL: {"PROCESSED"},
+        },
+    )
+    _, info = get_header_meta_data(read_ascii(EXAMPLE).header_lines)
+    assert info is not None
+    return info
+
+
+def _validate_rows(header_info: HeaderMetaData, ascii_file: AsciiFile) -> List[str]:
+    parser = RowParser(header_info, ascii_file, CONFIGS)
+    return parser.validate_rows(parser.get_dataframe(), [])
+
+
+def _data_file(tmp_path, data_rows: List[str]) -> AsciiFile:
+    path = tmp_path / "data.dat"
+    path.write_text("% header\n" + "\n".join(data_rows) + "\n")
+    return read_ascii(str(path))
+
+
+def test_example_rows_are_valid(header_info):
+    assert _validate_rows(header_info, read_ascii(EXAMPLE)) == []
+
+
+def test_messages_are_listed_row_by_row(header_info, tmp_path):
+    data_rows = [
+        "2021 05 01 00 00 361.00 x 131.00 1.83 -999.99",
+        "2021 05 01 24 10 143.00 1.78 144.00 -1 4.10",
+        "-999.99 05 01 00 20 nan 2.12 152.00 2.02 3.21",
+    ]
+
+    assert _validate_rows(header_info, _data_file(tmp_path, data_rows)) == [
+        "The cell content 361.00 in row, col 0,WD400 is over maximum range 360 "
+        "configured by the base parameter WD",
+        "The cell content x in row, col 0,WS400 is not interpretable as a number (float)",
+        "The value 24.0 in row, col ('2021', '05', '01', '24', '10', '143.00', "
+        "'1.78', '144.00', '-1', '4.10'),HH is out of range of accepted values",
+        "The cell content -1 in row, col 1,WS3.7 is under minimum range 0 "
+        "configured by the base parameter WS",
+        "Empty value not allowed for time parameter columns row, col: (2, 'YY')",
+    ]
+
+
+def test_periods_and_invalid_dates_are_found_for_all_rows():
+    df = pd.DataFrame(
+        [
+            ["1900", "01", "01", "01", "30"],
+            ["2021", "04", "31", "00", "00"],
+            ["2020", "02", "29", "23", "59"],
+            ["2021", "13", "01", "00", "00"],
+        ],
+        columns=["YY", "MM", "DD", "HH", "Min"],
+    )
+
+    minutes, invalid = DateHelper().get_periods(df, is_minute_based=True)
+    hours, _ = DateHelper().get_periods(df, is_minute_based=False)
+
+    assert invalid.tolist() == [1, 3]
+    expected = datetime(2020, 2, 29, 23, 59) - datetime(1900, 1, 1)
+    assert minutes.tolist() == [90, 0, expected.total_seconds() // 60, 0]
+    assert hours.tolist() == [1, 0, expected.total_seconds() // 3600, 0]
+
+
+def test_chunked_validation_matches_whole_file(header_info, tmp_path):
+    data_rows = [
+        "2021 05 01 00 00 132.00 1.99 131.00 1.83 3.21",
+        "2021 05 01 00 10 143.00 1.78 144.00 1.45 4.10",
+        "2021 05 01 00 00 132.00 1.99 131.00 1.83 3.21",
+        "2021 05 01 00 20 151.00 2.12 152.00 2.02 3.21",
+    ]
+    ascii_file = _data_file(tmp_path, data_rows)
+
+    whole = RowParser(header_info, ascii_file, CONFIGS, remove_duplicates=True)
+    chunked = RowParser(
+        header_info, ascii_file, CONFIGS, remove_duplicates=True, chunk_rows=3
+    )
+
+    expected = ["Duplicates exists, number of rows from source 4 after removal 3"]
+    assert whole.validate() == expected
+    assert chunked.validate() == expected
+
+
+def test_chunk_starting_with_a_short_row_matches_whole_file(header_info, tmp_path):
+    data_rows = [
+        "2021 05 01 00 00 132.00 1.99 131.00 1.83 3.21",
+        "2021 05 01 00 10 143.00 1.78 144.00 1.45 4.10",
+        "2021 05 01 00 20 151.00 2.12 152.00",
+        "2021 05 01 00 30 151.00 2.12 152.00 2.02 3.21",
+    ]
+    ascii_file = _data_file(tmp_path, data_rows)
+
+    whole = RowParser(header_info, ascii_file, CONFIGS)
+    chunked = RowParser(header_info, ascii_file, CONFIGS, chunk_rows=2)
+
+    messages = whole.validate()
+    assert messages and not messages[0].startswith("Could not parse")
+    assert chunked.validate() == messages
+
+
+def test_periods_seen_are_counted_once():
+    tracker = PeriodTracker()
+    tracker.add(np.array([10, 11, 11]))
+    tracker.add(np.array([5, 11, 40]))
+
+    assert tracker.count == 4
+
+
+def test_rows_are_split_by_year_without_duplicates(header_info):
+    df = pd.DataFrame(
+        {
+            "YY": [2021, 2020, 2021, 2020, 2021],
+            "MM": [1, 12, 1, 12, 1],
+            "period": [5, 3, 6, 3, 5],
+            "WS": [1.0, 2.0, 3.0, 4.0, 5.0],
+        }
+    )
+    parser = RowParser(header_info, read_ascii(EXAMPLE), CONFIGS, True)
+
+    partitions = parser.partition_years(df, ["YY", "MM", "period"])
+    ws = header_info.parameters.filter_items(True)[1]
+    df = df.rename(columns={"WS": ws.key})
+    files = parser.create_rows(df, header_info, ws, partitions, [])
+
+    assert [partition.year for partition in partitions] == [2020, 2021]
+    assert [file["keys"].tolist() for file in files] == [[3], [5, 6]]
+    assert [file["values"].tolist() for file in files] == [[2.0], [1.0, 3.0]]
+    assert parser.validate_rows_to_save(partitions, 5, []) == [
+        "Duplicates exists, number of rows from source 5 after removal 3"
+    ]
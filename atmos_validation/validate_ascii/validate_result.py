@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List
+from typing import Any, Dict, List
 
 
 class ValidateResult(str, Enum):
@@ -17,3 +17,11 @@ class ValidateMeasurementResult:
 
     def is_error(self):
         return len(self.messages) > 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON serializable form of the result"""
+        return {"status": self.status.value, "messages": self.messages}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ValidateMeasurementResult":
+        return cls(ValidateResult(data["status"]), data["messages"])
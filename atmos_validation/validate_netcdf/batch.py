@@ -0,0 +1,140 @@
+"""
+Validation of many datasets in one run.
+
+Every directory below a root that contains NetCDF files is a dataset (see
+validate()). The datasets are validated in a pool of worker processes, which
+are handed the configs loaded once by the parent process. If a journal is
+given, the result of every finished dataset is appended to it (JSON lines), so
+an interrupted batch can be resumed without validating the finished datasets
+again. A journaled result is only reused while the files of the dataset and the
+validation options are unchanged.
+"""
+
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Union
+
+from .. import journal
+from . import config_cache, validation_settings
+from .main import load_paths, validate
+from .validation_logger import log
+from .validators.root_validator import ValidationResult
+
+
+def find_datasets(root: str) -> List[str]:
+    """Paths of all datasets below root: directories holding NetCDF files,
+    or root itself if it is a single file."""
+    if root.endswith(".nc"):
+        return [root]
+    datasets = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        if any(name.endswith(".nc") for name in files):
+            datasets.append(directory)
+    return sorted(datasets)
+
+
+def validate_many(
+    root_or_paths: Union[str, List[str]],
+    max_workers: Optional[int] = None,
+    journal_path: Optional[str] = None,
+    additional_args: Optional[List[str]] = None,
+) -> Dict[str, ValidationResult]:
+    """
+    Validate all datasets below a root directory, or a given list of datasets.
+
+    Args:
+        root_or_paths: root directory searched by find_datasets, or dataset paths
+        max_workers: maximum number of datasets validated concurrently,
+        defaults to the number of CPUs
+        journal_path: file the result of each finished dataset is appended to.
+        Datasets in the journal are not validated again, unless their files or
+        the validation options changed since.
+        additional_args: options passed on to validate() for every dataset
+
+    Returns:
+        ValidationResult per dataset path, in the order of the datasets
+    """
+    args = additional_args or []
+    paths = (
+        find_datasets(root_or_paths)
+        if isinstance(root_or_paths, str)
+        else list(root_or_paths)
+    )
+    fingerprints = {path: dataset_fingerprint(path, args) for path in paths}
+    results = read_journal(journal_path, fingerprints) if journal_path else {}
+    todo = [path for path in paths if path not in results]
+    log.info(
+        "Validating %s datasets, %s already finished according to journal",
+        len(todo),
+        len(paths) - len(todo),
+    )
+
+    if todo:
+        validation_settings.apply_settings(args)
+        warm = config_cache.warm_up()
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=config_cache.pin_configs,
+            initargs=(warm,),
+        ) as pool:
+            futures: Dict[Future[ValidationResult], str] = {
+                pool.submit(validate, path, None, args): path for path in todo
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as err:
+                    # Not journaled, so the dataset is retried when resuming
+                    log.error("Validation of %s crashed: %r", path, err)
+                    result = ValidationResult(errors=[repr(err)], warnings=[])
+                else:
+                    if journal_path:
+                        append_to_journal(
+                            journal_path, path, result, fingerprints[path]
+                        )
+                log.info("Finished validating %s", path)
+                results[path] = result
+
+    return {path: results[path] for path in paths}
+
+
+def read_journal(
+    journal_path: str, fingerprints: Optional[Dict[str, str]] = None
+) -> Dict[str, ValidationResult]:
+    """
+    Results in the journal by dataset path. With fingerprints, results of a
+    dataset recorded with another fingerprint (see dataset_fingerprint) are
+    left out.
+    """
+    return {
+        path: ValidationResult(warnings=entry["warnings"], errors=entry["errors"])
+        for path, entry in journal.read_entries(journal_path, fingerprints).items()
+    }
+
+
+def append_to_journal(
+    journal_path: str,
+    path: str,
+    result: ValidationResult,
+    fingerprint: Optional[str] = None,
+) -> None:
+    journal.append_entry(
+        journal_path,
+        path,
+        {"errors": result.errors, "warnings": result.warnings},
+        fingerprint,
+    )
+
+
+def dataset_fingerprint(path: str, additional_args: List[str]) -> str:
+    """
+    Digest of the name, modification time and size of the files of the dataset
+    at path and of the options it is validated with, see journal.fingerprint.
+    """
+    try:
+        files = load_paths(path)
+    except OSError:
+        files = []  # validated, and reported, as a dataset that cannot be opened
+    return journal.fingerprint(files, additional_args)
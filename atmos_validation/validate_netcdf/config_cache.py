@@ -0,0 +1,241 @@
+"""On-disk cache for the Atmos configuration endpoints.
+
+Each configuration is stored in the cache directory as the raw response body
+(<name>-<hash>.json, named after the last part of the URL and a digest of the
+full URL) next to a small metadata file (<name>-<hash>.meta.json) holding the
+ETag/Last-Modified validators and the time the copy was last confirmed fresh.
+Copies younger than the TTL are used without any network traffic, older copies
+are revalidated with a conditional request. In offline mode only cached copies
+are used, regardless of their age, so a copied cache directory doubles as a
+pinned configuration snapshot.
+
+Parsed configs are memoized per process on the digest of the raw content, so
+repeated validations in the same process skip the pydantic validation as well.
+Worker processes can be handed the configs of their parent (warm_up and
+pin_configs), so a pool of workers shares one download and one parse.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
+
+from pydantic import TypeAdapter
+
+from ..schemas import (
+    DataUsabilityLevel,
+    DataUsabilityLevels,
+    InstallationType,
+    InstallationTypes,
+    InstrumentType,
+    InstrumentTypes,
+    ParameterConfig,
+    ParameterConfigs,
+)
+from . import validation_settings
+from .utils import ConfigDownloadError, atomic_write, fetch_config
+from .validation_logger import log
+
+T = TypeVar("T")
+
+_parsed: Dict[Tuple[str, str], Any] = {}
+_parsed_lock = threading.Lock()
+_pinned: Dict[str, bytes] = {}
+
+WarmConfigs = Dict[str, Tuple[bytes, Any]]
+
+
+def load_parameter_configs() -> ParameterConfigs:
+    return load_config(validation_settings.URL_TO_PARAMETERS, _parse_parameter_configs)
+
+
+def load_installation_types() -> List[str]:
+    return load_config(validation_settings.URL_TO_INST_TYPES, _parse_installation_types)
+
+
+def load_data_usability_levels() -> List[str]:
+    return load_config(
+        validation_settings.URL_TO_DATA_USABILITY, _parse_data_usability_levels
+    )
+
+
+def load_instrument_types() -> List[str]:
+    return load_config(
+        validation_settings.URL_TO_INSTRUMENT_TYPES, _parse_instrument_types
+    )
+
+
+def warm_up() -> WarmConfigs:
+    """
+    Load all configs and return their content and parsed objects, ready to be
+    sent to worker processes. Configs that cannot be loaded are left out, the
+    workers then load (and report failures for) those themselves.
+    """
+    warm: WarmConfigs = {}
+    for url, parse in _all_configs():
+        try:
+            warm[url] = (get_config_bytes(url), load_config(url, parse))
+        except Exception as err:
+            log.warning("Could not load config %s: %r", url, err)
+    return warm
+
+
+def pin_configs(warm: WarmConfigs) -> None:
+    """Use the given configs for the rest of this process' lifetime."""
+    with _parsed_lock:
+        for url, (content, parsed) in warm.items():
+            _pinned[url] = content
+            _parsed[(url, hashlib.sha256(content).hexdigest())] = parsed
+
+
+def load_config(url: str, parse: Callable[[bytes], T]) -> T:
+    """Get the config at url through the cache and parse it, reusing an earlier
+    parse of identical content."""
+    content = get_config_bytes(url)
+    key = (url, hashlib.sha256(content).hexdigest())
+    with _parsed_lock:
+        if key in _parsed:
+            return _parsed[key]
+    parsed = parse(content)
+    with _parsed_lock:
+        _parsed[key] = parsed
+    return parsed
+
+
+def get_config_bytes(url: str) -> bytes:
+    """Raw config content, from the cache when fresh, otherwise downloaded."""
+    if url in _pinned:
+        return _pinned[url]
+    content_path, meta_path = _cache_paths(url)
+    content, meta = _read_cache(content_path, meta_path)
+
+    if validation_settings.is_offline():
+        if content is None:
+            raise ConfigDownloadError(
+                f"No cached copy of {url} in {validation_settings.get_config_cache_dir()}"
+                " and running in offline mode"
+            )
+        return content
+
+    if content is not None and _is_fresh(meta):
+        return content
+
+    headers = {}
+    if content is not None and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if content is not None and meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        log.debug("download config %s", url)
+        response = fetch_config(url, headers=headers or None)
+    except Exception as err:
+        if content is None:
+            raise
+        log.warning("Could not revalidate config %s, using cached copy: %r", url, err)
+        return content
+
+    if response.status_code == 304 and content is not None:
+        meta["fetched_at"] = time.time()
+        _write_cache(content_path, meta_path, None, meta)
+        return content
+
+    meta = {
+        "url": url,
+        "etag": response.etag,
+        "last_modified": response.last_modified,
+        "fetched_at": time.time(),
+    }
+    _write_cache(content_path, meta_path, response.content, meta)
+    return response.content
+
+
+def _all_configs() -> List[Tuple[str, Callable[[bytes], Any]]]:
+    return [
+        (validation_settings.URL_TO_PARAMETERS, _parse_parameter_configs),
+        (validation_settings.URL_TO_INST_TYPES, _parse_installation_types),
+        (validation_settings.URL_TO_DATA_USABILITY, _parse_data_usability_levels),
+        (validation_settings.URL_TO_INSTRUMENT_TYPES, _parse_instrument_types),
+    ]
+
+
+def _cache_paths(url: str) -> Tuple[str, str]:
+    """Paths of the cached copy of url, unique per URL"""
+    name = os.path.basename(urlparse(url).path.rstrip("/")) or "config"
+    name = "".join(char if char.isalnum() or char in "-_" else "_" for char in name)
+    name = f"{name}-{hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]}"
+    directory = validation_settings.get_config_cache_dir()
+    return (
+        os.path.join(directory, f"{name}.json"),
+        os.path.join(directory, f"{name}.meta.json"),
+    )
+
+
+def _read_cache(
+    content_path: str, meta_path: str
+) -> Tuple[Optional[bytes], Dict[str, Any]]:
+    try:
+        with open(content_path, "rb") as content_file:
+            content = content_file.read()
+    except OSError:
+        return None, {}
+    try:
+        with open(meta_path, "r", encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+    except (OSError, ValueError):
+        meta = {}  # a snapshot without metadata is treated as stale
+    return content, meta
+
+
+def _is_fresh(meta: Dict[str, Any]) -> bool:
+    fetched_at = meta.get("fetched_at")
+    if not isinstance(fetched_at, (int, float)):
+        return False
+    return time.time() - fetched_at < validation_settings.get_config_ttl()
+
+
+def _write_cache(
+    content_path: str,
+    meta_path: str,
+    content: Optional[bytes],
+    meta: Dict[str, Any],
+) -> None:
+    """Write atomically, so concurrent validations never read a partial file.
+    A cache that cannot be written is not an error, only a missed speed-up."""
+    try:
+        os.makedirs(os.path.dirname(content_path), exist_ok=True)
+        if content is not None:
+            atomic_write(content_path, content)
+        atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+    except OSError as err:
+        log.warning("Could not write config cache %s: %r", content_path, err)
+
+
+def _parse_parameter_configs(data: bytes) -> ParameterConfigs:
+    return ParameterConfigs(
+        configs=TypeAdapter(List[ParameterConfig]).validate_json(data)
+    )
+
+
+def _parse_installation_types(data: bytes) -> List[str]:
+    parsed = InstallationTypes(
+        configs=TypeAdapter(List[InstallationType]).validate_json(data)
+    ).configs
+    return [entry.installation_type for entry in parsed]
+
+
+def _parse_data_usability_levels(data: bytes) -> List[str]:
+    parsed = DataUsabilityLevels(
+        configs=TypeAdapter(List[DataUsabilityLevel]).validate_json(data)
+    ).configs
+    return [entry.level for entry in parsed]
+
+
+def _parse_instrument_types(data: bytes) -> List[str]:
+    parsed = InstrumentTypes(
+        configs=TypeAdapter(List[InstrumentType]).validate_json(data)
+    ).configs
+    return [entry.instrument_type for entry in parsed]
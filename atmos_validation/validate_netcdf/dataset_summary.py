@@ -0,0 +1,319 @@
+"""
+Incremental validation of dataset directories that grow by appending files.
+
+With --incremental, validation of a directory writes a summary next to the
+files (validation_settings.SUMMARY_FILE_NAME) holding per file a fingerprint
+(size, mtime and content hash), the Time extent and the static coordinate
+digests, and the results of each validation run with the files it covered.
+A later incremental run only validates the new and changed files, as one run,
+and checks the invariants between the files of that run and the other files
+against the summary: the time axis continues across the boundaries, static
+coordinates are identical and the naming conventions hold.
+
+The results of a run can only be replaced as a whole. When a changed or
+removed file was validated together with files that did not change, or the
+settings, parameter configs or library version changed, the whole dataset is
+validated again.
+
+A file whose mtime changed is compared on its content hash, so a file that was
+only touched is not validated again.
+"""
+
+import hashlib
+import json
+import os
+from importlib import metadata
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import config_cache, finding_sink, validation_settings
+from .file_manifest import FileManifest
+from .utils import (
+    Severity,
+    atomic_write,
+    convert_utc_timestamp_to_filename_format,
+    validation_node,
+)
+from .validation_logger import log
+from .validators.dims.time_validator import (
+    filename_convention_validator,
+    filename_includes_time_axis_validator,
+)
+from .validators.root_validator import ValidationResult
+
+SUMMARY_VERSION = 1
+HASH_BLOCK_SIZE = 1024 * 1024
+
+ValidateFiles = Callable[[List[str], List[FileManifest]], ValidationResult]
+Summary = Dict[str, Any]
+
+
+def validate_incremental(
+    directory: str, manifests: List[FileManifest], validate_files: ValidateFiles
+) -> ValidationResult:
+    """
+    Validate the files of a dataset directory that are not covered by its
+    summary, and update the summary.
+
+    Args:
+        directory: the dataset directory, where the summary is stored
+        manifests: manifests of all files in the directory
+        validate_files: validation of a set of files of the dataset
+
+    Returns:
+        ValidationResult of the whole dataset, combining the stored results of
+        unchanged files with the results of this run
+    """
+    summary_path = os.path.join(directory, validation_settings.SUMMARY_FILE_NAME)
+    signature = settings_signature()
+    by_name = {os.path.basename(manifest.path): manifest for manifest in manifests}
+
+    summary = read_summary(summary_path)
+    plan = None
+    if summary is None:
+        log.info("No dataset summary found in %s, validating all files", directory)
+    elif (
+        summary.get("version") != SUMMARY_VERSION
+        or summary.get("settings") != signature
+    ):
+        log.info("Settings or configs changed since last run, validating all files")
+    else:
+        plan = _plan_run(summary, by_name)
+
+    if summary is None or plan is None:
+        result = _isolated(
+            validate_files, [manifest.path for manifest in manifests], manifests
+        )
+        summary = {
+            "version": SUMMARY_VERSION,
+            "settings": signature,
+            "static_coordinates": (
+                manifests[0].static_coordinates if manifests else {}
+            ),
+            "files": {name: {} for name in by_name},
+            "runs": [_run_entry(sorted(by_name), result)],
+        }
+    else:
+        names, kept_runs = plan
+        if names:
+            log.info("Validating %s new or changed files: %s", len(names), names)
+            run_manifests = [by_name[name] for name in names]
+            result = _isolated(
+                validate_files,
+                [manifest.path for manifest in run_manifests],
+                run_manifests,
+            )
+            with finding_sink.collect(finding_sink.FindingSink()) as cross_file:
+                cross_file_validator(summary, by_name, kept_runs, names)
+            result.errors += cross_file.errors
+            result.warnings += cross_file.warnings
+            kept_runs.append(_run_entry(names, result))
+        else:
+            log.info("No new or changed files since last run")
+        summary["runs"] = kept_runs
+
+    summary["files"] = {
+        name: _file_entry(summary["files"].get(name, {}), manifest)
+        for name, manifest in sorted(by_name.items())
+    }
+    write_summary(summary_path, summary)
+    return _combined_result(summary["runs"])
+
+
+def settings_signature() -> str:
+    """Digest of everything besides the files that the results depend on"""
+    settings = [
+        validation_settings.should_check_min_max_full(),
+        validation_settings.should_skip_min_max_check(),
+        validation_settings.should_skip_warnings(),
+        validation_settings.get_sample_size(),
+        validation_settings.get_sig_dig_samples(),
+        validation_settings.get_sig_dig_tolerance(),
+        validation_settings.get_io_budget(),
+        validation_settings.get_time_budget(),
+        validation_settings.get_max_examples(),
+    ]
+    try:
+        version = metadata.version("atmos_validation")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    try:
+        configs = hashlib.sha256(
+            config_cache.get_config_bytes(validation_settings.URL_TO_PARAMETERS)
+        ).hexdigest()
+    except Exception as err:
+        log.warning("Could not load parameter configs for summary: %r", err)
+        configs = "unavailable"
+    content = json.dumps([settings, version, configs])
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def read_summary(summary_path: str) -> Optional[Summary]:
+    try:
+        with open(summary_path, "r", encoding="utf-8") as summary_file:
+            return json.load(summary_file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_summary(summary_path: str, summary: Summary) -> None:
+    try:
+        atomic_write(summary_path, json.dumps(summary, indent=1).encode("utf-8"))
+    except OSError as err:
+        log.warning("Could not write dataset summary %s: %r", summary_path, err)
+
+
+@validation_node(severity=Severity.ERROR)
+def cross_file_validator(
+    summary: Summary,
+    by_name: Dict[str, FileManifest],
+    kept_runs: List[Dict[str, Any]],
+    names: List[str],
+) -> List[str]:
+    """Invariants between the files validated in this run and the other files"""
+    run_manifests = [by_name[name] for name in names]
+    run_of = {name: i for i, run in enumerate(kept_runs) for name in run["files"]}
+    run_of.update({name: len(kept_runs) for name in names})
+    result = time_continuity_validator(by_name, run_of) + static_coordinates_validator(
+        summary["static_coordinates"], run_manifests
+    )
+    if len(run_manifests) == 1 and len(by_name) > 1:
+        # filename_validator only checks the naming of datasets with several files
+        result += filename_convention_validator(run_manifests)
+        result += filename_includes_time_axis_validator(run_manifests)
+    return result
+
+
+@validation_node(severity=Severity.ERROR)
+def time_continuity_validator(
+    by_name: Dict[str, FileManifest], run_of: Dict[str, int]
+) -> List[str]:
+    """Time axis must increase across the boundaries between files validated in
+    different runs, in the order of the file names"""
+    result = []
+    ordered = sorted(by_name)
+    for previous, current in zip(ordered[:-1], ordered[1:]):
+        if run_of[previous] == run_of[current]:
+            continue  # checked by the run that covered both files
+        end, start = by_name[previous].time_end, by_name[current].time_start
+        if end is not None and start is not None and start <= end:
+            result += [
+                f"Time axis of {current} does not continue after {previous}: it starts at "
+                f"{convert_utc_timestamp_to_filename_format(start)}, which is not after the "
+                f"last timestamp of {previous} at {convert_utc_timestamp_to_filename_format(end)}"
+            ]
+    return result
+
+
+@validation_node(severity=Severity.ERROR)
+def static_coordinates_validator(
+    reference: Dict[str, str], manifests: List[FileManifest]
+) -> List[str]:
+    """Static coordinates (LAT/LON/height) must be identical in all files"""
+    result = []
+    for manifest in manifests:
+        differing = sorted(
+            name
+            for name in set(reference) | set(manifest.static_coordinates)
+            if reference.get(name) != manifest.static_coordinates.get(name)
+        )
+        if differing:
+            result += [
+                f"Conflicting static coordinates {differing} in {manifest.path}. All files "
+                "in a dataset must share the same grid (LAT/LON/height)."
+            ]
+    return result
+
+
+def _plan_run(
+    summary: Summary, by_name: Dict[str, FileManifest]
+) -> Optional[Tuple[List[str], List[Dict[str, Any]]]]:
+    """Files to validate and the runs to keep, None if all files must be validated"""
+    files: Dict[str, Dict[str, Any]] = summary["files"]
+    removed = {name for name in files if name not in by_name}
+    changed = {
+        name
+        for name, manifest in by_name.items()
+        if name in files and not _is_unchanged(files[name], manifest.path)
+    }
+    new = {name for name in by_name if name not in files}
+
+    kept_runs = []
+    for run in summary["runs"]:
+        affected = set(run["files"]) & (removed | changed)
+        if not affected:
+            kept_runs.append(run)
+        elif set(run["files"]) - affected:
+            log.info(
+                "%s changed, but was validated together with other files, "
+                "validating all files",
+                sorted(affected),
+            )
+            return None
+    return sorted(new | changed), kept_runs
+
+
+def _is_unchanged(entry: Dict[str, Any], path: str) -> bool:
+    stat = os.stat(path)
+    if stat.st_size != entry.get("size"):
+        return False
+    if stat.st_mtime_ns == entry.get("mtime_ns"):
+        return True
+    # Touched, but maybe not modified
+    sha256 = _hash_file(path)
+    entry["sha256_current"] = sha256
+    return sha256 == entry.get("sha256")
+
+
+def _file_entry(previous: Dict[str, Any], manifest: FileManifest) -> Dict[str, Any]:
+    stat = os.stat(manifest.path)
+    unchanged = (
+        previous.get("size") == stat.st_size
+        and previous.get("mtime_ns") == stat.st_mtime_ns
+    )
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": (
+            previous.get("sha256")
+            if unchanged
+            else previous.get("sha256_current") or _hash_file(manifest.path)
+        ),
+        "time_start": manifest.time_start,
+        "time_end": manifest.time_end,
+        "time_length": manifest.time_length,
+        "static_coordinates": manifest.static_coordinates,
+    }
+
+
+def _isolated(
+    validate_files: ValidateFiles, paths: List[str], manifests: List[FileManifest]
+) -> ValidationResult:
+    """Validate files without streaming findings to the active sink, the
+    results are only reported once combined with the stored ones"""
+    with finding_sink.collect(finding_sink.FindingSink()):
+        return validate_files(paths, manifests)
+
+
+def _run_entry(names: List[str], result: ValidationResult) -> Dict[str, Any]:
+    return {
+        "files": names,
+        "errors": result.errors,
+        "warnings": result.warnings,
+    }
+
+
+def _combined_result(runs: List[Dict[str, Any]]) -> ValidationResult:
+    errors: List[str] = []
+    warnings: List[str] = []
+    for run in runs:
+        errors += run["errors"]
+        warnings += run["warnings"]
+    return ValidationResult(warnings=list(dict.fromkeys(warnings)), errors=errors)
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -21,14 +21,25 @@ def assert_no_external_references(paths: List[str]) -> None:
     external link or a virtual dataset. Only metadata is read, never data."""
     for path in paths:
         with h5py.File(path, "r") as file:
-            findings: List[str] = []
-            _scan_group(file, findings, set())
-            if findings:
-                raise ExternalReferenceError(
-                    f"Refusing to open {path}: it references storage outside the file "
-                    f"({'; '.join(findings)}). External storage, external links and "
-                    "virtual datasets are not permitted."
-                )
+            findings = find_external_references(file)
+        if findings:
+            raise external_reference_error(path, findings)
+
+
+def find_external_references(file: h5py.File) -> List[str]:
+    """Describe every external storage, external link and virtual dataset in an
+    open file. Only metadata is read, never data."""
+    findings: List[str] = []
+    _scan_group(file, findings, set())
+    return findings
+
+
+def external_reference_error(path: str, findings: List[str]) -> ExternalReferenceError:
+    return ExternalReferenceError(
+        f"Refusing to open {path}: it references storage outside the file "
+        f"({'; '.join(findings)}). External storage, external links and "
+        "virtual datasets are not permitted."
+    )
 
 
 def _scan_group(group: h5py.Group, findings: List[str], visited: Set[int]) -> None:
@@ -0,0 +1,151 @@
+"""
+Everything the file level validators need to know about a NetCDF file, read
+in a single open of the file.
+
+The external reference scan runs first, and nothing else is read from a file
+with external references, as reading Time could then dereference them.
+Manifests of several files are built in parallel worker processes, as h5py
+serializes all calls within a process.
+"""
+
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import h5py
+import numpy as np
+import xarray as xr
+
+from ..schemas import (
+    DIRECTION,
+    FREQUENCY,
+    HEIGHT_DIM_PREFIX,
+    SOUTH_NORTH,
+    TIME,
+    WEST_EAST,
+)
+from .external_reference_guard import (
+    external_reference_error,
+    find_external_references,
+)
+from .validation_logger import log
+
+STATIC_COORDINATES = ("LAT", "LON", SOUTH_NORTH, WEST_EAST, FREQUENCY, DIRECTION)
+# Units Time is required to be stored in, see time_units_validator
+TIME_UNITS = "microseconds since 1900-01-01"
+
+
+@dataclass(frozen=True)
+class FileManifest:
+    path: str
+    external_references: List[str] = field(default_factory=list)
+    time_length: Optional[int] = None
+    time_start: Optional[int] = None
+    time_end: Optional[int] = None
+    time_units: Any = None
+    static_coordinates: Dict[str, str] = field(default_factory=dict)
+
+    def require_time(self) -> int:
+        """Length of the time axis, raises if the file has no Time variable"""
+        if self.time_length is None:
+            raise KeyError(f"No {TIME} variable in file {self.path}")
+        return self.time_length
+
+
+def build_manifest(path: str) -> FileManifest:
+    with h5py.File(path, "r") as file:
+        findings = find_external_references(file)
+        if findings:
+            return FileManifest(path=path, external_references=findings)
+
+        static_coordinates = {
+            str(name): _hash_dataset(item)
+            for name, item in file.items()
+            if isinstance(item, h5py.Dataset) and _is_static_coordinate(str(name))
+        }
+        time = file.get(TIME)
+        if not isinstance(time, h5py.Dataset):
+            return FileManifest(path=path, static_coordinates=static_coordinates)
+
+        length = len(time)
+        return FileManifest(
+            path=path,
+            time_length=length,
+            time_start=int(time[0]) if length else None,
+            time_end=int(time[-1]) if length else None,
+            time_units=time.attrs.get("units"),
+            static_coordinates=static_coordinates,
+        )
+
+
+def build_manifests(paths: List[str], jobs: int = 1) -> List[FileManifest]:
+    """Manifests of all files, in the order of paths"""
+    if jobs > 1 and len(paths) > 1:
+        workers = min(jobs, len(paths))
+        log.info("building manifests of %s files using %s workers", len(paths), workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(build_manifest, paths))
+    log.info("building manifests of %s files", len(paths))
+    return [build_manifest(path) for path in paths]
+
+
+def proposed_manifests(
+    ds: xr.Dataset, file_layout: Dict[str, int]
+) -> List[FileManifest]:
+    """
+    Manifests of the files ds is to be written to, before it is written.
+
+    Args:
+        ds: dataset with a Time coordinate
+        file_layout: the path of each file, in order, with the number of
+        timestamps it holds. The files hold consecutive parts of Time.
+
+    The time of the files is taken in microseconds since 1900-01-01 and the time
+    units are those of the encoding of Time, as they are when written with the
+    required units. Static coordinates are not included.
+    """
+    time = ds[TIME].values
+    if sum(file_layout.values()) != len(time):
+        raise ValueError(
+            f"The file layout holds {sum(file_layout.values())} timestamps, "
+            f"the dataset {len(time)}"
+        )
+    if np.issubdtype(time.dtype, np.datetime64):
+        time = (time - np.datetime64("1900-01-01")) // np.timedelta64(1, "us")
+    units = ds[TIME].encoding.get("units", TIME_UNITS)
+
+    manifests = []
+    start = 0
+    for path, length in file_layout.items():
+        file_time = time[start : start + length]
+        manifests.append(
+            FileManifest(
+                path=path,
+                time_length=length,
+                time_start=int(file_time[0]) if length else None,
+                time_end=int(file_time[-1]) if length else None,
+                time_units=units,
+            )
+        )
+        start += length
+    return manifests
+
+
+def raise_for_external_references(manifests: List[FileManifest]) -> None:
+    """Raise ExternalReferenceError for the first file with external references"""
+    for manifest in manifests:
+        if manifest.external_references:
+            raise external_reference_error(manifest.path, manifest.external_references)
+
+
+def _is_static_coordinate(name: str) -> bool:
+    return name in STATIC_COORDINATES or name.startswith(HEIGHT_DIM_PREFIX)
+
+
+def _hash_dataset(dataset: h5py.Dataset) -> str:
+    """Digest of the values of a (small) coordinate variable"""
+    values = np.ascontiguousarray(dataset[()])
+    digest = hashlib.sha256(f"{values.dtype.str}{values.shape}".encode())
+    digest.update(values.tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,227 @@
+"""
+Collection of validation findings as they are produced.
+
+While a sink is active, every validation_node emits the findings of its own
+validator to the sink as Finding records and returns an empty list to its
+parent. This lets findings be streamed while the validation is running
+(iter_validate), and lets validation stop early: once a sink holds max_errors
+errors, or is cancelled, the remaining validation nodes are skipped. Without an
+active sink, validators return their findings as strings, as before.
+
+A sink counts every finding per rule, but keeps only the first max_examples
+findings of each validation node, so a validator firing per element does not
+grow the result without bound. The findings are rendered to the string format of
+validation_node when they are read.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from . import validation_settings
+
+
+class Severity(str, Enum):
+    ERROR = "ERROR"
+    WARNING = "WARNING"
+
+
+@dataclass(frozen=True)
+class Message:
+    """A message formatted with str.format only when it is rendered"""
+
+    template: str
+    args: Tuple[Any, ...] = ()
+
+    def __str__(self) -> str:
+        return self.template.format(*self.args)
+
+
+@dataclass(frozen=True)
+class Finding:
+    """
+    A finding of a validation node. path holds the local names of the nodes from
+    the root to the node producing it, e.g. ("variables", "variable:WS",
+    "var_height_depth"), and rule is the name of that node without postfix.
+    A finding with an empty path was produced outside the validation nodes and is
+    rendered as the message only.
+    """
+
+    path: Tuple[str, ...]
+    severity: Severity
+    rule: str
+    message: Union[str, Message]
+
+    def render(self) -> str:
+        """The finding as validation_node formats it, root:dims:<severity>:<message>"""
+        message = str(self.message)
+        if not self.path:
+            return message
+        prefix = "".join(f"{name}:" for name in self.path)
+        if any(token.value in message for token in Severity):
+            return prefix + message
+        return f"{prefix}{self.severity}:{message}"
+
+    @property
+    def is_warning(self) -> bool:
+        return self.severity is Severity.WARNING
+
+
+class FindingSink:
+    def __init__(
+        self,
+        max_errors: Optional[int] = None,
+        on_finding: Optional[Callable[[Finding], None]] = None,
+        parent: Optional["FindingSink"] = None,
+        max_examples: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            max_errors: number of errors after which remaining validators are skipped
+            on_finding: called with every finding that is kept, as it is emitted
+            parent: sink that all findings are forwarded to
+            max_examples: findings kept per validation node, the rest are only
+            counted. Defaults to --max-examples.
+        """
+        self.counts: Dict[str, int] = {}
+        self.error_count = 0
+        # whether validators were skipped because the sink was exhausted
+        self.stopped_early = False
+        self._kept: List[Finding] = []
+        self._per_node: Dict[Tuple[str, ...], int] = {}
+        self._omitted: Dict[Tuple[str, ...], Tuple[Finding, int]] = {}
+        self._seen_warnings: Set[Any] = set()
+        self._max_errors = max_errors
+        self._max_examples = (
+            validation_settings.get_max_examples()
+            if max_examples is None
+            else max_examples
+        )
+        self._on_finding = on_finding
+        self._parent = parent
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    def emit(self, finding: Finding) -> None:
+        with self._lock:
+            kept = self._add(finding)
+        if kept and self._on_finding is not None:
+            self._on_finding(finding)
+        if self._parent is not None:
+            self._parent.emit(finding)
+
+    def emit_message(self, message: str, severity: Severity = Severity.ERROR) -> None:
+        """Emit a finding produced outside the validation nodes"""
+        self.emit(Finding((), severity, "", message))
+
+    def _add(self, finding: Finding) -> bool:
+        if finding.is_warning:
+            key = _dedup_key(finding)
+            if key in self._seen_warnings:
+                return False
+            self._seen_warnings.add(key)
+        else:
+            self.error_count += 1
+        self.counts[finding.rule] = self.counts.get(finding.rule, 0) + 1
+
+        examples = self._per_node.get(finding.path, 0)
+        if not finding.path or examples < self._max_examples:
+            self._per_node[finding.path] = examples + 1
+            self._kept.append(finding)
+            return True
+        first, count = self._omitted.get(finding.path, (finding, 0))
+        self._omitted[finding.path] = (first, count + 1)
+        return False
+
+    @property
+    def errors(self) -> List[str]:
+        return self._render(Severity.ERROR)
+
+    @property
+    def warnings(self) -> List[str]:
+        return self._render(Severity.WARNING)
+
+    def omitted(self) -> List[Finding]:
+        """One finding per validation node that produced more than max_examples"""
+        with self._lock:
+            return [
+                Finding(
+                    first.path,
+                    first.severity,
+                    first.rule,
+                    Message(OMITTED_TEMPLATE, (count,)),
+                )
+                for first, count in self._omitted.values()
+            ]
+
+    def _render(self, severity: Severity) -> List[str]:
+        with self._lock:
+            findings = list(self._kept)
+        findings += self.omitted()
+        return [
+            finding.render() for finding in findings if finding.severity is severity
+        ]
+
+    def skip(self) -> None:
+        """Record that a validator was skipped because the sink is exhausted"""
+        self.stopped_early = True
+        if self._parent is not None:
+            self._parent.skip()
+
+    def cancel(self) -> None:
+        """Skip all validators that have not started yet"""
+        self._cancelled = True
+
+    @property
+    def exhausted(self) -> bool:
+        if self._cancelled:
+            return True
+        if self._parent is not None and self._parent.exhausted:
+            return True
+        return self._max_errors is not None and self.error_count >= self._max_errors
+
+
+OMITTED_TEMPLATE = "{} more findings of this validator were not listed"
+
+
+def _dedup_key(finding: Finding) -> Any:
+    key = (finding.path, finding.message)
+    try:
+        hash(key)
+    except TypeError:  # a Message with unhashable args
+        return finding.render()
+    return key
+
+
+_sink: ContextVar[Optional[FindingSink]] = ContextVar("finding_sink", default=None)
+_node_path: ContextVar[Tuple[str, ...]] = ContextVar("finding_node_path", default=())
+
+
+def get_sink() -> Optional[FindingSink]:
+    return _sink.get()
+
+
+@contextmanager
+def collect(sink: FindingSink) -> Iterator[FindingSink]:
+    """Emit the findings of all validation nodes run in the context to sink"""
+    sink_token = _sink.set(sink)
+    path_token = _node_path.set(())
+    try:
+        yield sink
+    finally:
+        _node_path.reset(path_token)
+        _sink.reset(sink_token)
+
+
+@contextmanager
+def inside_node(local_name: str) -> Iterator[Tuple[str, ...]]:
+    """Enter a validation node, yields the path from the root to the node"""
+    path = _node_path.get() + (local_name,)
+    token = _node_path.set(path)
+    try:
+        yield path
+    finally:
+        _node_path.reset(token)
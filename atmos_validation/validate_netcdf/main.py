@@ -8,28 +8,39 @@ should be compatible with xarray.open_mfdataset
 To use as library:
 from atmos_validation.main import validate.
 validate(path_to_dataset_directory) or validate(path_to_dataset_file)
+A dataset that is not written yet is validated with validate_dataset(ds).
 
 To use as CLI, see docstring.
 """
 
+import contextvars
 import logging
+import queue
 import sys
+import threading
 from pprint import pprint
-from typing import List, Optional
+from typing import Callable, Dict, Iterator, List, Optional
 
 import xarray as xr
 
-from . import validation_settings
-from .external_reference_guard import (
-    ExternalReferenceError,
-    assert_no_external_references,
+from .. import cli_options
+from . import finding_sink, profiling, validation_settings
+from .dataset_summary import validate_incremental
+from .external_reference_guard import ExternalReferenceError
+from .file_manifest import (
+    FileManifest,
+    build_manifests,
+    proposed_manifests,
+    raise_for_external_references,
 )
+from .finding_sink import Finding, Severity
 from .utils import get_file_paths_in_folder
 from .validation_logger import log
 from .validators.root_validator import ValidationResult, root_validator
 
 DOCSTRING = f"""
 Usage: python -m atmos_toolkit validate-dataset DIR_OR_FILE [OPTIONS]
+       python -m atmos_toolkit validate-dataset {cli_options.BATCH} ROOT [OPTIONS]
 
 Example: python -m atmos_toolkit validate-dataset my_dataset/ {validation_settings.RANDOM_SEED} 42
 
@@ -37,14 +48,35 @@ Run validation on a hindcast or measurement dataset (NetCDF standard format chec
 
 Args:
     DIR_OR_FILE \t \t The directory containing hindcast or the single .nc file to be validated
+    ROOT \t\t\t Validate every directory below ROOT that contains .nc files as a separate dataset
 
 Options:
-    --{validation_settings.CHECK_MIN_MAX_FULL} \t\t Verify min/max values for entire dataset. 
+    {validation_settings.CHECK_MIN_MAX_FULL} \t\t Verify min/max values for entire dataset in a single pass over all variables.
     \t\t\t\t\t Can be extremely slow for large datasets. Default behaviour is taking random samples.
-    --{validation_settings.SKIP_MIN_MAX_CHECK} \t Skip random sample check for min/max values.
-    --{validation_settings.SKIP_WARNINGS} \t\t\t Skip all checks that would only output a "WARNING".
-    --{validation_settings.RANDOM_SEED} <int> \t Fix the random seed so sampled checks are reproducible.
-    --{validation_settings.SAMPLE_SIZE} <int> \t Number of timestamps to sample per variable (default {validation_settings.DEFAULT_SAMPLE_SIZE}).
+    {validation_settings.SKIP_MIN_MAX_CHECK} \t Skip random sample check for min/max values.
+    {validation_settings.SKIP_WARNINGS} \t\t\t Skip all checks that would only output a "WARNING".
+    {validation_settings.RANDOM_SEED} <int> \t Fix the random seed so sampled checks are reproducible.
+    {validation_settings.SAMPLE_SIZE} <int> \t Number of timestamps to sample per variable (default {validation_settings.DEFAULT_SAMPLE_SIZE}).
+    {validation_settings.SIG_DIG_SAMPLES} <int> \t Number of sampled values to check for significant decimals (default {validation_settings.DEFAULT_SIG_DIG_SAMPLES}).
+    {validation_settings.SIG_DIG_TOLERANCE} <float> \t Fraction of those values that may have too few decimals without a warning (default {validation_settings.DEFAULT_SIG_DIG_TOLERANCE}).
+    {validation_settings.IO_BUDGET} <bytes> \t Bytes of storage chunks to read per variable for the sampled min/max check, e.g. 512M.
+    \t\t\t\t\t Default is {validation_settings.SAMPLE_SIZE} timestamps of the variable. The sample is spread over the time axis and grid points.
+    {validation_settings.TIME_BUDGET} <sec> \t Seconds to spend per variable on the sampled min/max check, sized by the read throughput measured during the run.
+    {validation_settings.JOBS} <int> \t\t Number of variables to validate in parallel (default {validation_settings.DEFAULT_JOBS}).
+    {validation_settings.CONFIG_CACHE_DIR} <dir> \t Directory of the on-disk config cache (default {validation_settings.DEFAULT_CONFIG_CACHE_DIR}).
+    {validation_settings.CONFIG_TTL} <int> \t Seconds a cached config is used before it is revalidated (default {validation_settings.DEFAULT_CONFIG_TTL_SECONDS}).
+    {validation_settings.OFFLINE} \t\t\t Only use cached configs, never download. Combine with a cache dir to pin a config snapshot.
+    {validation_settings.FAIL_FAST} \t\t\t Stop validating at the first error. Cheap metadata checks run before data is read.
+    {validation_settings.MAX_ERRORS} <int> \t Stop validating after this many errors.
+    {validation_settings.MAX_EXAMPLES} <int> \t Findings listed per validator, further findings are only counted (default {validation_settings.DEFAULT_MAX_EXAMPLES}).
+    {validation_settings.INCREMENTAL} \t\t Only validate files that are new or changed since the last incremental run of DIR,
+    \t\t\t\t\t using the summary that run wrote to DIR/{validation_settings.SUMMARY_FILE_NAME}.
+    {validation_settings.PROFILE} <file> \t Write wall time, bytes and chunks read and peak memory per validator to a JSON file.
+
+Batch options:
+    {cli_options.WORKERS} <int> \t\t Number of datasets to validate in parallel (default number of CPUs).
+    {cli_options.JOURNAL} <file> \t Journal of finished datasets. Datasets in the journal are skipped unless their files
+    \t\t\t\t\t or the options changed, so an interrupted batch can be resumed by rerunning it.
 """
 
 
@@ -55,6 +87,10 @@ def main():
         print(DOCSTRING)
         sys.exit(2)
 
+    if sys.argv[2] == cli_options.BATCH:
+        main_batch()
+        return
+
     try:
         result = validate(sys.argv[2], additional_args=sys.argv[2:])
     except Exception as e:
@@ -66,7 +102,7 @@ def main():
     if result.errors:
         pretty_print_result(
             result.errors,
-            description=f"Found {len(result.errors)} errors. These must be fixed:",
+            description=f"Found {result.error_count} errors. These must be fixed:",
         )
     if result.warnings:
         pretty_print_result(
@@ -75,15 +111,59 @@ def main():
         )
     if not result.warnings + result.errors:
         print("Looks good! File validated with 0 errors and 0 warnings")
+    if result.stopped_early:
+        print(
+            f"Validation stopped after {validation_settings.get_max_errors()} errors, "
+            "remaining checks were skipped"
+        )
 
     if result.errors:
         sys.exit(1)
 
 
+def main_batch():
+    # Imported here, the batch module itself depends on validate()
+    from .batch import validate_many  # pylint: disable=import-outside-toplevel
+
+    if len(sys.argv) <= 3:
+        print(DOCSTRING)
+        sys.exit(2)
+    args = sys.argv[2:]
+    try:
+        workers = cli_options.parse_workers(args)
+        journal = cli_options.parse_option_value(args, cli_options.JOURNAL)
+    except ValueError:
+        print(DOCSTRING)
+        sys.exit(2)
+
+    try:
+        results = validate_many(
+            sys.argv[3],
+            max_workers=workers,
+            journal_path=journal,
+            additional_args=args,
+        )
+    except Exception as e:
+        log.error(e)
+        print(f"Batch validation failed with an unexpected error: {e!r}")
+        sys.exit(1)
+
+    log.info("Batch validation finished")
+    for path, result in results.items():
+        print(f"{path}: {len(result.errors)} errors, {len(result.warnings)} warnings")
+    failed = [path for path, result in results.items() if result.errors]
+    print(f"Validated {len(results)} datasets, {len(failed)} with errors")
+    if failed:
+        sys.exit(1)
+
+
 def validate(
     path: str,
     injected_logger: Optional[logging.Logger] = None,
     additional_args: Optional[List[str]] = None,
+    jobs: Optional[int] = None,
+    profile: Optional[str] = None,
+    max_errors: Optional[int] = None,
 ) -> ValidationResult:
     """
     Execute validation on a directory or file.
@@ -94,37 +174,208 @@ def validate(
         than the ones included in the set under validation
         injected_logger: pass a logger to be used for validation
         additional_args: see docstring "Options" for available additional_args.
+        jobs: number of variables validated in parallel, overrides --jobs.
+        Sampled checks use a seed per variable, so results do not depend on jobs.
+        profile: path of a JSON file to write the cost per validator to, overrides --profile.
+        max_errors: stop validating once this many errors are found, overrides --max-errors.
 
     Returns:
         ValidationResult containing errors and warning from running validation
     """
+    sink = _run_validation(
+        lambda sink: _validate(path, sink),
+        injected_logger,
+        additional_args,
+        jobs,
+        profile,
+        max_errors,
+    )
+    return ValidationResult(
+        warnings=sink.warnings,
+        errors=sink.errors,
+        counts=sink.counts,
+        error_count=sink.error_count,
+        stopped_early=sink.stopped_early,
+    )
+
+
+def iter_validate(
+    path: str,
+    injected_logger: Optional[logging.Logger] = None,
+    additional_args: Optional[List[str]] = None,
+    jobs: Optional[int] = None,
+    max_errors: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Execute validation on a directory or file, yielding each error and warning
+    as soon as the validator producing it has finished. See validate() for the
+    arguments. Validation runs in a background thread; when the caller stops
+    iterating, validators that have not started yet are skipped.
+    """
+    findings: "queue.Queue[Optional[Finding]]" = queue.Queue()
+    failure: List[BaseException] = []
+    # the settings are applied in the context the validation runs in, before the
+    # sink is built, so that the sink takes the limits of additional_args
+    context = contextvars.copy_context()
+    context.run(
+        validation_settings.apply_settings,
+        additional_args or [],
+        jobs=jobs,
+        max_errors=max_errors,
+    )
+    sink = context.run(
+        finding_sink.FindingSink,
+        max_errors=context.run(validation_settings.get_max_errors),
+        on_finding=findings.put,
+    )
+
+    def run() -> None:
+        try:
+            _run_validation(
+                lambda sink: _validate(path, sink),
+                injected_logger,
+                additional_args,
+                jobs,
+                None,
+                max_errors,
+                sink,
+            )
+        except BaseException as err:  # re-raised in the caller's thread
+            failure.append(err)
+        finally:
+            findings.put(None)
+
+    thread = threading.Thread(target=context.run, args=(run,), daemon=True)
+    thread.start()
+    try:
+        while (finding := findings.get()) is not None:
+            yield finding.render()
+        for omitted in sink.omitted():
+            yield omitted.render()
+    finally:
+        sink.cancel()
+        thread.join()
+    if failure:
+        raise failure[0]
+
+
+def validate_dataset(
+    ds: xr.Dataset,
+    file_layout: Optional[Dict[str, int]] = None,
+    injected_logger: Optional[logging.Logger] = None,
+    additional_args: Optional[List[str]] = None,
+    jobs: Optional[int] = None,
+    profile: Optional[str] = None,
+    max_errors: Optional[int] = None,
+) -> ValidationResult:
+    """
+    Execute validation on a dataset that is not (yet) written, e.g. one built in
+    memory or backed by dask, so it can be validated before the write.
+
+    Args:
+        ds: the dataset, as it would be opened from its files
+        file_layout: the files ds is to be written to, as the path of each file
+        with the number of timestamps it holds, see proposed_manifests. The
+        file names and time axes of these files are validated as for files on
+        disk. Without a file layout the checks of the files are skipped.
+        injected_logger, additional_args, jobs, profile, max_errors: see validate()
+
+    Returns:
+        ValidationResult containing errors and warning from running validation
+    """
+    sink = _run_validation(
+        lambda sink: _validate_dataset(ds, file_layout, sink),
+        injected_logger,
+        additional_args,
+        jobs,
+        profile,
+        max_errors,
+    )
+    return ValidationResult(
+        warnings=sink.warnings,
+        errors=sink.errors,
+        counts=sink.counts,
+        error_count=sink.error_count,
+        stopped_early=sink.stopped_early,
+    )
+
+
+def _run_validation(
+    run: Callable[[finding_sink.FindingSink], None],
+    injected_logger: Optional[logging.Logger],
+    additional_args: Optional[List[str]],
+    jobs: Optional[int],
+    profile: Optional[str],
+    max_errors: Optional[int],
+    sink: Optional[finding_sink.FindingSink] = None,
+) -> finding_sink.FindingSink:
     log.create_or_update_logger(injected_logger)
-    validation_settings.apply_settings(additional_args or [])
+    validation_settings.apply_settings(
+        additional_args or [], jobs=jobs, profile=profile, max_errors=max_errors
+    )
+    if sink is None:
+        sink = finding_sink.FindingSink(max_errors=validation_settings.get_max_errors())
+
+    with (
+        profiling.profile_run(
+            validation_settings.get_profile_path(), validation_settings.PROFILE_TOP_N
+        ),
+        finding_sink.collect(sink),
+    ):
+        run(sink)
+    if sink.stopped_early:
+        log.info("Validation stopped early after %s errors", sink.error_count)
+    return sink
 
+
+def _validate(path: str, sink: finding_sink.FindingSink) -> None:
     try:
         log.info("load dataset from path %s", path)
         paths = load_paths(path)
         if not paths:
             raise OSError("No NetCDF files in dir")
     except Exception as err:
-        return ValidationResult(
-            errors=[f"file:Could not open files in path {path}", repr(err)],
-            warnings=[],
-        )
+        sink.emit_message(f"file:Could not open files in path {path}")
+        sink.emit_message(repr(err))
+        return
 
-    ds = None
     try:
-        assert_no_external_references(paths)
-        ds = open_mf_dataset(paths)
-        result = root_validator(ds, paths)
-        return ValidationResult(
-            warnings=list(set(result.warnings)),
-            errors=result.errors,
-        )
+        with profiling.profile_node("manifests"):
+            manifests = build_manifests(paths, validation_settings.get_jobs())
+        raise_for_external_references(manifests)
+        if validation_settings.is_incremental() and not path.endswith(".nc"):
+            result = validate_incremental(path, manifests, validate_files)
+            for error in result.errors:
+                sink.emit_message(error)
+            for warning in result.warnings:
+                sink.emit_message(warning, Severity.WARNING)
+        else:
+            validate_files(paths, manifests)  # findings are emitted to the sink
     except ExternalReferenceError as err:
-        return ValidationResult(errors=[f"file:{err}"], warnings=[])
+        sink.emit_message(f"file:{err}")
+    except Exception as err:
+        sink.emit_message(repr(err))
+
+
+def _validate_dataset(
+    ds: xr.Dataset,
+    file_layout: Optional[Dict[str, int]],
+    sink: finding_sink.FindingSink,
+) -> None:
+    try:
+        manifests = proposed_manifests(ds, file_layout) if file_layout else []
+        root_validator(ds, manifests)  # findings are emitted to the sink
     except Exception as err:
-        return ValidationResult(errors=[repr(err)], warnings=[])
+        sink.emit_message(repr(err))
+
+
+def validate_files(paths: List[str], manifests: List[FileManifest]) -> ValidationResult:
+    """Validate the files as one dataset"""
+    ds = None
+    try:
+        with profiling.profile_node("open_dataset"):
+            ds = open_mf_dataset(paths)
+        return root_validator(ds, manifests)
     finally:
         if ds:
             ds.close()
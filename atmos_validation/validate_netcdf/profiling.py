@@ -0,0 +1,264 @@
+"""
+Cost profile of a validation run, recorded per validation node.
+
+Every validation_node is profiled under its path through the tree of nodes,
+e.g. root:variables:variable:WS:varinterval, with:
+    calls: number of times the node ran
+    wall_time: seconds spent in the node, including its children
+    self_time: wall_time minus the wall_time of the node's children
+    bytes_read: bytes read by the process (/proc/self/io rchar), so both HDF5
+    reads by xarray and reads of dask chunks. Not available on all platforms.
+    chunks_read: number of dask tasks that loaded a chunk from a file
+    peak_memory: tracemalloc peak of the node, relative to its start
+    values_checked: number of values loaded by sampled checks
+    chunk_bytes: uncompressed size of the storage chunks those values lie in,
+    i.e. what has to be decompressed to check them
+    bytes_per_value: bytes_read per value checked, for nodes that sampled values
+
+Bytes and memory are measured for the whole process, so with several jobs the
+numbers of concurrently running nodes overlap. Profile with one job for exact
+numbers per node.
+"""
+
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dask.callbacks import Callback
+
+from .validation_logger import log
+
+ROOT_NODE = "root"
+_CHUNK_TASK_MARKERS = ("open_dataset-", "original-")
+
+NodePath = Tuple[str, ...]
+
+
+@dataclass
+class NodeStats:
+    calls: int = 0
+    wall_time: float = 0.0
+    bytes_read: Optional[int] = None
+    chunks_read: int = 0
+    peak_memory: int = 0
+    values_checked: int = 0
+    chunk_bytes: int = 0
+
+
+@dataclass
+class _Frame:
+    path: NodePath
+    started_at: float
+    rchar: Optional[int]
+    memory: int
+    peak: int = 0
+    chunks: int = 0
+    values: int = 0
+    chunk_bytes: int = 0
+
+
+class Profile:
+    def __init__(self) -> None:
+        self.stats: Dict[NodePath, NodeStats] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        path: NodePath,
+        wall_time: float,
+        bytes_read: Optional[int],
+        chunks_read: int,
+        peak_memory: int,
+        values_checked: int = 0,
+        chunk_bytes: int = 0,
+    ) -> None:
+        with self._lock:
+            stats = self.stats.setdefault(path, NodeStats())
+            stats.calls += 1
+            stats.wall_time += wall_time
+            if bytes_read is not None:
+                stats.bytes_read = (stats.bytes_read or 0) + bytes_read
+            stats.chunks_read += chunks_read
+            stats.peak_memory = max(stats.peak_memory, peak_memory)
+            stats.values_checked += values_checked
+            stats.chunk_bytes += chunk_bytes
+
+    def add_chunks(self, frame: _Frame, chunks: int) -> None:
+        with self._lock:
+            frame.chunks += chunks
+
+    def add_sampled(self, frame: _Frame, values: int, chunk_bytes: int) -> None:
+        with self._lock:
+            frame.values += values
+            frame.chunk_bytes += chunk_bytes
+
+    def self_time(self, path: NodePath) -> float:
+        children = sum(
+            stats.wall_time
+            for child, stats in self.stats.items()
+            if child[:-1] == path and len(child) == len(path) + 1
+        )
+        return max(self.stats[path].wall_time - children, 0.0)
+
+    def tree(self, path: NodePath = (ROOT_NODE,)) -> Dict[str, Any]:
+        children = sorted(
+            child
+            for child in self.stats
+            if len(child) == len(path) + 1 and child[:-1] == path
+        )
+        return {
+            "name": path[-1],
+            **self._entry(path),
+            "children": [self.tree(child) for child in children],
+        }
+
+    def top(self, top_n: int) -> List[Dict[str, Any]]:
+        """Nodes sorted by the time spent in the node itself"""
+        paths = sorted(self.stats, key=self.self_time, reverse=True)
+        return [{"path": ":".join(path), **self._entry(path)} for path in paths[:top_n]]
+
+    def to_dict(self, top_n: int) -> Dict[str, Any]:
+        return {"tree": self.tree(), "top": self.top(top_n)}
+
+    def _entry(self, path: NodePath) -> Dict[str, Any]:
+        stats = self.stats[path]
+        entry = {**asdict(stats), "self_time": self.self_time(path)}
+        if stats.values_checked and stats.bytes_read is not None:
+            entry["bytes_per_value"] = stats.bytes_read / stats.values_checked
+        return entry
+
+
+_profile: ContextVar[Optional[Profile]] = ContextVar("profile", default=None)
+_frame: ContextVar[Optional[_Frame]] = ContextVar("profile_frame", default=None)
+
+
+class _ChunkCounter(Callback):
+    """Counts the dask tasks loading chunks, attributed to the running node.
+    Dask calls back from the thread that called compute, i.e. the node's thread."""
+
+    def _posttask(self, key, result, dsk, state, id):  # pylint: disable=redefined-builtin
+        profile, frame = _profile.get(), _frame.get()
+        if profile is None or frame is None:
+            return
+        name = key[0] if isinstance(key, tuple) else key
+        if any(marker in str(name) for marker in _CHUNK_TASK_MARKERS):
+            profile.add_chunks(frame, 1)
+
+
+@contextmanager
+def profile_run(
+    output_path: Optional[str], top_n: int = 20
+) -> Iterator[Optional[Profile]]:
+    """
+    Profile all validation nodes run inside the context, under the root node,
+    and write the profile as JSON to output_path. Without output_path nothing
+    is profiled.
+    """
+    if output_path is None:
+        yield None
+        return
+
+    profile = Profile()
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _profile.set(profile)
+    try:
+        with _ChunkCounter(), profile_node(ROOT_NODE):
+            yield profile
+    finally:
+        _profile.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+        write_profile(profile, output_path, top_n)
+
+
+@contextmanager
+def profile_node(name: str) -> Iterator[None]:
+    """Profile the code inside the context as a child of the running node"""
+    profile = _profile.get()
+    if profile is None:
+        yield
+        return
+
+    parent = _frame.get()
+    path = (parent.path if parent else ()) + (name.strip(":"),)
+    if parent is not None:
+        # tracemalloc has a single peak, so keep the parent's peak before resetting
+        parent.peak = max(parent.peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+    frame = _Frame(
+        path=path,
+        started_at=time.perf_counter(),
+        rchar=_read_rchar(),
+        memory=tracemalloc.get_traced_memory()[0],
+    )
+    token = _frame.set(frame)
+    try:
+        yield
+    finally:
+        _frame.reset(token)
+        rchar = _read_rchar()
+        peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+        profile.record(
+            path,
+            wall_time=time.perf_counter() - frame.started_at,
+            bytes_read=(
+                None if rchar is None or frame.rchar is None else rchar - frame.rchar
+            ),
+            chunks_read=frame.chunks,
+            peak_memory=max(peak - frame.memory, 0),
+            values_checked=frame.values,
+            chunk_bytes=frame.chunk_bytes,
+        )
+        if parent is not None:
+            parent.peak = max(parent.peak, peak)
+            profile.add_chunks(parent, frame.chunks)
+            profile.add_sampled(parent, frame.values, frame.chunk_bytes)
+
+
+def count_sampled(values: int, chunk_bytes: int) -> None:
+    """Attribute values loaded by a sampled check to the running node"""
+    profile, frame = _profile.get(), _frame.get()
+    if profile is not None and frame is not None:
+        profile.add_sampled(frame, values, chunk_bytes)
+
+
+def write_profile(profile: Profile, output_path: str, top_n: int) -> None:
+    report = profile.to_dict(top_n)
+    with open(output_path, "w", encoding="utf-8") as output:
+        json.dump(report, output, indent=2)
+    log.info("Wrote validation profile to %s, most expensive nodes:", output_path)
+    for entry in report["top"]:
+        log.info(
+            "%8.2fs self %8.2fs total %6s calls %s",
+            entry["self_time"],
+            entry["wall_time"],
+            entry["calls"],
+            entry["path"],
+        )
+
+
+_own_reads = 0  # bytes the profiler read from /proc itself
+_own_reads_lock = threading.Lock()
+
+
+def _read_rchar() -> Optional[int]:
+    global _own_reads  # pylint: disable=global-statement
+    try:
+        with open("/proc/self/io", "r", encoding="ascii") as io_stats:
+            content = io_stats.read()
+    except OSError:
+        return None
+    with _own_reads_lock:
+        own_reads = _own_reads
+        _own_reads += len(content)
+    for line in content.splitlines():
+        if line.startswith("rchar:"):
+            return int(line.split()[1]) - own_reads
+    return None
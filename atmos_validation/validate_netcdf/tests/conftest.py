@@ -0,0 +1,22 @@
+import pytest
+
+from .test_sig_digs import test_config
+
+
+@pytest.fixture(name="pinned_configs")
+def fixture_pinned_configs(pin_configs):
+    """The parameters of the measurement example, with a range its values exceed"""
+    pin_configs(
+        [
+            test_config.model_copy(
+                update={
+                    "key": key,
+                    "dims": ["Time", f"height_{key}", "south_north", "west_east"],
+                    "min": 0,
+                    "max": 1,
+                }
+            )
+            for key in ("WS", "WD", "WG")
+        ],
+        data_usability="RAW",
+    )
@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from ... import cli_options
+from .. import validation_settings
+from ..batch import (
+    append_to_journal,
+    dataset_fingerprint,
+    find_datasets,
+    read_journal,
+    validate_many,
+)
+from ..main import validate
+from ..validators.root_validator import ValidationResult
+
+MEASUREMENT_EXAMPLE = "examples/example_netcdf_measurement.nc"
+
+
+@pytest.fixture(name="datasets")
+def fixture_datasets(tmp_path):
+    """Two datasets, one nested, and a directory without NetCDF files."""
+    for directory in ("a", "b/nested", "c"):
+        (tmp_path / directory).mkdir(parents=True)
+    shutil.copy(MEASUREMENT_EXAMPLE, tmp_path / "a" / "data.nc")
+    shutil.copy(MEASUREMENT_EXAMPLE, tmp_path / "b" / "nested" / "data.nc")
+    (tmp_path / "c" / "notes.txt").write_text("not a dataset")
+    return [str(tmp_path / "a"), str(tmp_path / "b" / "nested")]
+
+
+def test_find_datasets(tmp_path, datasets):
+    assert find_datasets(str(tmp_path)) == datasets
+    assert find_datasets(MEASUREMENT_EXAMPLE) == [MEASUREMENT_EXAMPLE]
+
+
+def test_batch_matches_single_validations(tmp_path, datasets, pinned_configs):
+    args = [validation_settings.RANDOM_SEED, "7"]
+    journal = str(tmp_path / "journal.jsonl")
+
+    results = validate_many(
+        str(tmp_path), max_workers=2, journal_path=journal, additional_args=args
+    )
+
+    assert list(results) == datasets
+    journaled = read_journal(journal)
+    for path in datasets:
+        expected = validate(path, additional_args=args)
+        for result in (results[path], journaled[path]):
+            assert result.errors == expected.errors
+            assert sorted(result.warnings) == sorted(expected.warnings)
+    validation_settings.apply_settings([])
+
+
+def test_finished_datasets_in_journal_are_skipped(tmp_path, datasets):
+    journal = tmp_path / "journal.jsonl"
+    entries = [
+        {
+            "path": path,
+            "fingerprint": dataset_fingerprint(path, []),
+            "errors": [f"error in {path}"],
+            "warnings": [],
+        }
+        for path in datasets
+    ]
+    # The last line was cut short when the previous batch was interrupted
+    journal.write_text(
+        "".join(json.dumps(entry) + "\n" for entry in entries) + '{"path": "c'
+    )
+
+    results = validate_many(str(tmp_path), journal_path=str(journal))
+
+    assert [result.errors for result in results.values()] == [
+        entry["errors"] for entry in entries
+    ]
+
+
+def test_journaled_datasets_are_validated_again_if_changed(tmp_path, datasets):
+    journal = str(tmp_path / "journal.jsonl")
+    results = validate_many(str(tmp_path), journal_path=journal)
+    stale = ValidationResult(errors=["stale"], warnings=[])
+    for path in datasets:
+        append_to_journal(journal, path, stale, dataset_fingerprint(path, []))
+    redelivered = os.path.join(datasets[0], "data.nc")
+    os.utime(redelivered, ns=(0, 0))
+
+    rerun = validate_many(str(tmp_path), journal_path=journal)
+    with_options = validate_many(
+        str(tmp_path),
+        journal_path=journal,
+        additional_args=[validation_settings.SKIP_WARNINGS],
+    )
+    validation_settings.apply_settings([])
+
+    assert rerun[datasets[0]].errors == results[datasets[0]].errors
+    assert rerun[datasets[1]].errors == ["stale"]
+    assert all(result.errors != ["stale"] for result in with_options.values())
+    assert dataset_fingerprint(datasets[1], []) == dataset_fingerprint(
+        datasets[1],
+        [cli_options.BATCH, "root", cli_options.WORKERS, "2"],
+    )
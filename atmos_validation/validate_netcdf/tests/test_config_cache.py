@@ -0,0 +1,119 @@
+import json
+import os
+import time
+
+import pytest
+
+from .. import config_cache, validation_settings
+from ..utils import ConfigDownloadError, ConfigResponse
+
+URL = "https://example.com/config/installation-types"
+BODY = json.dumps([{"installation_type": "BUOY"}, {"installation_type": "PLATFORM"}])
+
+
+class FakeEndpoint:
+    def __init__(self):
+        self.requests = []
+        self.fail = False
+
+    def __call__(self, url, headers=None):
+        self.requests.append(headers)
+        if self.fail:
+            raise ConnectionError("endpoint down")
+        if headers and headers.get("If-None-Match") == '"v1"':
+            return ConfigResponse(304, b"", '"v1"', None)
+        return ConfigResponse(200, BODY.encode(), '"v1"', None)
+
+
+@pytest.fixture(name="endpoint")
+def fixture_endpoint(monkeypatch, tmp_path):
+    endpoint = FakeEndpoint()
+    monkeypatch.setattr(config_cache, "fetch_config", endpoint)
+    validation_settings.apply_settings(
+        [validation_settings.CONFIG_CACHE_DIR, str(tmp_path)]
+    )
+    yield endpoint
+    validation_settings.apply_settings([])
+
+
+def _load(url: str = URL):
+    return config_cache.load_config(url, config_cache._parse_installation_types)  # type: ignore
+
+
+def test_fresh_copy_is_served_from_disk(endpoint, tmp_path):
+    assert _load() == ["BUOY", "PLATFORM"]
+    assert _load() == ["BUOY", "PLATFORM"]
+
+    assert len(endpoint.requests) == 1
+    for path in config_cache._cache_paths(URL):  # type: ignore
+        assert os.path.dirname(path) == str(tmp_path)
+        assert os.path.exists(path)
+
+
+def test_parsed_config_is_reused_for_identical_content(endpoint):
+    assert _load() is _load()
+
+
+def test_expired_copy_is_revalidated_with_etag(endpoint, tmp_path):
+    _load()
+    _, meta_path = config_cache._cache_paths(URL)  # type: ignore
+    meta_path = tmp_path / os.path.basename(meta_path)
+    meta = json.loads(meta_path.read_text())
+    meta["fetched_at"] = time.time() - validation_settings.DEFAULT_CONFIG_TTL_SECONDS
+    meta_path.write_text(json.dumps(meta))
+
+    assert _load() == ["BUOY", "PLATFORM"]
+
+    assert endpoint.requests[-1] == {"If-None-Match": '"v1"'}
+    assert json.loads(meta_path.read_text())["fetched_at"] > meta["fetched_at"]
+
+
+def test_stale_copy_is_used_when_endpoint_is_down(endpoint):
+    validation_settings.apply_settings(
+        [
+            validation_settings.CONFIG_CACHE_DIR,
+            validation_settings.get_config_cache_dir(),
+            validation_settings.CONFIG_TTL,
+            "0",
+        ]
+    )
+    _load()
+    endpoint.fail = True
+
+    assert _load() == ["BUOY", "PLATFORM"]
+
+
+def test_offline_mode_never_downloads(endpoint, tmp_path):
+    validation_settings.apply_settings(
+        [
+            validation_settings.CONFIG_CACHE_DIR,
+            str(tmp_path),
+            validation_settings.OFFLINE,
+        ]
+    )
+    with pytest.raises(ConfigDownloadError, match="offline"):
+        _load()
+
+    content_path, _ = config_cache._cache_paths(URL)  # type: ignore
+    with open(content_path, "w", encoding="utf-8") as snapshot:  # pinned snapshot
+        snapshot.write(BODY)
+
+    assert _load() == ["BUOY", "PLATFORM"]
+    assert not endpoint.requests
+
+
+def test_urls_with_the_same_name_are_cached_apart(endpoint):
+    other = "https://example.org/other/installation-types"
+    assert config_cache._cache_paths(other) != config_cache._cache_paths(URL)  # type: ignore
+    _load()
+    endpoint.fail = True
+    validation_settings.apply_settings(
+        [
+            validation_settings.CONFIG_CACHE_DIR,
+            validation_settings.get_config_cache_dir(),
+            validation_settings.OFFLINE,
+        ]
+    )
+
+    with pytest.raises(ConfigDownloadError, match="offline"):
+        _load(other)
@@ -0,0 +1,95 @@
+import os
+import shutil
+from typing import List
+
+import pytest
+
+from .. import config_cache, dataset_summary, validation_settings
+from ..file_manifest import FileManifest, build_manifests
+from ..utils import get_file_paths_in_folder
+from ..validators.root_validator import ValidationResult
+
+HINDCAST_EXAMPLE_DIR = "examples/hindcast_example"
+
+
+class RecordingValidation:
+    """Stands in for the validation of files, recording which files it got"""
+
+    def __init__(self):
+        self.calls: List[List[str]] = []
+
+    def __call__(
+        self, paths: List[str], manifests: List[FileManifest]
+    ) -> ValidationResult:
+        names = [os.path.basename(path) for path in paths]
+        self.calls.append(names)
+        return ValidationResult(
+            errors=[f"error in {name}" for name in names], warnings=[]
+        )
+
+
+@pytest.fixture(name="dataset")
+def fixture_dataset(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_cache, "get_config_bytes", lambda url: b"[]")
+    validation_settings.apply_settings([validation_settings.INCREMENTAL])
+    examples = get_file_paths_in_folder(HINDCAST_EXAMPLE_DIR)
+    for path in examples[:2]:
+        shutil.copy(path, tmp_path)
+    yield tmp_path, examples
+    validation_settings.apply_settings([])
+
+
+def _run(directory, validation: RecordingValidation) -> ValidationResult:
+    manifests = build_manifests(get_file_paths_in_folder(str(directory)))
+    return dataset_summary.validate_incremental(str(directory), manifests, validation)
+
+
+def test_only_appended_file_is_validated(dataset):
+    directory, examples = dataset
+    validation = RecordingValidation()
+    _run(directory, validation)
+    assert os.path.exists(directory / validation_settings.SUMMARY_FILE_NAME)
+
+    shutil.copy(examples[2], directory)
+    result = _run(directory, validation)
+
+    assert validation.calls == [
+        [os.path.basename(path) for path in examples[:2]],
+        [os.path.basename(examples[2])],
+    ]
+    assert len(result.errors) == 3
+
+
+def test_touched_file_is_not_validated_again(dataset):
+    directory, _ = dataset
+    validation = RecordingValidation()
+    _run(directory, validation)
+
+    os.utime(get_file_paths_in_folder(str(directory))[0])
+    result = _run(directory, validation)
+
+    assert len(validation.calls) == 1
+    assert len(result.errors) == 2
+
+
+def test_changed_file_validated_with_others_triggers_full_run(dataset):
+    directory, _ = dataset
+    validation = RecordingValidation()
+    _run(directory, validation)
+
+    with open(get_file_paths_in_folder(str(directory))[0], "ab") as file:
+        file.write(b"\0")
+    _run(directory, validation)
+
+    assert validation.calls[1] == validation.calls[0]
+
+
+def test_appended_file_must_continue_time_axis(dataset):
+    directory, examples = dataset
+    validation = RecordingValidation()
+    _run(directory, validation)
+
+    shutil.copy(examples[0], directory / "example_hindcast_20160115_20160131_T744.nc")
+    result = _run(directory, validation)
+
+    assert any("does not continue after" in error for error in result.errors)
@@ -0,0 +1,55 @@
+import h5py
+import numpy as np
+import pytest
+
+from ..external_reference_guard import ExternalReferenceError
+from ..file_manifest import (
+    build_manifest,
+    build_manifests,
+    raise_for_external_references,
+)
+from ..utils import get_file_paths_in_folder
+from ..validators.dims.time_validator import filename_validator
+
+HINDCAST_EXAMPLE_DIR = "examples/hindcast_example"
+
+
+def test_manifest_holds_time_and_static_coordinates():
+    path = get_file_paths_in_folder(HINDCAST_EXAMPLE_DIR)[1]
+
+    manifest = build_manifest(path)
+
+    assert manifest.external_references == []
+    assert manifest.time_length == 696
+    assert manifest.time_start is not None and manifest.time_end is not None
+    assert manifest.time_start < manifest.time_end
+    assert manifest.time_units == b"microseconds since 1900-01-01"
+    assert "LAT" in manifest.static_coordinates
+
+
+def test_manifests_built_in_parallel_match_serial_build():
+    paths = get_file_paths_in_folder(HINDCAST_EXAMPLE_DIR)
+
+    assert build_manifests(paths, jobs=3) == build_manifests(paths)
+
+
+def test_nothing_is_read_from_file_with_external_references(tmp_path):
+    target = tmp_path / "target.nc"
+    with h5py.File(target, "w") as file:
+        file.create_dataset("Time", data=np.arange(10, dtype="int64"))
+    path = tmp_path / "ext_link_20200101_20200101_T10.nc"
+    with h5py.File(path, "w") as file:
+        file["Time"] = h5py.ExternalLink(str(target), "/Time")
+
+    manifest = build_manifest(str(path))
+
+    assert len(manifest.external_references) == 1
+    assert manifest.time_length is None
+    with pytest.raises(ExternalReferenceError):
+        raise_for_external_references([manifest])
+
+
+def test_filename_validator_passes_example_manifests():
+    manifests = build_manifests(get_file_paths_in_folder(HINDCAST_EXAMPLE_DIR))
+
+    assert filename_validator(manifests) == []
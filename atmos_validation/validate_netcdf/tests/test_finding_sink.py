@@ -0,0 +1,123 @@
+from typing import Iterator, List
+
+from .. import finding_sink, validation_settings
+from ..main import iter_validate, validate
+from ..utils import Message, Severity, validation_node
+
+MEASUREMENT_EXAMPLE = "examples/example_netcdf_measurement.nc"
+
+calls: List[str] = []
+
+
+@validation_node(severity=Severity.ERROR)
+def parent_node_validator() -> List[str]:
+    calls.append("parent")
+    return first_child_validator() + second_child_validator() + ["parent finding"]
+
+
+@validation_node(severity=Severity.ERROR)
+def first_child_validator() -> List[str]:
+    calls.append("first")
+    return ["first finding", "another first finding"]
+
+
+@validation_node(severity=Severity.WARNING)
+def second_child_validator() -> List[str]:
+    calls.append("second")
+    return ["second finding"]
+
+
+@validation_node(severity=Severity.WARNING)
+def per_element_validator(count: int) -> Iterator[Message]:
+    for i in range(count):
+        yield Message("element {}", (i,))
+
+
+@validation_node(severity=Severity.ERROR)
+def mentions_warning_validator() -> List[str]:
+    return ["the WARNING attribute is missing"]
+
+
+def test_sink_receives_findings_with_full_path():
+    expected = parent_node_validator()
+
+    sink = finding_sink.FindingSink()
+    with finding_sink.collect(sink):
+        returned = parent_node_validator()
+
+    assert returned == []
+    assert sorted(sink.errors + sink.warnings) == sorted(expected)
+    assert sink.warnings == ["parent_node:second_child:Severity.WARNING:second finding"]
+
+
+def test_nodes_are_skipped_once_max_errors_is_reached():
+    calls.clear()
+    sink = finding_sink.FindingSink(max_errors=1)
+    with finding_sink.collect(sink):
+        parent_node_validator()
+
+    assert calls == ["parent", "first"]
+    assert len(sink.errors) == 3  # the first child and parent's own findings
+
+
+def test_iter_validate_yields_same_findings_as_validate():
+    path = "does/not/exist"
+
+    assert list(iter_validate(path)) == validate(path).errors
+
+
+def test_iter_validate_stops_after_max_errors(pinned_configs):
+    seed = [validation_settings.RANDOM_SEED, "1"]
+    complete = validate(MEASUREMENT_EXAMPLE, additional_args=seed)
+    validation_settings.apply_settings([])
+
+    stopped = list(
+        iter_validate(
+            MEASUREMENT_EXAMPLE,
+            additional_args=seed + [validation_settings.MAX_ERRORS, "2"],
+        )
+    )
+    failed_fast = list(
+        iter_validate(
+            MEASUREMENT_EXAMPLE, additional_args=seed + [validation_settings.FAIL_FAST]
+        )
+    )
+
+    assert not complete.stopped_early
+    errors = [finding for finding in stopped if ":Severity.ERROR:" in finding]
+    assert 2 <= len(errors) < complete.error_count
+    assert failed_fast == complete.errors[:1]
+    assert validation_settings.get_max_errors() is None
+
+
+def test_only_first_examples_per_node_are_kept():
+    sink = finding_sink.FindingSink(max_examples=2)
+    with finding_sink.collect(sink):
+        per_element_validator(5)
+
+    assert sink.counts == {"per_element": 5}
+    assert sink.warnings == [
+        "per_element:Severity.WARNING:element 0",
+        "per_element:Severity.WARNING:element 1",
+        "per_element:Severity.WARNING:3 more findings of this validator were not listed",
+    ]
+
+
+def test_severity_is_taken_from_the_node_not_the_message():
+    sink = finding_sink.FindingSink()
+    with finding_sink.collect(sink):
+        mentions_warning_validator()
+        per_element_validator(1)
+
+    assert sink.error_count == 1
+    assert len(sink.warnings) == 1
+
+
+def test_message_is_formatted_as_without_sink():
+    expected = per_element_validator(3)
+
+    sink = finding_sink.FindingSink()
+    with finding_sink.collect(sink):
+        per_element_validator(3)
+
+    assert sink.warnings == expected
@@ -5,7 +5,7 @@ import xarray as xr
 
 from atmos_validation.validate_netcdf import validation_settings
 
-from ..main import validate
+from ..main import load_paths, open_mf_dataset, validate, validate_dataset
 from ..validation_logger import log, setup_logger
 from ..validators.root_validator import ValidationResult
 
@@ -81,3 +81,30 @@ def test_conflicting_coordinates_across_files(tmp_path):
     result = validate(str(tmp_path))
 
     assert any("Conflicting static coordinates" in error for error in result.errors)
+
+
+def test_validate_dataset_matches_validate_of_its_files(pinned_configs):
+    args = [validation_settings.RANDOM_SEED, "3"]
+    paths = load_paths(HINDCAST_EXAMPLE_DIR)
+    lengths = []
+    for path in paths:
+        with xr.open_dataset(path, engine="h5netcdf") as file:
+            lengths.append(len(file["Time"]))
+    file_layout = dict(zip(paths, lengths))
+    ds = open_mf_dataset(paths).load()
+
+    expected = validate(HINDCAST_EXAMPLE_DIR, additional_args=args)
+    with_layout = validate_dataset(ds, file_layout, additional_args=args)
+    without_layout = validate_dataset(ds, additional_args=args)
+    misnamed = validate_dataset(
+        ds, {f"part{i}.nc": length for i, length in enumerate(lengths)}
+    )
+    ds.close()
+    validation_settings.apply_settings([])
+
+    assert with_layout.errors == expected.errors
+    assert with_layout.warnings == expected.warnings
+    assert without_layout.errors == [
+        error for error in expected.errors if ":filename:" not in error
+    ]
+    assert any("filename_includes_time_axis" in error for error in misnamed.errors)
@@ -0,0 +1,60 @@
+import json
+from typing import List
+
+import xarray as xr
+
+from .. import profiling
+from ..utils import Severity, validation_node
+
+MEASUREMENT_EXAMPLE = "examples/example_netcdf_measurement.nc"
+
+
+@validation_node(severity=Severity.ERROR, postfix=lambda args, _: args[1])
+def outer_node_validator(ds: xr.Dataset, key: str) -> List[str]:
+    return inner_node_validator(ds, key) + inner_node_validator(ds, key)
+
+
+@validation_node(severity=Severity.ERROR)
+def inner_node_validator(ds: xr.Dataset, key: str) -> List[str]:
+    ds[key].max().compute()
+    profiling.count_sampled(ds[key].size, ds[key].nbytes)
+    return []
+
+
+def test_profile_records_each_node_path(tmp_path):
+    output = tmp_path / "profile.json"
+    with xr.open_dataset(MEASUREMENT_EXAMPLE, chunks={}) as ds:
+        with profiling.profile_run(str(output), top_n=2):
+            outer_node_validator(ds, "WS")
+
+    report = json.loads(output.read_text())
+    root = report["tree"]
+    assert root["name"] == "root"
+    [outer] = root["children"]
+    assert outer["name"] == "outer_node:WS"
+    [inner] = outer["children"]
+    assert inner["name"] == "inner_node"
+    assert inner["calls"] == 2
+    assert inner["chunks_read"] > 0
+    assert outer["chunks_read"] == inner["chunks_read"]
+    assert outer["wall_time"] >= inner["wall_time"]
+    with xr.open_dataset(MEASUREMENT_EXAMPLE) as ds:
+        assert inner["values_checked"] == 2 * ds["WS"].size
+    assert outer["values_checked"] == inner["values_checked"]
+    assert outer["chunk_bytes"] == inner["chunk_bytes"]
+
+    top = report["top"]
+    assert len(top) == 2
+    assert top[0]["self_time"] >= top[1]["self_time"]
+    assert {entry["path"] for entry in top} <= {
+        "root",
+        "root:outer_node:WS",
+        "root:outer_node:WS:inner_node",
+    }
+
+
+def test_nothing_is_recorded_without_output_path():
+    with profiling.profile_run(None) as profile:
+        with profiling.profile_node("node"):
+            pass
+    assert profile is None
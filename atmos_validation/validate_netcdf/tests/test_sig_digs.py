@@ -1,7 +1,17 @@
+import numpy as np
 import xarray as xr
 
 from ...schemas import ParameterConfig
-from ..validators.variables.sig_dig_validator import sig_dig_validator
+from .. import validation_settings
+from ..validators.variables import sample_planner
+from ..validators.variables.sig_dig_validator import (
+    effective_decimals,
+    fault_fraction,
+    sig_dig_validator,
+)
+from ..validators.variables.varinterval_validator import (
+    _check_randomly_selected_intervals_min_max,  # type: ignore
+)
 
 test_config = ParameterConfig(
     key="P",
@@ -34,3 +44,57 @@ def test_sig_digs_no_errors():
     errors = sig_dig_validator(ds["WS"], test_config, number_of_iterations=10)
     assert len(errors) == 0
     ds.close()
+
+
+def test_sig_digs_warn_on_a_single_fault_unless_tolerated():
+    config = test_config.model_copy(update={"number_of_significant_decimals": 2})
+    with xr.open_dataset("examples/example_netcdf_measurement.nc") as ds:
+        validation_settings.apply_settings([validation_settings.RANDOM_SEED, "1"])
+        errors = sig_dig_validator(ds["WG"], config, number_of_iterations=100)
+        validation_settings.apply_settings(
+            [validation_settings.RANDOM_SEED, "1"]
+            + [validation_settings.SIG_DIG_TOLERANCE, "0.25"]
+        )
+        tolerated = sig_dig_validator(ds["WG"], config, number_of_iterations=100)
+        validation_settings.apply_settings([])
+
+    assert len(errors) == 1
+    assert "1/16" in errors[0]
+    assert tolerated == []
+
+
+def test_sample_is_read_once_for_all_value_checks(monkeypatch):
+    reads = []
+
+    def read_samples(actual, plan):
+        reads.append(actual.name)
+        return original_read_samples(actual, plan)
+
+    original_read_samples = sample_planner.read_samples
+    monkeypatch.setattr(sample_planner, "read_samples", read_samples)
+    with xr.open_dataset("examples/example_netcdf_measurement.nc") as ds:
+        sample = sample_planner.VariableSample(ds, ds["WS"])
+        _check_randomly_selected_intervals_min_max(ds, ds["WS"], test_config, sample)
+        sig_dig_validator(ds["WS"], test_config, sample=sample)
+
+    assert reads == ["WS"]
+
+
+def test_effective_decimals_match_the_shortest_repr():
+    rng = np.random.default_rng(0)
+    for dtype in (np.float32, np.float64):
+        values = np.concatenate(
+            [np.round(rng.uniform(-1000, 1000, 2000), digits) for digits in range(1, 6)]
+        ).astype(dtype)
+        values = values[values != np.round(values)]  # repr shows x.0 for integers
+
+        decimals = effective_decimals(values, 8)
+
+        from_repr = [len(str(value).split(".")[1]) for value in values]
+        assert decimals.tolist() == from_repr
+
+
+def test_fault_fraction_ignores_nan():
+    values = np.array([1.25, 1.2, 1.0, np.nan], dtype=np.float32)
+
+    assert fault_fraction(values, 2) == (2 / 3, 2, 3)
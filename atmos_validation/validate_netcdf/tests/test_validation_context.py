@@ -0,0 +1,44 @@
+import numpy as np
+import xarray as xr
+
+from ...schemas import GRID_POINT_MASK, SOUTH_NORTH, WEST_EAST
+from .. import validation_context
+from ..validation_context import ValidationContext, context_for
+
+
+def _grid(mask=None) -> xr.Dataset:
+    ds = xr.Dataset(
+        {"WS": ((SOUTH_NORTH, WEST_EAST), np.zeros((2, 3)))},
+        attrs={"data_type": "Hindcast"},
+    )
+    if mask is not None:
+        ds[GRID_POINT_MASK] = ((SOUTH_NORTH, WEST_EAST), np.array(mask))
+    return ds
+
+
+def test_context_is_shared_inside_activate():
+    ds = _grid()
+    context = ValidationContext(ds)
+    with validation_context.activate(context):
+        assert context_for(ds) is context
+        assert context_for(_grid()) is not context
+    assert context_for(ds) is not context
+
+
+def test_valid_points_follow_grid_point_mask():
+    context = ValidationContext(_grid([[0, 1, 0], [0, 0, 1]]))
+
+    points = [context.grid_point(index) for index in context.valid_points]
+
+    assert points == [(0, 1), (1, 2)]
+
+
+def test_all_points_are_valid_without_mask():
+    assert len(ValidationContext(_grid()).valid_points) == 6
+
+
+def test_blacklisted_attributes_are_required_only_on_other_data_type():
+    hindcast = ValidationContext(_grid())
+
+    assert "installation_type" in hindcast.blacklisted_attributes
+    assert "comments" not in hindcast.blacklisted_attributes
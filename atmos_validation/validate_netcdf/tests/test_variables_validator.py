@@ -0,0 +1,50 @@
+import xarray as xr
+
+from ...schemas import ParameterConfigs
+from .. import config_cache, validation_settings
+from ..validators.variables import variables_validator as variables_module
+from .test_sig_digs import test_config
+
+
+def _configs_for(ds: xr.Dataset) -> ParameterConfigs:
+    return ParameterConfigs(
+        configs=[
+            test_config.model_copy(
+                update={
+                    "key": key,
+                    "dims": [str(dim) for dim in ds[key].dims],
+                    "min": 0,
+                    "max": 1,
+                    "number_of_significant_decimals": 2,
+                }
+            )
+            for key in ds.data_vars
+            if key != "SST"  # left out to produce an "is not a valid key" error
+        ]
+    )
+
+
+def test_parallel_results_match_serial_run(monkeypatch):
+    with xr.open_mfdataset("examples/hindcast_example/*.nc") as ds:
+        configs = _configs_for(ds)
+        monkeypatch.setattr(config_cache, "load_parameter_configs", lambda: configs)
+
+        validation_settings.apply_settings([validation_settings.RANDOM_SEED, "7"])
+        serial = variables_module.variables_validator(ds)
+        validation_settings.apply_settings(
+            [validation_settings.RANDOM_SEED, "7"], jobs=4
+        )
+        parallel = variables_module.variables_validator(ds)
+        validation_settings.apply_settings([])
+
+    assert serial == parallel
+    assert any("SST is not a valid key" in error for error in serial)
+    assert any("overmax" in error for error in serial)
+
+
+def test_variable_seed_is_stable_and_per_variable():
+    validation_settings.apply_settings([validation_settings.RANDOM_SEED, "7"])
+    first = validation_settings.get_variable_seed("WS")
+
+    assert first == validation_settings.get_variable_seed("WS")
+    assert first != validation_settings.get_variable_seed("WD")
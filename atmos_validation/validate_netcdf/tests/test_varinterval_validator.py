@@ -1,10 +1,21 @@
 import random
 
+import numpy as np
+import pytest
 import xarray as xr
 
+from .. import validation_settings
+from ..validators.variables.sample_planner import (
+    SampleBuffer,
+    _valid_points,  # type: ignore
+    plan_samples,
+    read_samples,
+    sampled_chunk_bytes,
+)
 from ..validators.variables.varinterval_validator import (
+    FullScanStats,
     _check_randomly_selected_intervals_min_max,  # type: ignore
-    _get_random_spatial_point,  # type: ignore
+    compute_full_scan_stats,
     none_larger_than_max_validator,
     none_less_than_min_validator,
 )
@@ -50,13 +61,118 @@ def test_under_min_interval():
         assert "undermin" in errors[0]
 
 
-def test_random_spatial_point_without_grid_point_mask():
+def test_valid_points_without_grid_point_mask():
     with xr.open_mfdataset("examples/hindcast_example/*.nc") as ds:
         assert "GRID_POINT_MASK" not in ds
 
-        sn_slice, we_slice = _get_random_spatial_point(ds, random.Random(0))
+        points = _valid_points(ds, random.Random(0))
+
+        assert len(set(points)) == ds.sizes["south_north"] * ds.sizes["west_east"]
+        for sn_index, we_index in points:
+            assert 0 <= sn_index < ds.sizes["south_north"]
+            assert 0 <= we_index < ds.sizes["west_east"]
+
+
+def test_windows_are_spread_over_the_time_axis():
+    validation_settings.apply_settings([validation_settings.IO_BUDGET, "30K"])
+    with xr.open_mfdataset("examples/hindcast_example/*.nc") as ds:
+        plan = plan_samples(ds, ds["P"], random.Random(0))
+        sample = read_samples(ds["P"], plan)
+        smallest, smallest_window = sample.smallest()
+        assert smallest == float(ds["P"][smallest_window].min())
+    validation_settings.apply_settings([])
+
+    # one time step of the grid is 300 bytes, so 100 steps in 4 windows
+    starts = [window[0].start for window in plan.windows]
+    assert len(starts) == 4
+    assert starts == sorted(starts)
+    assert starts[-1] > ds.sizes["Time"] // 2
+    assert sample.chunk_bytes <= 30 * 1024
+    assert sample.windows == plan.windows
+    assert sample.size == 100 * 3 * 5 * 5
+
+
+def test_full_scan_stats_single_pass():
+    with xr.open_mfdataset("examples/hindcast_example/*.nc") as ds:
+        ds["P"][10, 1, 2, 3] = -5
+        ds["P"][20, 0, 1, 1] = np.nan
+
+        stats = compute_full_scan_stats(ds, ["P", "SST"])
+
+        assert set(stats) == {"P", "SST"}
+        assert stats["P"].min == -5
+        assert stats["P"].max == float(ds["P"].max())
+        assert stats["P"].nan_count == 1
+        assert stats["SST"].nan_count == 0
+
 
-        assert 0 <= sn_slice.start < ds.sizes["south_north"]
-        assert sn_slice.stop == sn_slice.start + 1
-        assert 0 <= we_slice.start < ds.sizes["west_east"]
-        assert we_slice.stop == we_slice.start + 1
+def test_full_scan_stats_feed_min_max_validators():
+    with xr.open_mfdataset("examples/hindcast_example/*.nc") as ds:
+        test_config.min = 0
+        test_config.max = 1
+        test_config.number_of_significant_decimals = 2
+        stats = FullScanStats(min=-1.0, max=2.0, nan_count=0, size=ds["P"].size)
+
+        errors = none_less_than_min_validator(ds["P"], test_config, stats)
+        errors += none_larger_than_max_validator(ds["P"], test_config, stats)
+
+        assert len(errors) == 2
+        assert "Actual min: -1.0" in errors[0]
+        assert "Actual max: 2.0" in errors[1]
+
+
+def _chunked_dataset(tmp_path, lengths):
+    """Files of the given time lengths, stored in chunks of 10 timestamps"""
+    paths = []
+    for i, length in enumerate(lengths):
+        ds = xr.Dataset(
+            {"WS": (("Time", "south_north"), np.ones((length, 4), dtype="f4"))}
+        )
+        path = tmp_path / f"part_{i}.nc"
+        ds.to_netcdf(path, engine="h5netcdf", encoding={"WS": {"chunksizes": (10, 4)}})
+        paths.append(path)
+    return xr.open_mfdataset(
+        paths, engine="h5netcdf", combine="nested", concat_dim="Time"
+    )
+
+
+def test_windows_are_aligned_to_storage_chunks(tmp_path):
+    validation_settings.apply_settings([validation_settings.SAMPLE_SIZE, "15"])
+    # the second file starts a new chunk at 95, inside the fixed chunk grid
+    with _chunked_dataset(tmp_path, [95, 100]) as ds:
+        starts = set(range(0, 95, 10)) | set(range(95, 195, 10))
+        for seed in range(20):
+            plan = plan_samples(ds, ds["WS"], random.Random(seed))
+            for time_slice, _ in plan.windows:
+                assert time_slice.start in starts
+                assert time_slice.stop in starts | {195}
+
+                window = (time_slice, slice(None))
+                chunks = len(
+                    [s for s in starts if time_slice.start <= s < time_slice.stop]
+                )
+                assert sampled_chunk_bytes(ds["WS"], window) == chunks * 10 * 4 * 4
+    validation_settings.apply_settings([])
+
+
+def test_all_nan_window_does_not_hide_the_extremes():
+    windows = [(slice(0, 2),), (slice(2, 4),), (slice(4, 6),)]
+    sample = SampleBuffer(
+        windows=windows,
+        arrays=[
+            np.array([1.0, 2.0]),
+            np.array([np.nan, np.nan]),
+            np.array([-3.0, 4.0]),
+        ],
+    )
+
+    assert sample.smallest() == (-3.0, windows[2])
+    assert sample.largest() == (4.0, windows[2])
+    assert np.isnan(SampleBuffer(windows[1:2], [np.array([np.nan])]).smallest()[0])
+
+
+def test_plan_samples_rejects_unknown_dims():
+    ds = xr.Dataset({"WS": (("Time", "x"), np.ones((4, 2)))})
+
+    with pytest.raises(ValueError, match="Invalid dimension x"):
+        plan_samples(ds, ds["WS"], random.Random(0))
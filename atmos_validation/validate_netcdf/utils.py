@@ -1,14 +1,29 @@
 import os
+import tempfile
 import traceback
-from enum import Enum
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import pandas as pd
 import requests
-import xarray as xr
 
-from atmos_validation.validate_netcdf import validation_settings
+from atmos_validation.validate_netcdf import (
+    finding_sink,
+    profiling,
+    validation_settings,
+)
 
+from .finding_sink import Finding, Message, Severity
 from .validation_logger import log
 
 CONFIG_REQUEST_TIMEOUT_SECONDS = 10
@@ -19,26 +34,56 @@ class ConfigDownloadError(Exception):
     """Raised when a configuration endpoint cannot be downloaded safely."""
 
 
-def fetch_config_bytes(url: str) -> bytes:
-    """Download config JSON with a request timeout and a bounded response size."""
+@dataclass
+class ConfigResponse:
+    status_code: int
+    content: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+def fetch_config(url: str, headers: Optional[Dict[str, str]] = None) -> ConfigResponse:
+    """
+    Download config JSON with a request timeout and a bounded response size.
+    Pass conditional request headers (If-None-Match/If-Modified-Since) to
+    revalidate a cached copy; a 304 response is returned with empty content.
+    """
     with requests.get(
-        url, timeout=CONFIG_REQUEST_TIMEOUT_SECONDS, stream=True
+        url, headers=headers, timeout=CONFIG_REQUEST_TIMEOUT_SECONDS, stream=True
     ) as response:
         response.raise_for_status()
         content = b""
-        for chunk in response.iter_content(chunk_size=65536):
-            content += chunk
-            if len(content) > MAX_CONFIG_RESPONSE_BYTES:
-                raise ConfigDownloadError(
-                    f"Config response from {url} exceeded "
-                    f"{MAX_CONFIG_RESPONSE_BYTES} bytes"
-                )
-        return content
+        if response.status_code != 304:
+            for chunk in response.iter_content(chunk_size=65536):
+                content += chunk
+                if len(content) > MAX_CONFIG_RESPONSE_BYTES:
+                    raise ConfigDownloadError(
+                        f"Config response from {url} exceeded "
+                        f"{MAX_CONFIG_RESPONSE_BYTES} bytes"
+                    )
+        return ConfigResponse(
+            status_code=response.status_code,
+            content=content,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+
+
+def fetch_config_bytes(url: str) -> bytes:
+    """Download config JSON with a request timeout and a bounded response size."""
+    return fetch_config(url).content
 
 
-class Severity(str, Enum):
-    ERROR = "ERROR"
-    WARNING = "WARNING"
+def atomic_write(path: str, data: bytes) -> None:
+    """Write through a temporary file, so readers never see a partial file"""
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
 
 def get_file_paths_in_folder(folder_path: str, filetype: str = ".nc") -> List[str]:
@@ -53,7 +98,7 @@ def validation_node(
     severity: Severity,
     node_name: Optional[str] = None,
     postfix: Optional[Callable[[Tuple[Any, ...], Dict[str, Any]], str]] = None,
-) -> Callable[[Callable[..., List[str]]], Callable[..., List[str]]]:
+) -> Callable[[Callable[..., Iterable[Union[str, Message]]]], Callable[..., List[str]]]:
     """
     All validators should be wrapped in this. Enforces some common functionality,
     such as transforming an exception to a message so that all other validators may keep
@@ -65,18 +110,25 @@ def validation_node(
     Parameters
     ----------
     severity: a string token to signal the severity of the error output from this validation node.
+    Validators may return (or yield) Message objects, formatted only when the finding is rendered.
     node_name: names the node in the return. Pass a callable to use one of the named arguments
     postfix: a callable on the *args **kwargs of the wrapped function.
     The return is added as a postfix to the node name
     """
 
-    def outer(func: Callable[..., List[str]]) -> Callable[..., List[str]]:
+    def outer(
+        func: Callable[..., Iterable[Union[str, Message]]],
+    ) -> Callable[..., List[str]]:
         def validation_node_wrapper(*args: Any, **kwargs: Any) -> List[str]:
             if (
                 validation_settings.should_skip_warnings()
                 and severity == Severity.WARNING
             ):
                 return []
+            sink = finding_sink.get_sink()
+            if sink is not None and sink.exhausted:
+                sink.skip()
+                return []
 
             nonlocal node_name
             local_name = node_name
@@ -86,22 +138,36 @@ def validation_node(
                 )
             if local_name is None:
                 local_name = func.__name__[0:-10]
-            local_name = local_name + ":"
+            rule = local_name
             if postfix is not None:
-                local_name = local_name + postfix(args, kwargs) + ":"
-            try:
-                errors = func(*args, **kwargs)
-            except Exception as e:
-                traceback.print_exc()
-                message = f"Exception while executing validator {repr(e)}"
-                errors = [message]
-                log.error(
-                    "Exception while executing validator %s",
-                    local_name + message,
-                    exc_info=True,
-                )
-
-            return [inject_severity(local_name, error, severity) for error in errors]
+                local_name = local_name + ":" + postfix(args, kwargs)
+            with finding_sink.inside_node(local_name) as path:
+                try:
+                    with profiling.profile_node(local_name + ":"):
+                        errors = func(*args, **kwargs)
+                        if sink is not None:
+                            # Children emitted their own findings, so these are this node's own
+                            for error in errors:
+                                sink.emit(Finding(path, severity, rule, error))
+                            return []
+                        errors = list(errors)
+                except Exception as e:
+                    traceback.print_exc()
+                    message = f"Exception while executing validator {repr(e)}"
+                    errors = [message]
+                    log.error(
+                        "Exception while executing validator %s",
+                        local_name + ":" + message,
+                        exc_info=True,
+                    )
+                    if sink is not None:
+                        sink.emit(Finding(path, severity, rule, message))
+                        return []
+
+            return [
+                inject_severity(local_name + ":", str(error), severity)
+                for error in errors
+            ]
 
         validation_node_wrapper.__dict__["is_validation_node"] = True
         return validation_node_wrapper
@@ -158,17 +224,6 @@ def first_or_none(
     return None, None
 
 
-def is_measurement(ds: xr.Dataset):
-    try:
-        return ds.attrs["data_type"] == "Measurement"
-    except KeyError as e:
-        log.error(
-            "Did not find attribute 'data_type' on dataset."
-            "Please set 'data_type' to either 'Measurement' or 'Hindcast'"
-        )
-        raise e
-
-
 def convert_utc_timestamp_to_filename_format(utc_timestamp: int):
     return pd.to_datetime(
         utc_timestamp,
@@ -0,0 +1,134 @@
+"""
+Facts about the dataset under validation that many validators need, computed
+once per validation instead of once per validator or variable.
+
+root_validator builds the context and activates it in a ContextVar, the same
+way the validation settings are made available to all validators. Validators
+get it with context_for(ds); when a validator runs outside of root_validator,
+e.g. in a test, a context is built for its dataset on the fly. Facts that may
+fail, like downloading configs, are computed on first use, so the validator
+needing them reports the failure.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cached_property, lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple, Type, Union
+
+import numpy as np
+import xarray as xr
+
+from ..schemas import (
+    GRID_POINT_MASK,
+    SOUTH_NORTH,
+    WEST_EAST,
+    HindcastMetadata,
+    MeasurementMetadata,
+    ParameterConfig,
+    get_acceptable_dims_from_parameter_key,
+)
+from . import config_cache
+from .validation_logger import log
+
+MetadataModel = Union[Type[HindcastMetadata], Type[MeasurementMetadata]]
+
+
+class ValidationContext:
+    def __init__(self, ds: xr.Dataset) -> None:
+        self.ds = ds
+        self.sizes: Dict[str, int] = {str(dim): size for dim, size in ds.sizes.items()}
+        self.data_type: Optional[str] = ds.attrs.get("data_type")
+        self._acceptable_dims: Dict[str, List[List[str]]] = {}
+
+    @property
+    def is_measurement(self) -> bool:
+        if self.data_type is None:
+            log.error(
+                "Did not find attribute 'data_type' on dataset."
+                "Please set 'data_type' to either 'Measurement' or 'Hindcast'"
+            )
+            raise KeyError("data_type")
+        return self.data_type == "Measurement"
+
+    @property
+    def metadata_model(self) -> MetadataModel:
+        return MeasurementMetadata if self.is_measurement else HindcastMetadata
+
+    @property
+    def blacklisted_attributes(self) -> Tuple[str, ...]:
+        """Attributes required only on the other data type"""
+        other = HindcastMetadata if self.is_measurement else MeasurementMetadata
+        required = set(required_attributes(self.metadata_model))
+        return tuple(
+            attribute
+            for attribute in required_attributes(other)
+            if attribute not in required
+        )
+
+    @cached_property
+    def valid_points(self) -> np.ndarray:
+        """
+        Flat indices into the (south_north, west_east) grid of the points where
+        GRID_POINT_MASK == 1, all points if there is no mask
+        """
+        if SOUTH_NORTH not in self.sizes or WEST_EAST not in self.sizes:
+            return np.zeros(1, dtype=np.int64)
+        if GRID_POINT_MASK in self.ds:
+            return np.flatnonzero(self.ds[GRID_POINT_MASK].values == 1)
+        return np.arange(self.sizes[SOUTH_NORTH] * self.sizes[WEST_EAST])
+
+    def grid_point(self, flat_index: int) -> Tuple[int, int]:
+        """(south_north, west_east) index of a flat index of valid_points"""
+        if WEST_EAST not in self.sizes:
+            return 0, 0
+        south_north, west_east = divmod(int(flat_index), self.sizes[WEST_EAST])
+        return south_north, west_east
+
+    def acceptable_dims(self, key: str) -> List[List[str]]:
+        if key not in self._acceptable_dims:
+            self._acceptable_dims[key] = get_acceptable_dims_from_parameter_key(key)
+        return self._acceptable_dims[key]
+
+    @cached_property
+    def parameter_configs(self) -> Dict[str, ParameterConfig]:
+        log.debug("load parameters config")
+        return config_cache.load_parameter_configs().param_dict
+
+    @cached_property
+    def installation_types(self) -> List[str]:
+        log.debug("load installation types")
+        return config_cache.load_installation_types()
+
+    @cached_property
+    def data_usability_levels(self) -> List[str]:
+        log.debug("load data usabilities")
+        return config_cache.load_data_usability_levels()
+
+
+@lru_cache(maxsize=None)
+def required_attributes(model: MetadataModel) -> Tuple[str, ...]:
+    """Required fields of a metadata model, from its JSON schema"""
+    return tuple(model.model_json_schema()["required"])
+
+
+_context: ContextVar[Optional[ValidationContext]] = ContextVar(
+    "validation_context", default=None
+)
+
+
+@contextmanager
+def activate(context: ValidationContext) -> Iterator[ValidationContext]:
+    """Share context with all validators run inside"""
+    token = _context.set(context)
+    try:
+        yield context
+    finally:
+        _context.reset(token)
+
+
+def context_for(ds: xr.Dataset) -> ValidationContext:
+    """The active context if it belongs to ds, otherwise a new one"""
+    context = _context.get()
+    if context is not None and context.ds is ds:
+        return context
+    return ValidationContext(ds)
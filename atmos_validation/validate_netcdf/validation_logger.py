@@ -42,11 +42,11 @@ _default_logger = setup_logger()
 class LogWrapper:
     def __init__(self):
         self._log: Optional[logging.Logger] = None
-        self.debug: Callable[..., None] = lambda _: None  # type:ignore
-        self.info: Callable[..., None] = lambda _: None  # type:ignore
-        self.warning: Callable[..., None] = lambda _: None  # type:ignore
-        self.error: Callable[..., None] = lambda _: None  # type:ignore
-        self.exception: Callable[..., None] = lambda _: None  # type:ignore
+        self.debug: Callable[..., None] = lambda *_, **__: None  # type:ignore
+        self.info: Callable[..., None] = lambda *_, **__: None  # type:ignore
+        self.warning: Callable[..., None] = lambda *_, **__: None  # type:ignore
+        self.error: Callable[..., None] = lambda *_, **__: None  # type:ignore
+        self.exception: Callable[..., None] = lambda *_, **__: None  # type:ignore
 
     def create_or_update_logger(self, injected_logger: Optional[logging.Logger] = None):
         if self._log is not None and self._log is _default_logger:
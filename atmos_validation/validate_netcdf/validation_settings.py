@@ -4,11 +4,14 @@ If this ever becomes an issue, an easy refactor would be to make the settings a
 The other option would be to pass the settings down the entire tree of validators.
 """
 
+import hashlib
+import os
 import random
 import sys
 from contextvars import ContextVar
-from typing import FrozenSet, List
+from typing import FrozenSet, List, Optional
 
+from ..cli_options import parse_option_value
 from .validation_logger import log
 
 CHECK_MIN_MAX_FULL: str = "--check-min-max-full"
@@ -17,9 +20,37 @@ SKIP_WARNINGS: str = "--skip-warnings"
 RANDOM_SEED: str = "--random-seed"
 SAMPLE_SIZE: str = "--sample-size"
 DEFAULT_SAMPLE_SIZE: int = 5000
+SIG_DIG_SAMPLES: str = "--sig-dig-samples"
+DEFAULT_SIG_DIG_SAMPLES: int = 10000
+SIG_DIG_TOLERANCE: str = "--sig-dig-tolerance"
+DEFAULT_SIG_DIG_TOLERANCE: float = 0.0
+IO_BUDGET: str = "--io-budget"
+TIME_BUDGET: str = "--time-budget"
+_BYTE_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+JOBS: str = "--jobs"
+DEFAULT_JOBS: int = 1
 URL_TO_PARAMETERS: str = "https://atmos.app.radix.equinor.com/config/parameters"
 URL_TO_INST_TYPES: str = "https://atmos.app.radix.equinor.com/config/installation-types"
 URL_TO_DATA_USABILITY: str = "https://atmos.app.radix.equinor.com/config/data-usability"
+URL_TO_INSTRUMENT_TYPES: str = (
+    "https://atmos.app.radix.equinor.com/config/instrument-types"
+)
+CONFIG_CACHE_DIR: str = "--config-cache-dir"
+DEFAULT_CONFIG_CACHE_DIR: str = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "atmos-validation",
+)
+CONFIG_TTL: str = "--config-ttl"
+DEFAULT_CONFIG_TTL_SECONDS: int = 3600
+OFFLINE: str = "--offline"
+FAIL_FAST: str = "--fail-fast"
+MAX_ERRORS: str = "--max-errors"
+MAX_EXAMPLES: str = "--max-examples"
+DEFAULT_MAX_EXAMPLES: int = 100
+INCREMENTAL: str = "--incremental"
+SUMMARY_FILE_NAME: str = ".atmos-validation-summary.json"
+PROFILE: str = "--profile"
+PROFILE_TOP_N: int = 20
 
 # Per-call, thread/async-isolated so options never leak between validate() calls.
 _active_settings: ContextVar[FrozenSet[str]] = ContextVar(
@@ -27,48 +58,142 @@ _active_settings: ContextVar[FrozenSet[str]] = ContextVar(
 )
 _random_seed: ContextVar[int] = ContextVar("random_seed")
 _sample_size: ContextVar[int] = ContextVar("sample_size", default=DEFAULT_SAMPLE_SIZE)
+_sig_dig_samples: ContextVar[int] = ContextVar(
+    "sig_dig_samples", default=DEFAULT_SIG_DIG_SAMPLES
+)
+_sig_dig_tolerance: ContextVar[float] = ContextVar(
+    "sig_dig_tolerance", default=DEFAULT_SIG_DIG_TOLERANCE
+)
+_io_budget: ContextVar[Optional[int]] = ContextVar("io_budget", default=None)
+_time_budget: ContextVar[Optional[float]] = ContextVar("time_budget", default=None)
+_jobs: ContextVar[int] = ContextVar("jobs", default=DEFAULT_JOBS)
+_config_cache_dir: ContextVar[str] = ContextVar(
+    "config_cache_dir", default=DEFAULT_CONFIG_CACHE_DIR
+)
+_config_ttl: ContextVar[int] = ContextVar(
+    "config_ttl", default=DEFAULT_CONFIG_TTL_SECONDS
+)
+_profile_path: ContextVar[Optional[str]] = ContextVar("profile_path", default=None)
+_max_errors: ContextVar[Optional[int]] = ContextVar("max_errors", default=None)
+_max_examples: ContextVar[int] = ContextVar(
+    "max_examples", default=DEFAULT_MAX_EXAMPLES
+)
 
 
-def apply_settings(optional_args: List[str]) -> None:
+def apply_settings(
+    optional_args: List[str],
+    jobs: Optional[int] = None,
+    profile: Optional[str] = None,
+    max_errors: Optional[int] = None,
+) -> None:
+    """
+    Activate the options given as CLI style args. Keyword arguments mirror the
+    library arguments of validate() and take precedence over optional_args.
+    """
     _active_settings.set(frozenset(optional_args))
     _random_seed.set(_parse_random_seed(optional_args))
     _sample_size.set(_parse_sample_size(optional_args))
+    _sig_dig_samples.set(_parse_sig_dig_samples(optional_args))
+    _sig_dig_tolerance.set(_parse_sig_dig_tolerance(optional_args))
+    if not 0 <= _sig_dig_tolerance.get() < 1:
+        raise ValueError(f"{SIG_DIG_TOLERANCE} must be at least 0 and less than 1")
+    _io_budget.set(_parse_io_budget(optional_args))
+    time_budget = parse_option_value(optional_args, TIME_BUDGET)
+    _time_budget.set(None if time_budget is None else float(time_budget))
+    _jobs.set(jobs if jobs is not None else _parse_jobs(optional_args))
+    if _jobs.get() < 1:
+        raise ValueError(f"{JOBS} must be at least 1")
+    _config_cache_dir.set(
+        parse_option_value(optional_args, CONFIG_CACHE_DIR) or DEFAULT_CONFIG_CACHE_DIR
+    )
+    _config_ttl.set(_parse_config_ttl(optional_args))
+    _profile_path.set(profile or parse_option_value(optional_args, PROFILE))
+    _max_errors.set(
+        max_errors if max_errors is not None else _parse_max_errors(optional_args)
+    )
+    _max_examples.set(_parse_max_examples(optional_args))
+    if _max_examples.get() < 1:
+        raise ValueError(f"{MAX_EXAMPLES} must be at least 1")
 
 
 def _parse_random_seed(optional_args: List[str]) -> int:
-    for i, arg in enumerate(optional_args):
-        if arg == RANDOM_SEED:
-            if i + 1 >= len(optional_args):
-                raise ValueError(f"{RANDOM_SEED} requires an integer value")
-            return int(optional_args[i + 1])
-        if arg.startswith(f"{RANDOM_SEED}="):
-            seed = arg.split("=", 1)[1]
-            log.info("using random seed: %s", seed)
-            return int(seed)
-    seed = random.randrange(sys.maxsize)  # default random seed if not specified
+    seed = parse_option_value(optional_args, RANDOM_SEED)
+    if seed is None:
+        seed = random.randrange(sys.maxsize)  # default random seed if not specified
     log.info("using random seed: %s", seed)
-    return seed
+    return int(seed)
 
 
 def get_random_seed() -> int:
     return _random_seed.get()
 
 
+def get_variable_seed(key: str) -> int:
+    """
+    Seed for the sampled checks of a single variable, derived from the run seed.
+    Gives every variable its own stream of random numbers, independent of the
+    order (or the worker) in which variables are validated.
+    """
+    digest = hashlib.sha256(f"{get_random_seed()}:{key}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
 def _parse_sample_size(optional_args: List[str]) -> int:
-    for i, arg in enumerate(optional_args):
-        if arg == SAMPLE_SIZE:
-            if i + 1 >= len(optional_args):
-                raise ValueError(f"{SAMPLE_SIZE} requires an integer value")
-            return int(optional_args[i + 1])
-        if arg.startswith(f"{SAMPLE_SIZE}="):
-            return int(arg.split("=", 1)[1])
-    return DEFAULT_SAMPLE_SIZE
+    sample_size = parse_option_value(optional_args, SAMPLE_SIZE)
+    return DEFAULT_SAMPLE_SIZE if sample_size is None else int(sample_size)
 
 
 def get_sample_size() -> int:
     return _sample_size.get()
 
 
+def _parse_sig_dig_samples(optional_args: List[str]) -> int:
+    samples = parse_option_value(optional_args, SIG_DIG_SAMPLES)
+    return DEFAULT_SIG_DIG_SAMPLES if samples is None else int(samples)
+
+
+def get_sig_dig_samples() -> int:
+    return _sig_dig_samples.get()
+
+
+def _parse_sig_dig_tolerance(optional_args: List[str]) -> float:
+    tolerance = parse_option_value(optional_args, SIG_DIG_TOLERANCE)
+    return DEFAULT_SIG_DIG_TOLERANCE if tolerance is None else float(tolerance)
+
+
+def get_sig_dig_tolerance() -> float:
+    """Fraction of the sampled values that may have too few decimals"""
+    return _sig_dig_tolerance.get()
+
+
+def _parse_io_budget(optional_args: List[str]) -> Optional[int]:
+    """Bytes, optionally with a K, M, G or T suffix, e.g. 512M"""
+    budget = parse_option_value(optional_args, IO_BUDGET)
+    if budget is None:
+        return None
+    budget = budget.strip().upper().rstrip("B")
+    if budget and budget[-1] in _BYTE_UNITS:
+        return int(float(budget[:-1]) * _BYTE_UNITS[budget[-1]])
+    return int(budget)
+
+
+def get_io_budget() -> Optional[int]:
+    return _io_budget.get()
+
+
+def get_time_budget() -> Optional[float]:
+    return _time_budget.get()
+
+
+def _parse_jobs(optional_args: List[str]) -> int:
+    jobs = parse_option_value(optional_args, JOBS)
+    return DEFAULT_JOBS if jobs is None else int(jobs)
+
+
+def get_jobs() -> int:
+    return _jobs.get()
+
+
 def should_skip_min_max_check() -> bool:
     return SKIP_MIN_MAX_CHECK in _active_settings.get()
 
@@ -79,3 +204,48 @@ def should_check_min_max_full() -> bool:
 
 def should_skip_warnings() -> bool:
     return SKIP_WARNINGS in _active_settings.get()
+
+
+def get_config_cache_dir() -> str:
+    return _config_cache_dir.get()
+
+
+def _parse_config_ttl(optional_args: List[str]) -> int:
+    ttl = parse_option_value(optional_args, CONFIG_TTL)
+    return DEFAULT_CONFIG_TTL_SECONDS if ttl is None else int(ttl)
+
+
+def get_config_ttl() -> int:
+    return _config_ttl.get()
+
+
+def is_offline() -> bool:
+    return OFFLINE in _active_settings.get()
+
+
+def is_incremental() -> bool:
+    return INCREMENTAL in _active_settings.get()
+
+
+def _parse_max_errors(optional_args: List[str]) -> Optional[int]:
+    max_errors = parse_option_value(optional_args, MAX_ERRORS)
+    if max_errors is not None:
+        return int(max_errors)
+    return 1 if FAIL_FAST in optional_args else None
+
+
+def get_max_errors() -> Optional[int]:
+    return _max_errors.get()
+
+
+def _parse_max_examples(optional_args: List[str]) -> int:
+    max_examples = parse_option_value(optional_args, MAX_EXAMPLES)
+    return DEFAULT_MAX_EXAMPLES if max_examples is None else int(max_examples)
+
+
+def get_max_examples() -> int:
+    return _max_examples.get()
+
+
+def get_profile_path() -> Optional[str]:
+    return _profile_path.get()
@@ -2,6 +2,7 @@ from typing import List
 
 import xarray as xr
 
+from ...file_manifest import FileManifest
 from ...utils import Severity, validation_node
 from .dimvars_validator import dimvars_validator
 from .spatial_validators import (
@@ -14,9 +15,9 @@ from .time_validator import time_validator
 
 
 @validation_node(severity=Severity.ERROR)
-def dims_validator(ds: xr.Dataset, paths: List[str]) -> List[str]:
+def dims_validator(ds: xr.Dataset, manifests: List[FileManifest]) -> List[str]:
     return (
-        time_validator(ds, paths)
+        time_validator(ds, manifests)
         + dimvars_validator(ds)
         + south_north_validator(ds)
         + west_east_validator(ds)
@@ -2,8 +2,8 @@ from typing import List, Set
 
 import xarray as xr
 
-from ....schemas import get_acceptable_dims_from_parameter_key
 from ...utils import Severity, validation_node
+from ...validation_context import context_for
 
 
 @validation_node(severity=Severity.ERROR)
@@ -17,11 +17,12 @@ def dimvars_validator(
     Incidentally, this also verifies that height/depth dimensions are
     correctly attached
     """
-    alldims = {str(key) for key in ds.sizes.keys()}
+    context = context_for(ds)
+    alldims = set(context.sizes)
     result = []
     for var in ds.keys():
         var = str(var)
-        accept = get_acceptable_dims_from_parameter_key(var)
+        accept = context.acceptable_dims(var)
         actual = list(ds[var].dims)
         alldims -= set(actual).intersection(alldims)
 
@@ -1,62 +1,62 @@
 import re
-from typing import List, cast
+from typing import Any, List
 
 import numpy as np
 import numpy.typing as npt
 import xarray as xr
-from h5py import Dataset, File
 
 from ....schemas import TIME
+from ...file_manifest import FileManifest
 from ...utils import Severity, convert_utc_timestamp_to_filename_format, validation_node
 
 
 @validation_node(severity=Severity.ERROR)
-def time_validator(ds: xr.Dataset, paths: List[str]) -> List[str]:
+def time_validator(ds: xr.Dataset, manifests: List[FileManifest]) -> List[str]:
     result: List[str] = []
     time = ds.variables[TIME].data
     if not np.all(time[:-1] <= time[1:]):  # type: ignore
         result += ["Some timestamps in the dataset are not in sorted order"]
 
-    result += filename_validator(paths)
+    result += filename_validator(manifests)
     result += unique_validator(time)
     result += cf_standard_time_validator(ds)
     return result
 
 
 @validation_node(severity=Severity.ERROR)
-def filename_validator(paths: List[str]) -> List[str]:
+def filename_validator(manifests: List[FileManifest]) -> List[str]:
     """Validates that filenames are named such that they can be sorted
     in a chronological order according to time axis, that all files
     contains entries in the time dimension and that the unit is matching
     the standard format
 
     Args:
-        paths: list of str paths to the netcdf files to be validated
+        manifests: manifests of the netcdf files to be validated
 
     Returns:
         list of error/warning messages to be printed as validation output
     """
     result = []
     start_times = []
-    for path in sorted(paths):
-        with File(path) as file:
-            time_ds = cast(Dataset, file[TIME])
-            time: npt.NDArray[np.int64] = time_ds[:]
-            start_times.append(time[0])
-            result += has_entries_validator(path, time)
-            result += time_units_validator(path, time_ds)
-    if not np.all(start_times[:-1] <= start_times[1:]):
+    manifests = sorted(manifests, key=lambda manifest: manifest.path)
+    for manifest in manifests:
+        length = manifest.require_time()
+        if manifest.time_start is not None:
+            start_times.append(manifest.time_start)
+        result += has_entries_validator(manifest.path, length)
+        result += time_units_validator(manifest.path, manifest.time_units)
+    if not np.all(np.array(start_times[:-1]) <= np.array(start_times[1:])):
         result = [
             "Filenames are not sortable such that time axis appears in increasing order"
         ]
-    if len(paths) > 1:
-        result += filename_convention_validator(paths)
-        result += filename_includes_time_axis_validator(paths)
+    if len(manifests) > 1:
+        result += filename_convention_validator(manifests)
+        result += filename_includes_time_axis_validator(manifests)
     return result
 
 
 @validation_node(severity=Severity.WARNING)
-def filename_convention_validator(paths: List[str]) -> List[str]:
+def filename_convention_validator(manifests: List[FileManifest]) -> List[str]:
     """Validates that files are named with a timestamp to provide
     readability and overview in the data lake. Only writes general
     warning for the whole directory, which is by design to not
@@ -64,15 +64,15 @@ def filename_convention_validator(paths: List[str]) -> List[str]:
     500 files all non-passing)
 
     Args:
-        path: path that should include timestamps to be validated against dataset
+        manifests: manifests of the files whose paths should include timestamps
 
     Returns:
         list of error/warning messages to be printed as validation output
     """
     result = []
     convention_checks = []
-    for path in sorted(paths):
-        check = convention_check(path)
+    for manifest in sorted(manifests, key=lambda manifest: manifest.path):
+        check = convention_check(manifest)
         convention_checks.append(check)
     if not np.all(convention_checks):
         result += [
@@ -83,30 +83,32 @@ def filename_convention_validator(paths: List[str]) -> List[str]:
     return result
 
 
-def convention_check(path: str) -> bool:
+def convention_check(manifest: FileManifest) -> bool:
     """Validates that file is named with a timestamp to provide
     readability and overview in the data lake.
 
     Args:
-        path: path that should include timestamps to be validated against dataset
-        time_ds: dataset holding the actual timestamps
+        manifest: manifest of the file, holding the path that should include
+        timestamps and the actual first and last timestamps
 
     Returns:
         A boolean indicator showing if validation passed or not
     """
+    if manifest.time_start is None or manifest.time_end is None:
+        return False
     try:
-        with File(path) as file:
-            time_ds = cast(Dataset, file[TIME])
-            expected_start, expected_end = re.findall(r"\d{8}", path.replace(".nc", ""))
-            start = convert_utc_timestamp_to_filename_format(time_ds[0])
-            end = convert_utc_timestamp_to_filename_format(time_ds[-1])
-            return expected_start == start and expected_end == end
+        expected_start, expected_end = re.findall(
+            r"\d{8}", manifest.path.replace(".nc", "")
+        )
+        start = convert_utc_timestamp_to_filename_format(manifest.time_start)
+        end = convert_utc_timestamp_to_filename_format(manifest.time_end)
+        return expected_start == start and expected_end == end
     except Exception:
         return False
 
 
 @validation_node(severity=Severity.ERROR)
-def filename_includes_time_axis_validator(paths: List[str]) -> List[str]:
+def filename_includes_time_axis_validator(manifests: List[FileManifest]) -> List[str]:
     """Validates that files are named with a the length of the time
     axis (for ingestion arguments generation). Only writes general
     error for the whole directory, which is by design to not
@@ -114,18 +116,18 @@ def filename_includes_time_axis_validator(paths: List[str]) -> List[str]:
     500 files all non-passing)
 
     Args:
-        path: path that should include "T<len(time)> to be validated against dataset
+        manifests: manifests of the files whose paths should include "T<len(time)>"
 
     Returns:
         list of error/warning messages to be printed as validation output
     """
     result = []
     failed_checks = []
-    for path in sorted(paths):
+    for manifest in sorted(manifests, key=lambda manifest: manifest.path):
+        path = manifest.path
         try:
-            ds = xr.open_dataset(path, engine="h5netcdf")
             length = int(path.removesuffix(".nc").split("_T")[-1])
-            if length != len(ds.Time):
+            if length != manifest.require_time():
                 failed_checks.append(path)
         except Exception:
             failed_checks.append(path)
@@ -139,10 +141,9 @@ def filename_includes_time_axis_validator(paths: List[str]) -> List[str]:
 
 
 @validation_node(severity=Severity.ERROR)
-def time_units_validator(path: str, time_ds: Dataset) -> List[str]:
+def time_units_validator(path: str, actual: Any) -> List[str]:
     expected = b"microseconds since 1900-01-01"
     alt_expected = "microseconds since 1900-01-01"
-    actual = time_ds.attrs["units"]
     if actual not in (expected, alt_expected):  # type: ignore
         return [
             f"time units attribute should be {expected}, found {actual} in file {path}"
@@ -151,9 +152,9 @@ def time_units_validator(path: str, time_ds: Dataset) -> List[str]:
 
 
 @validation_node(severity=Severity.ERROR)
-def has_entries_validator(path: str, times: npt.NDArray[np.int64]):
+def has_entries_validator(path: str, time_length: int):
     "Checks that the time array is not empty"
-    if len(times) == 0:
+    if time_length == 0:
         return [f"File with path {path} has no entries in time dimension"]
     return []
 
@@ -2,21 +2,13 @@ from typing import Any, Dict, List
 
 import numpy as np
 import xarray as xr
-from pydantic import TypeAdapter, ValidationError
-
-from ...schemas import (
-    ClassificationLevel,
-    HindcastMetadata,
-    InstallationType,
-    InstallationTypes,
-    MeasurementMetadata,
-)
-from ...schemas.data_usability_level import DataUsabilityLevel
-from ...schemas.data_usability_levels import DataUsabilityLevels
+from pydantic import ValidationError
+
+from ...schemas import ClassificationLevel
 from ...schemas.metadata import DataType
-from ..utils import Severity, fetch_config_bytes, is_measurement, validation_node
+from ..utils import Severity, validation_node
+from ..validation_context import context_for
 from ..validation_logger import log
-from ..validation_settings import URL_TO_DATA_USABILITY, URL_TO_INST_TYPES
 
 VALID_FINAL_REPORT_EXTENSIONS = ["docx", "pdf", "ppt", "pptx"]
 
@@ -52,7 +44,7 @@ def file_attributes_validator(ds: xr.Dataset):
 def metadata_schema_validator(ds: xr.Dataset) -> List[str]:
     """Validates global attributes against the pydantic metadata schema,
     enforcing presence and field types."""
-    model = MeasurementMetadata if is_measurement(ds) else HindcastMetadata
+    model = context_for(ds).metadata_model
     attrs = _normalize_attrs(ds.attrs)
 
     result: List[str] = []
@@ -100,25 +92,10 @@ def blacklisted_global_attributes_validator(ds: xr.Dataset):
     and vice versa.
     """
     data_type = ds.attrs["data_type"]
-    if is_measurement(ds):
-        blacklisted_attributes = HindcastMetadata.model_json_schema()["required"]
-        required_attributes = MeasurementMetadata.model_json_schema()["required"]
-    else:
-        blacklisted_attributes = MeasurementMetadata.model_json_schema()["required"]
-        required_attributes = HindcastMetadata.model_json_schema()["required"]
-
     result = []
-    for attribute in blacklisted_attributes:
-        if attribute not in required_attributes:
-            try:
-                ds.attrs[attribute]
-                result += [
-                    f"""Attribute "{attribute}" should not exist on a {data_type}"""
-                ]
-            except KeyError:
-                # A KeyError is what we want in this check
-                continue
-
+    for attribute in context_for(ds).blacklisted_attributes:
+        if attribute in ds.attrs:
+            result += [f"""Attribute "{attribute}" should not exist on a {data_type}"""]
     return result
 
 
@@ -172,7 +149,7 @@ def installation_type_validator(ds: xr.Dataset) -> List[str]:
     """Checks that "installation_type" is compliant with the configuration file"""
     result = []
     try:
-        valids = _load_valid_installation_types()
+        valids = context_for(ds).installation_types
         installation_type = ds.attrs["installation_type"]
         if installation_type not in valids:
             result += [
@@ -191,7 +168,7 @@ def data_usability_validator(ds: xr.Dataset) -> List[str]:
     """Checks that "data_usability" is complient with the configuration file"""
     result = []
     try:
-        valids = _load_valid_data_usability_levels()
+        valids = context_for(ds).data_usability_levels
         data_usability_levels: str = ds.attrs["data_usability"]
 
         # split the string and test each one
@@ -209,15 +186,6 @@ def data_usability_validator(ds: xr.Dataset) -> List[str]:
     return result
 
 
-def _load_valid_installation_types() -> List[str]:
-    log.debug("download installation types")
-    data = fetch_config_bytes(URL_TO_INST_TYPES)
-    parsed_response = InstallationTypes(
-        configs=TypeAdapter(List[InstallationType]).validate_json(data)
-    ).configs
-    return [entry.installation_type for entry in parsed_response]
-
-
 @validation_node(severity=Severity.ERROR)
 def classification_level_validator(ds: xr.Dataset) -> List[str]:
     """Checks that "classification_level" is compliant with the enum values"""
@@ -235,12 +203,3 @@ def classification_level_validator(ds: xr.Dataset) -> List[str]:
     except Exception:
         result += ["Could not validate classification_level on global attributes"]
     return result
-
-
-def _load_valid_data_usability_levels() -> List[str]:
-    log.debug("download data usabilities")
-    data = fetch_config_bytes(URL_TO_DATA_USABILITY)
-    parsed_response = DataUsabilityLevels(
-        configs=TypeAdapter(List[DataUsabilityLevel]).validate_json(data)
-    ).configs
-    return [entry.level for entry in parsed_response]
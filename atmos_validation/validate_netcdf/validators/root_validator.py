@@ -1,8 +1,9 @@
-from typing import List
+from typing import Dict, List, Optional
 
 import xarray as xr
 
-from ..utils import Severity
+from .. import finding_sink, validation_context
+from ..file_manifest import FileManifest
 from ..validation_logger import log
 from .dims.dims_validator import dims_validator
 from .file_attributes import file_attributes_validator
@@ -10,21 +11,51 @@ from .variables.variables_validator import variables_validator
 
 
 class ValidationResult:
-    def __init__(self, warnings: List[str], errors: List[str]) -> None:
+    def __init__(
+        self,
+        warnings: List[str],
+        errors: List[str],
+        counts: Optional[Dict[str, int]] = None,
+        error_count: Optional[int] = None,
+        stopped_early: bool = False,
+    ) -> None:
+        """
+        Args:
+            warnings, errors: the findings listed, see --max-examples
+            counts: number of findings per validator, including those not listed
+            error_count: number of errors, including those not listed
+            stopped_early: whether validators were skipped, see --max-errors
+        """
         self.warnings = warnings
         self.errors = errors
-
-
-def root_validator(ds: xr.Dataset, paths: List[str]) -> ValidationResult:
+        self.counts = counts or {}
+        self.error_count = len(errors) if error_count is None else error_count
+        self.stopped_early = stopped_early
+
+
+def root_validator(ds: xr.Dataset, manifests: List[FileManifest]) -> ValidationResult:
+    """
+    Run all validators, cheap metadata checks first so that a validation stopping
+    early (see finding_sink) skips the data reads. Findings are forwarded to the
+    active sink, if any, as they are produced. The validators share one
+    ValidationContext of the dataset.
+    """
     log.debug("Launch root validator")
 
-    results = (
-        []
-        + dims_validator(ds, paths)
-        + variables_validator(ds)
-        + file_attributes_validator(ds)
+    context = validation_context.ValidationContext(ds)
+    with (
+        finding_sink.collect(
+            finding_sink.FindingSink(parent=finding_sink.get_sink())
+        ) as sink,
+        validation_context.activate(context),
+    ):
+        dims_validator(ds, manifests)
+        file_attributes_validator(ds)
+        variables_validator(ds)
+
+    return ValidationResult(
+        warnings=sink.warnings,
+        errors=sink.errors,
+        counts=sink.counts,
+        error_count=sink.error_count,
     )
-    warnings = [output for output in results if Severity.WARNING in output]
-    errors = [output for output in results if Severity.WARNING not in output]
-
-    return ValidationResult(warnings=warnings, errors=errors)
@@ -0,0 +1,383 @@
+"""
+Planning and reading of the value sample of a variable.
+
+The sample is read once per variable, into a SampleBuffer that is shared by all
+value-level checks (the sampled min/max check and the significant decimals).
+
+Instead of one contiguous window of --sample-size timestamps, the sample is
+spread over many windows: the time axis is split in equal strata with a window
+at a random position in each, and the windows rotate over the valid
+(GRID_POINT_MASK) grid points. Windows are aligned to the storage chunks and
+cover the spatial extent that is decompressed anyway: the storage chunk holding
+the point, or the whole grid for contiguous storage, where a time step of the
+grid is one contiguous read. Contiguous 5-D spectral variables are read at the
+point only.
+
+The number of windows is sized to a byte budget per variable: --io-budget, or
+--time-budget times the read throughput measured so far, and by default the
+size of the single window that was read before. With --time-budget the windows
+are read in batches sized to the measured throughput, until the time budget of
+the variable is used. When the min/max check does not sample, e.g. with
+--skip-random-min-max-check, SMALL_SAMPLE_BUDGET bytes are read for the other
+checks.
+"""
+
+import bisect
+import math
+import random
+import threading
+import time
+import warnings
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import xarray as xr
+from dask.base import compute
+
+from ....schemas import (
+    FREQUENCY,
+    GRID_POINT_MASK,
+    SOUTH_NORTH,
+    TIME,
+    WEST_EAST,
+    get_acceptable_dims_from_parameter_key,
+)
+from ... import profiling, validation_settings
+from ...validation_context import context_for
+from ...validation_logger import log
+
+MAX_WINDOWS = 100
+# Shortest window for contiguous storage, where the cost per step does not
+# depend on the window length
+MIN_WINDOW_STEPS = 24
+SMALL_SAMPLE_BUDGET = 1024**2
+
+Window = Tuple[slice, ...]
+
+
+@dataclass(frozen=True)
+class SamplePlan:
+    windows: List[Window]
+    budget: int  # bytes the plan was sized to
+
+
+@dataclass
+class SampleBuffer:
+    """The values of the windows read, with the storage chunk bytes they cost"""
+
+    windows: List[Window] = field(default_factory=list)
+    arrays: List[np.ndarray] = field(default_factory=list)
+    chunk_bytes: int = 0
+
+    @property
+    def size(self) -> int:
+        return sum(array.size for array in self.arrays)
+
+    def smallest(self) -> Tuple[float, Window]:
+        """Smallest value, ignoring NaN, and the window holding it"""
+        return min(
+            ((_extreme(np.nanmin, array), window) for window, array in self._read()),
+            key=lambda item: (math.isnan(item[0]), item[0]),
+            default=(math.nan, ()),
+        )
+
+    def largest(self) -> Tuple[float, Window]:
+        """Largest value, ignoring NaN, and the window holding it"""
+        return max(
+            ((_extreme(np.nanmax, array), window) for window, array in self._read()),
+            key=lambda item: (not math.isnan(item[0]), item[0]),
+            default=(math.nan, ()),
+        )
+
+    def random_values(self, rand: random.Random, count: int) -> np.ndarray:
+        """
+        count values drawn at random, with replacement, from all windows, or
+        all values if the buffer holds no more than count values
+        """
+        if not self.arrays:
+            return np.empty(0)
+        if count >= self.size:
+            return np.concatenate([array.ravel() for array in self.arrays])
+        offsets = np.cumsum([0] + [array.size for array in self.arrays])
+        generator = np.random.default_rng(rand.getrandbits(64))
+        indices = np.sort(generator.integers(0, offsets[-1], size=count))
+        bounds = np.searchsorted(indices, offsets)
+        return np.concatenate(
+            [
+                array.ravel()[indices[start:stop] - offset]
+                for array, offset, start, stop in zip(
+                    self.arrays, offsets, bounds[:-1], bounds[1:]
+                )
+            ]
+        )
+
+    def _read(self) -> Iterator[Tuple[Window, np.ndarray]]:
+        return zip(self.windows, self.arrays)
+
+
+class VariableSample:
+    """
+    The sampling stage of a variable. The buffer is read when a check first
+    needs it, inside that check's validation node, so a failing read is
+    reported by the check.
+    """
+
+    def __init__(
+        self, ds: xr.Dataset, actual: xr.DataArray, budget: Optional[int] = None
+    ) -> None:
+        self._ds = ds
+        self._actual = actual
+        self._budget = budget
+
+    @cached_property
+    def buffer(self) -> SampleBuffer:
+        rand = random.Random(
+            validation_settings.get_variable_seed(str(self._actual.name))
+        )
+        plan = plan_samples(self._ds, self._actual, rand, self._budget)
+        buffer = read_samples(self._actual, plan)
+        profiling.count_sampled(buffer.size, buffer.chunk_bytes)
+        log.debug(
+            "sampled %s values of %s in %s windows from %s bytes of storage chunks",
+            buffer.size,
+            self._actual.name,
+            len(buffer.windows),
+            buffer.chunk_bytes,
+        )
+        return buffer
+
+
+def _extreme(reduction, array: np.ndarray) -> float:
+    if array.size == 0:
+        return math.nan
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN windows
+        return float(reduction(array))
+
+
+class ThroughputMeter:
+    """Bytes of storage chunks read per second by the sampled checks"""
+
+    def __init__(self) -> None:
+        self._bytes = 0
+        self._seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, nbytes: int, seconds: float) -> None:
+        with self._lock:
+            self._bytes += nbytes
+            self._seconds += seconds
+
+    def bytes_per_second(self) -> Optional[float]:
+        with self._lock:
+            if self._seconds <= 0:
+                return None
+            return self._bytes / self._seconds
+
+
+throughput = ThroughputMeter()
+
+
+def plan_samples(
+    ds: xr.Dataset,
+    actual: xr.DataArray,
+    rand: random.Random,
+    budget: Optional[int] = None,
+) -> SamplePlan:
+    """
+    Windows to read, stratified over the time axis and the valid grid points.
+    budget overrides the budget of the sampled min/max check.
+    """
+    dims = [str(dim) for dim in actual.dims]
+    acceptable = set().union(*get_acceptable_dims_from_parameter_key(str(actual.name)))
+    for dim in dims:
+        if dim not in acceptable:
+            raise ValueError(
+                f"Invalid dimension {dim}, cannot validate interval of {actual.name}"
+            )
+    if TIME not in dims:
+        return SamplePlan([tuple(slice(None) for _ in dims)], 0)
+
+    len_time = actual.sizes[TIME]
+    starts: Sequence[int] = _time_chunk_starts(actual) or range(len_time)
+    points = _valid_points(ds, rand)
+    if budget is None:
+        budget = _budget(actual)
+
+    unit_window = _window(actual, 0, 1, starts, points[0])
+    unit_bytes = max(sampled_chunk_bytes(actual, unit_window), 1)
+    units = max(1, min(len(starts), budget // unit_bytes))
+    steps = int(units * len_time / len(starts))
+    count = max(1, min(MAX_WINDOWS, units, steps // MIN_WINDOW_STEPS))
+    units_per_window = units // count
+    stratum = len(starts) / count
+
+    windows = []
+    for i in range(count):
+        low, high = int(i * stratum), int((i + 1) * stratum)
+        first = rand.randint(low, max(low, high - units_per_window))
+        windows.append(
+            _window(actual, first, units_per_window, starts, points[i % len(points)])
+        )
+    return SamplePlan(windows, budget)
+
+
+def read_samples(actual: xr.DataArray, plan: SamplePlan) -> SampleBuffer:
+    """Read the windows of plan; stops when --time-budget is used"""
+    time_budget = validation_settings.get_time_budget()
+    started = time.perf_counter()
+    pending = list(plan.windows)
+    batch_size = 1 if time_budget is not None else len(pending)
+    buffer = SampleBuffer()
+    while pending:
+        batch, pending = pending[:batch_size], pending[batch_size:]
+        batch_started = time.perf_counter()
+        arrays = compute(*[actual[window].data for window in batch])
+        batch_bytes = sum(sampled_chunk_bytes(actual, window) for window in batch)
+        throughput.record(batch_bytes, time.perf_counter() - batch_started)
+        buffer.chunk_bytes += batch_bytes
+        buffer.windows += batch
+        buffer.arrays += [np.asarray(array) for array in arrays]
+
+        if time_budget is None or not pending:
+            continue
+        remaining = time_budget - (time.perf_counter() - started)
+        bytes_per_second = throughput.bytes_per_second()
+        if remaining <= 0 or bytes_per_second is None:
+            log.info(
+                "time budget of %s used after %s of %s windows",
+                actual.name,
+                len(buffer.windows),
+                len(plan.windows),
+            )
+            break
+        window_bytes = buffer.chunk_bytes / len(buffer.windows)
+        batch_size = max(1, int(remaining * bytes_per_second / window_bytes))
+    return buffer
+
+
+def _window_size(actual: xr.DataArray, window: Window) -> int:
+    return math.prod(
+        len(range(*index.indices(size))) for index, size in zip(window, actual.shape)
+    )
+
+
+def _budget(actual: xr.DataArray) -> int:
+    io_budget = validation_settings.get_io_budget()
+    time_budget = validation_settings.get_time_budget()
+    bytes_per_second = throughput.bytes_per_second()
+    budgets = []
+    if io_budget is not None:
+        budgets.append(io_budget)
+    if time_budget is not None and bytes_per_second is not None:
+        budgets.append(int(time_budget * bytes_per_second))
+    if budgets:
+        return min(budgets)
+    return _default_budget(actual)
+
+
+def _default_budget(actual: xr.DataArray) -> int:
+    """Size of the single window of --sample-size timestamps read before"""
+    len_time = actual.sizes[TIME]
+    sample_size = validation_settings.get_sample_size()
+    sample_len = sample_size if len_time > sample_size * 2 else max(1, len_time // 2)
+    spectral = FREQUENCY in actual.dims
+    values_per_step = math.prod(
+        size
+        for dim, size in actual.sizes.items()
+        if dim != TIME and not (spectral and dim in (SOUTH_NORTH, WEST_EAST))
+    )
+    return sample_len * values_per_step * actual.dtype.itemsize
+
+
+def _valid_points(ds: xr.Dataset, rand: random.Random) -> List[Tuple[int, int]]:
+    """Random valid grid points (GRID_POINT_MASK == 1), at most one per window"""
+    context = context_for(ds)
+    valids = context.valid_points
+    if len(valids) == 0:
+        raise ValueError(f"No grid points with {GRID_POINT_MASK} == 1")
+    picked = rand.sample(range(len(valids)), min(len(valids), MAX_WINDOWS))
+    return [context.grid_point(valids[i]) for i in picked]
+
+
+def _window(
+    actual: xr.DataArray,
+    first_unit: int,
+    units: int,
+    starts: Sequence[int],
+    point: Tuple[int, int],
+) -> Window:
+    storage_chunks = _storage_chunks(actual)
+    spectral = FREQUENCY in actual.dims
+    last_unit = first_unit + units
+    window: Window = ()
+    for axis, dim in enumerate(actual.dims):
+        if dim == TIME:
+            stop = starts[last_unit] if last_unit < len(starts) else actual.shape[axis]
+            window += (slice(starts[first_unit], stop),)
+        elif dim in (SOUTH_NORTH, WEST_EAST):
+            index = point[0] if dim == SOUTH_NORTH else point[1]
+            if storage_chunks is not None:
+                start = index // storage_chunks[axis] * storage_chunks[axis]
+                window += (slice(start, start + storage_chunks[axis]),)
+            elif spectral:
+                window += (slice(index, index + 1),)
+            else:
+                window += (slice(None),)
+        else:
+            window += (slice(None),)
+    return window
+
+
+def _storage_chunks(actual: xr.DataArray) -> Optional[Tuple[int, ...]]:
+    """Chunk shape of the variable in the file(s), None if not stored in chunks"""
+    chunksizes = actual.encoding.get("chunksizes")
+    if chunksizes is None or len(chunksizes) != actual.ndim:
+        return None
+    return tuple(int(size) for size in chunksizes)
+
+
+def _time_chunk_starts(actual: xr.DataArray) -> Optional[List[int]]:
+    """
+    Index of the first timestamp of every storage chunk along time, None if
+    snapping to chunks does not save anything. Each file of a multi-file
+    dataset starts at a new storage chunk; the dask chunks are aligned to the
+    files, and to the storage chunks within them.
+    """
+    storage_chunks = _storage_chunks(actual)
+    if storage_chunks is None:
+        return None
+    axis = actual.dims.index(TIME)
+    time_chunk = storage_chunks[axis]
+    if time_chunk <= 1:
+        return None
+    segments = (
+        actual.chunks[axis] if actual.chunks is not None else (actual.shape[axis],)
+    )
+    starts: List[int] = []
+    offset = 0
+    for length in segments:
+        starts += range(offset, offset + length, time_chunk)
+        offset += length
+    return starts
+
+
+def sampled_chunk_bytes(actual: xr.DataArray, window: Window) -> int:
+    """Uncompressed size of the storage chunks holding the values of window"""
+    storage_chunks = _storage_chunks(actual)
+    if storage_chunks is None:
+        return actual.dtype.itemsize * _window_size(actual, window)
+    chunk_starts = _time_chunk_starts(actual)
+    chunks_touched = 1
+    for axis, (index, size) in enumerate(zip(window, actual.shape)):
+        start, stop, _ = index.indices(size)
+        if actual.dims[axis] == TIME and chunk_starts is not None:
+            chunks_touched *= bisect.bisect_left(chunk_starts, stop) - (
+                bisect.bisect_right(chunk_starts, start) - 1
+            )
+        else:
+            chunk = storage_chunks[axis]
+            chunks_touched *= (stop - 1) // chunk - start // chunk + 1
+    return chunks_touched * math.prod(storage_chunks) * actual.dtype.itemsize
@@ -1,75 +1,79 @@
 import random
-from typing import List, Tuple, Union
+from typing import List, Optional, Tuple
 
+import numpy as np
 import xarray as xr
 
-from ....schemas import (
-    DIRECTION,
-    FREQUENCY,
-    HEIGHT_DIM_PREFIX,
-    SOUTH_NORTH,
-    TIME,
-    WEST_EAST,
-    ParameterConfig,
-)
+from ....schemas import ParameterConfig
 from ... import validation_settings
 from ...utils import Severity, validation_node
+from .sample_planner import SMALL_SAMPLE_BUDGET, VariableSample
 
 
 @validation_node(severity=Severity.WARNING)
 def sig_dig_validator(
     data: xr.DataArray,
     expected: ParameterConfig,
-    number_of_iterations: int = 100,
+    number_of_iterations: Optional[int] = None,
+    sample: Optional[VariableSample] = None,
 ) -> List[str]:
     """
     Check if values have the correct minimum amount of significant decimals.
-    This is checked by grabbing random indexes for "number_of_iterations" times.
+    This is checked on "number_of_iterations" random values (default
+    --sig-dig-samples) from the sample of the variable, which is shared with
+    the min/max check. Any value with too few decimals is reported, unless
+    --sig-dig-tolerance allows a fraction of them.
     """
-    results = []
-    faults = 0
-    rand = random.Random(validation_settings.get_random_seed())
+    if number_of_iterations is None:
+        number_of_iterations = validation_settings.get_sig_dig_samples()
+    rand = random.Random(validation_settings.get_variable_seed(str(data.name)))
+    if sample is None:
+        sample = VariableSample(data.to_dataset(), data, SMALL_SAMPLE_BUDGET)
 
-    for _ in range(number_of_iterations):
-        random_index = _get_random_index(data, rand)
-        random_value = data[random_index]
-        sig_digs = str(random_value.values)[::-1].find(".")
-        if sig_digs == -1:
-            # If there is no decimal separation it is most likely a fill value (nan)
-            continue
-        if sig_digs < expected.number_of_significant_decimals:
-            faults += 1
-
-    if faults > 0:
-        results += [
-            f"{faults}/{number_of_iterations} random samples had less than {expected.number_of_significant_decimals}"
+    values = sample.buffer.random_values(rand, number_of_iterations)
+    fraction, faults, checked = fault_fraction(
+        values, expected.number_of_significant_decimals
+    )
+    if faults and fraction > validation_settings.get_sig_dig_tolerance():
+        return [
+            f"{faults}/{checked} random samples had less than {expected.number_of_significant_decimals}"
             f"significant decimals for variable {data.name}"
         ]
-    return results
+    return []
 
 
-def _get_random_index(
-    data: xr.DataArray,
-    rand: random.Random,
-) -> Tuple[Union[int, slice], ...]:
-    random_index = ()
-    for dim in data.dims:
-        if dim == TIME:
-            random_index += (rand.randint(0, len(data[TIME]) - 1),)
-        elif dim == f"{HEIGHT_DIM_PREFIX}{data.name}":
-            random_index += (
-                rand.randint(0, len(data[f"{HEIGHT_DIM_PREFIX}{data.name}"]) - 1),
-            )
-        elif dim == SOUTH_NORTH:
-            random_index += (rand.randint(0, len(data[SOUTH_NORTH]) - 1),)
-        elif dim == WEST_EAST:
-            random_index += (rand.randint(0, len(data[WEST_EAST]) - 1),)
-        elif dim == FREQUENCY:
-            random_index += (rand.randint(0, len(data[FREQUENCY]) - 1),)
-        elif dim == DIRECTION:
-            random_index += (rand.randint(0, len(data[DIRECTION]) - 1),)
-        else:
-            raise ValueError(
-                f"Invalid dimension {dim}, cannot validate interval of {data.name}"
-            )
-    return random_index
+def fault_fraction(values: np.ndarray, decimals: int) -> Tuple[float, int, int]:
+    """
+    Fraction of the finite values with less than decimals decimals, with the
+    number of such values and of finite values. Values that are not floats
+    are not checked.
+    """
+    if not np.issubdtype(values.dtype, np.floating):
+        return 0.0, 0, 0
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return 0.0, 0, 0
+    faults = int(np.count_nonzero(effective_decimals(values, decimals) < decimals))
+    return faults / values.size, faults, values.size
+
+
+def effective_decimals(values: np.ndarray, max_decimals: int) -> np.ndarray:
+    """
+    Number of decimals of the shortest decimal number that rounds to each value
+    in its own dtype, as in str(value); max_decimals + 1 for values that need
+    more. E.g. float32 0.1 has 1 decimal, although the binary value is not 0.1.
+    Rounding is done in float64 and compared after casting back to the dtype of
+    values, so float32 values are judged by float32 precision.
+    """
+    exact = values.astype(np.float64)
+    result = np.full(values.shape, max_decimals + 1)
+    unresolved = np.ones(values.shape, dtype=bool)
+    for decimals in range(max_decimals + 1):
+        rounded = np.round(exact[unresolved], decimals).astype(values.dtype)
+        resolved = rounded == values[unresolved]
+        indices = np.flatnonzero(unresolved)[resolved]
+        result.flat[indices] = decimals
+        unresolved.flat[indices] = False
+        if not unresolved.any():
+            break
+    return result
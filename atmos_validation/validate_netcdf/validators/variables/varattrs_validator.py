@@ -1,10 +1,20 @@
 import ast
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
 import xarray as xr
 
 from ....schemas.dim_constants import HEIGHT_DIM_PREFIX
-from ...utils import Severity, almost_equal, is_measurement, validation_node
+from ...utils import Message, Severity, almost_equal, validation_node
+from ...validation_context import context_for
+
+INVALID_HEIGHT = (
+    """The variable "{}" has invalid height, "{}"."""
+    """Variables of category 'Atmosphere' must be positive."""
+)
+INVALID_DEPTH = (
+    """The variable "{}" has invalid depth, "{}"."""
+    """Variables of category 'Ocean' must be negative."""
+)
 
 
 @validation_node(severity=Severity.ERROR)
@@ -69,7 +79,7 @@ def var_allowed_instruments_validator(
     """Verify that instrument matches allowed instrument types if system type is measurement"""
     result = []
 
-    if not is_measurement(ds):
+    if not context_for(ds).is_measurement:
         return result
 
     try:
@@ -98,30 +108,22 @@ def var_allowed_instruments_validator(
 @validation_node(severity=Severity.ERROR)
 def var_height_depth_validator(
     key: str, ds: xr.Dataset, parameter_category: str
-) -> List[str]:
+) -> Iterator[Message]:
     """
     Verify that variables of "parameter_category" type "Atmosphere" have positive
-    height, and "Ocean" have negative depth.
+    height, and "Ocean" have negative depth. Yields a finding per invalid level.
     """
-    result = []
     try:
         values = ds[f"{HEIGHT_DIM_PREFIX}{key}"]
 
         if parameter_category == "Atmosphere":
             for value in values:
                 if value < 0:
-                    result += [
-                        f"""The variable "{key}" has invalid height, "{value}"."""
-                        f"""Variables of category 'Atmosphere' must be positive."""
-                    ]
+                    yield Message(INVALID_HEIGHT, (key, value))
         elif parameter_category == "Ocean":
             for value in values:
                 if value > 0:
-                    result += [
-                        f"""The variable "{key}" has invalid depth, "{value}"."""
-                        f"""Variables of category 'Ocean' must be negative."""
-                    ]
+                    yield Message(INVALID_DEPTH, (key, value))
     except KeyError:
         # missing attributes are reported by "var_mandatory_attrs_validator"
         pass
-    return result
@@ -1,12 +1,15 @@
-from typing import List
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
 
 import xarray as xr
-from pydantic import TypeAdapter
 
-from ....schemas import ParameterConfig, ParameterConfigs
-from ...utils import Severity, fetch_config_bytes, is_measurement, validation_node
+from ....schemas import ParameterConfig
+from ... import validation_settings
+from ...utils import Severity, validation_node
+from ...validation_context import context_for
 from ...validation_logger import log
-from ...validation_settings import URL_TO_PARAMETERS
+from .sample_planner import SMALL_SAMPLE_BUDGET, VariableSample
 from .sig_dig_validator import sig_dig_validator
 from .varattrs_validator import (
     var_allowed_instruments_validator,
@@ -16,41 +19,107 @@ from .varattrs_validator import (
     var_required_attr_values_validator,
 )
 from .vardims_validator import vardims_validator
-from .varinterval_validator import varinterval_validator
-
-
-def load_parameter_config_from_endpoint():
-    log.debug("download parameters config")
-    data = fetch_config_bytes(URL_TO_PARAMETERS)
-    adapter = TypeAdapter(List[ParameterConfig])
-    return ParameterConfigs(configs=adapter.validate_json(data))
+from .varinterval_validator import (
+    FullScanStats,
+    compute_full_scan_stats,
+    varinterval_validator,
+)
 
 
 @validation_node(severity=Severity.ERROR)
 def variables_validator(ds: xr.Dataset) -> List[str]:
-    valids = load_parameter_config_from_endpoint().param_dict
+    valids = context_for(ds).parameter_configs
     errors = []
 
-    for key in [str(k) for k in ds.keys()]:
+    keys = [str(k) for k in ds.keys()]
+    full_scan: Dict[str, FullScanStats] = {}
+    if validation_settings.should_check_min_max_full():
+        full_scan = _run_full_scan(ds, [key for key in keys if key in valids])
+
+    jobs = validation_settings.get_jobs()
+    if jobs > 1:
+        return errors + _validate_variables_in_pool(ds, keys, valids, full_scan, jobs)
+
+    for key in keys:
         if key not in valids:
             errors += [f"{key} is not a valid key"]
         else:
-            errors += variable_validator(ds, key, valids[key])
+            errors += variable_validator(ds, key, valids[key], full_scan.get(key))
     return errors
 
 
+def _validate_variables_in_pool(
+    ds: xr.Dataset,
+    keys: List[str],
+    valids: Dict[str, ParameterConfig],
+    full_scan: Dict[str, FullScanStats],
+    jobs: int,
+) -> List[str]:
+    """
+    Run variable_validator for all valid keys in a thread pool. Results are merged
+    in key order, so the output is identical to a serial run. Each task runs in a
+    copy of the caller's context, as the validation settings live in ContextVars.
+    """
+    log.info("validating %s variables using %s workers", len(keys), jobs)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures: Dict[str, Future[List[str]]] = {
+            key: pool.submit(
+                contextvars.copy_context().run,
+                variable_validator,
+                ds,
+                key,
+                valids[key],
+                full_scan.get(key),
+            )
+            for key in keys
+            if key in valids
+        }
+
+    errors = []
+    for key in keys:
+        if key not in valids:
+            errors += [f"{key} is not a valid key"]
+        else:
+            errors += futures[key].result()
+    return errors
+
+
+def _run_full_scan(ds: xr.Dataset, keys: List[str]) -> Dict[str, FullScanStats]:
+    """
+    Single pass over the dataset for all variables with a supported layout.
+    On failure each variable falls back to its own scan in varinterval_validator,
+    which then reports the error for the variable it belongs to.
+    """
+    context = context_for(ds)
+    supported = [
+        key
+        for key in keys
+        if [str(dim) for dim in ds[key].dims] in context.acceptable_dims(key)
+    ]
+    log.info("computing full min/max scan for %s variables", len(supported))
+    try:
+        return compute_full_scan_stats(ds, supported)
+    except Exception:
+        log.exception("full min/max scan failed, falling back to per variable scans")
+        return {}
+
+
 @validation_node(severity=Severity.ERROR, postfix=lambda args, _: args[1])
 def variable_validator(
-    ds: xr.Dataset, key: str, parameter_settings: ParameterConfig
+    ds: xr.Dataset,
+    key: str,
+    parameter_settings: ParameterConfig,
+    full_scan_stats: Optional[FullScanStats] = None,
 ) -> List[str]:
     var = ds[key]
+    sample = _variable_sample(ds, var)
     return (
         []
         + vardims_validator(key, var.dims, parameter_settings.dims)
         + var_mandatory_attrs_validator(
             key,
             var.attrs,
-            parameter_settings.get_required_attributes(is_measurement(ds)),
+            parameter_settings.get_required_attributes(context_for(ds).is_measurement),
         )
         + var_required_attr_values_validator(
             key, var.attrs, parameter_settings.get_required_values()
@@ -58,8 +127,21 @@ def variable_validator(
         + var_allowed_instruments_validator(
             key, ds, parameter_settings.allowed_instruments
         )
-        + varinterval_validator(ds, var, parameter_settings)
-        + sig_dig_validator(var, parameter_settings)
+        + varinterval_validator(ds, var, parameter_settings, full_scan_stats, sample)
+        + sig_dig_validator(var, parameter_settings, sample=sample)
         + var_height_longname_validator(key, ds)
         + var_height_depth_validator(key, ds, parameter_settings.parameter_category)
     )
+
+
+def _variable_sample(ds: xr.Dataset, var: xr.DataArray) -> VariableSample:
+    """
+    One sample of values per variable, read once and checked by all value-level
+    validators. It is sized for the sampled min/max check, or small if that check
+    does not sample.
+    """
+    min_max_sampled = not (
+        validation_settings.should_check_min_max_full()
+        or validation_settings.should_skip_min_max_check()
+    )
+    return VariableSample(ds, var, None if min_max_sampled else SMALL_SAMPLE_BUDGET)
@@ -1,102 +1,77 @@
-import random
-from typing import List, Tuple, Union
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 import xarray as xr
+from dask.base import compute
 
-from ....schemas import (
-    FREQUENCY,
-    GRID_POINT_MASK,
-    SOUTH_NORTH,
-    TIME,
-    WEST_EAST,
-    ParameterConfig,
-    get_acceptable_dims_from_parameter_key,
-    get_height_dim_from_parameter_key,
-)
+from ....schemas import ParameterConfig
 from ... import validation_settings
 from ...utils import Severity, validation_node
+from ...validation_context import context_for
 from ...validation_logger import log
+from .sample_planner import VariableSample
 
 
-def _compression_noise_tolerance(number_of_significant_decimals: int) -> float:
-    """Half a unit in the last significant decimal, bounding lossy-compression jitter."""
-    return 0.5 * 10 ** (-number_of_significant_decimals)
-
+@dataclass(frozen=True)
+class FullScanStats:
+    """Reductions over every value of a variable, computed by compute_full_scan_stats"""
 
-def _get_random_time_slice(actual: xr.DataArray, rand: random.Random) -> slice:
-    """To save processing time we only check a random sample of timestamps"""
-    len_time = len(actual.Time)
-    sample_size = validation_settings.get_sample_size()
-    if len_time > sample_size * 2:
-        start = rand.randint(0, len_time - sample_size - 1)
-        time_slice = slice(start, start + sample_size)
-    else:
-        sample_len = max(1, len_time // 2)
-        start = rand.randint(0, len_time - sample_len)
-        time_slice = slice(start, start + sample_len)
-    return time_slice
-
-
-def _get_random_spatial_point(
-    ds: xr.Dataset, rand: random.Random
-) -> tuple[slice, slice]:
-    """To save processing time we check 1x1 random spatial point where GRID_POINT_MASK == 1"""
-    if GRID_POINT_MASK not in ds:
-        ds = ds.assign(
-            {
-                GRID_POINT_MASK: xr.DataArray(
-                    np.ones((ds.sizes[SOUTH_NORTH], ds.sizes[WEST_EAST])),
-                    dims=(SOUTH_NORTH, WEST_EAST),
-                )
-            }
-        )
+    min: float
+    max: float
+    nan_count: int
+    size: int
 
-    mask = ds[GRID_POINT_MASK].values
-    valids = np.where(mask == 1)
-    indices = list(zip(valids[0], valids[1]))
-    sn_index, we_index = rand.choice(indices)
-
-    return (slice(sn_index, sn_index + 1), slice(we_index, we_index + 1))
 
+def compute_full_scan_stats(
+    ds: xr.Dataset, keys: Iterable[str]
+) -> Dict[str, FullScanStats]:
+    """
+    Build the min, max and NaN-count reductions for all given variables into a
+    single dask graph and compute it in one go. Reductions on the same variable
+    share the chunk-loading tasks, so every storage chunk is read and
+    decompressed once instead of once per reduction and variable.
+    """
+    reductions = {}
+    for key in keys:
+        var = ds[key]
+        if not np.issubdtype(var.dtype, np.number):
+            continue
+        if var.chunks is None:
+            # lazily indexed (single file) variables are made dask-backed so they
+            # can take part in the shared graph
+            var = var.chunk("auto")
+        reductions[key] = (var.min(), var.max(), var.isnull().sum())
+
+    (computed,) = compute(reductions)
+    return {
+        key: FullScanStats(
+            min=float(smallest),
+            max=float(largest),
+            nan_count=int(nan_count),
+            size=int(ds[key].size),
+        )
+        for key, (smallest, largest, nan_count) in computed.items()
+    }
 
-def _get_slice_tuple(
-    ds: xr.Dataset, actual: xr.DataArray, rand: random.Random
-) -> Tuple[Union[int, slice], ...]:
-    if FREQUENCY in actual.dims and len(actual.dims) == 5:
-        result = ()
-        result += (_get_random_time_slice(actual, rand),)
-        result += _get_random_spatial_point(ds, rand)
-        result += (slice(None, None),)
-        result += (slice(None, None),)
-        return result
 
-    key = str(actual.name)
-    height_dim = get_height_dim_from_parameter_key(key)
-    result = ()
-    for dim in actual.dims:
-        if dim == TIME:
-            result += (_get_random_time_slice(actual, rand),)
-        elif dim == SOUTH_NORTH:
-            result += (slice(None, None),)
-        elif dim == WEST_EAST:
-            result += (slice(None, None),)
-        elif dim == height_dim:
-            result += (slice(None, None),)
-        else:
-            raise ValueError(
-                f"Invalid dimension {dim}, cannot validate interval of {key}"
-            )
-    return result
+def _compression_noise_tolerance(number_of_significant_decimals: int) -> float:
+    """Half a unit in the last significant decimal, bounding lossy-compression jitter."""
+    return 0.5 * 10 ** (-number_of_significant_decimals)
 
 
 @validation_node(severity=Severity.ERROR)
 def none_less_than_min_validator(
-    actual: xr.DataArray, expected: ParameterConfig
+    actual: xr.DataArray,
+    expected: ParameterConfig,
+    full_scan_stats: Optional[FullScanStats] = None,
 ) -> List[str]:
     if expected.min == "NA":
         return []
-    smallest = float(actual.min().load())
+    if full_scan_stats is not None:
+        smallest = full_scan_stats.min
+    else:
+        smallest = float(actual.min().load())
     tolerance = _compression_noise_tolerance(expected.number_of_significant_decimals)
     if smallest < expected.min - tolerance:
         return [
@@ -109,11 +84,16 @@ def none_less_than_min_validator(
 
 @validation_node(severity=Severity.ERROR)
 def none_larger_than_max_validator(
-    actual: xr.DataArray, expected: ParameterConfig
+    actual: xr.DataArray,
+    expected: ParameterConfig,
+    full_scan_stats: Optional[FullScanStats] = None,
 ) -> List[str]:
     if expected.max == "NA":
         return []
-    largest = float(actual.max().load())
+    if full_scan_stats is not None:
+        largest = full_scan_stats.max
+    else:
+        largest = float(actual.max().load())
     tolerance = _compression_noise_tolerance(expected.number_of_significant_decimals)
     if largest > expected.max + tolerance:
         return [
@@ -124,19 +104,35 @@ def none_larger_than_max_validator(
     return []
 
 
+@validation_node(severity=Severity.WARNING)
+def not_only_missing_values_validator(
+    actual: xr.DataArray, full_scan_stats: FullScanStats
+) -> List[str]:
+    if full_scan_stats.size > 0 and full_scan_stats.nan_count == full_scan_stats.size:
+        return [f"{actual.name} contains only missing values (NaN)"]
+    return []
+
+
 @validation_node(severity=Severity.ERROR)
 def varinterval_validator(
-    ds: xr.Dataset, actual: xr.DataArray, expected: ParameterConfig
+    ds: xr.Dataset,
+    actual: xr.DataArray,
+    expected: ParameterConfig,
+    full_scan_stats: Optional[FullScanStats] = None,
+    sample: Optional[VariableSample] = None,
 ) -> List[str]:
     """
     Take a bunch of random intervals in
     time, height, south_north, west_east
     and check if any datapoints are outside the interval
-    Only done if dims correspond to expected dims
+    Only done if dims correspond to expected dims.
+    With --check-min-max-full, full_scan_stats holds the precomputed
+    reductions from compute_full_scan_stats. Otherwise the values of sample
+    are checked, which is read here if no other check read it before.
     """
     log.info("validating interval for %s", actual.name)
     dims = [str(dim) for dim in actual.dims]
-    accepted = get_acceptable_dims_from_parameter_key(str(actual.name))
+    accepted = context_for(ds).acceptable_dims(str(actual.name))
     if dims not in accepted:
         return [
             f"Unsupported dimensional layout {dims}. Cannot evaluate interval. Accepted dimensional"
@@ -146,26 +142,31 @@ def varinterval_validator(
     result = []
     if validation_settings.should_check_min_max_full():
         # Long running operation, so have to explicitly request this in args
-        result += none_less_than_min_validator(actual, expected)
-        result += none_larger_than_max_validator(actual, expected)
+        result += none_less_than_min_validator(actual, expected, full_scan_stats)
+        result += none_larger_than_max_validator(actual, expected, full_scan_stats)
+        if full_scan_stats is not None:
+            result += not_only_missing_values_validator(actual, full_scan_stats)
         return result
     if validation_settings.should_skip_min_max_check():
         return []
-    return _check_randomly_selected_intervals_min_max(ds, actual, expected)
+    return _check_randomly_selected_intervals_min_max(
+        ds, actual, expected, sample or VariableSample(ds, actual)
+    )
 
 
 def _check_randomly_selected_intervals_min_max(
-    ds: xr.Dataset, actual: xr.DataArray, expected: ParameterConfig
+    ds: xr.Dataset,
+    actual: xr.DataArray,
+    expected: ParameterConfig,
+    sample: Optional[VariableSample] = None,
 ):
-    rand = random.Random(validation_settings.get_random_seed())
-
-    slice_tuple = _get_slice_tuple(ds, actual, rand)
-    vals = actual[slice_tuple]
-    vals.load()
+    buffer = (sample or VariableSample(ds, actual)).buffer
+    smallest, smallest_window = buffer.smallest()
+    largest, largest_window = buffer.largest()
 
     result = []
-    result += undermin_validator(actual, expected, slice_tuple, vals)
-    result += overmax_validator(actual, expected, slice_tuple, vals)
+    result += undermin_validator(actual, expected, smallest_window, smallest)
+    result += overmax_validator(actual, expected, largest_window, largest)
     return result
 
 
@@ -173,13 +174,12 @@ def _check_randomly_selected_intervals_min_max(
 def undermin_validator(
     actual: xr.DataArray,
     expected: ParameterConfig,
-    slice_tuple: Tuple[Union[int, slice], ...],
-    vals: xr.DataArray,
+    slice_tuple: Tuple[slice, ...],
+    smallest: float,
 ) -> List[str]:
-    """Check if any of the values in vals:DataArray retrieved
-    from actual:DataArray are below minimum expected"""
+    """Check if the smallest sampled value of actual:DataArray, found in
+    slice_tuple, is below minimum expected"""
     if not isinstance(expected.min, str):
-        smallest = float(vals.min().values)
         tolerance = _compression_noise_tolerance(
             expected.number_of_significant_decimals
         )
@@ -196,13 +196,12 @@ def undermin_validator(
 def overmax_validator(
     actual: xr.DataArray,
     expected: ParameterConfig,
-    slice_tuple: Tuple[Union[int, slice], ...],
-    vals: xr.DataArray,
+    slice_tuple: Tuple[slice, ...],
+    largest: float,
 ) -> List[str]:
-    """Check if any of the values in vals:DataArray retrieved
-    from actual:DataArray are below minimum expected"""
+    """Check if the largest sampled value of actual:DataArray, found in
+    slice_tuple, is above maximum expected"""
     if not isinstance(expected.max, str):
-        largest = float(vals.max().values)
         tolerance = _compression_noise_tolerance(
             expected.number_of_significant_decimals
         )